@@ -7,8 +7,14 @@ Executa backup completo e salva em arquivo local
 import requests
 import json
 import os
+import sys
 from datetime import datetime
 import logging
+from pathlib import Path
+
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent / "tools"))
+from supabase_client import get_client
 
 # Configurações
 SUPABASE_URL = "https://atwdkhlyrffbaugkaker.supabase.co"
@@ -38,17 +44,16 @@ def perform_backup():
     try:
         logging.info("Iniciando backup automatico...")
 
-        headers = {
-            "Authorization": f"Bearer {ANON_KEY}",
-            "Content-Type": "application/json"
-        }
+        client = get_client(SUPABASE_URL, ANON_KEY)
 
         payload = {
             "includeMetadata": True,
             "format": "json"
         }
 
-        response = requests.post(FUNCTION_URL, json=payload, headers=headers, timeout=300)
+        # The backup function can run for minutes - allow a long read timeout.
+        # Never resent: a lost response would start a second backup
+        response = client.post(FUNCTION_URL, json=payload, timeout=(5, 300), retry=False)
 
         if response.status_code == 200:
             result = response.json()
@@ -70,7 +75,12 @@ def perform_backup():
 
                 # Se houver URL de download, baixar o arquivo
                 if result.get("downloadUrl"):
-                    download_response = requests.get(result["downloadUrl"])
+                    download_url = result["downloadUrl"]
+                    if download_url.startswith("http"):
+                        # Absolute (signed) URL: plain request, no apikey/Authorization headers
+                        download_response = requests.get(download_url, timeout=(5, 300))
+                    else:
+                        download_response = client.get(download_url)
                     if download_response.status_code == 200:
                         backup_filename = f"{backup_dir}/backup_data_{timestamp}.json"
                         with open(backup_filename, 'w', encoding='utf-8') as f:
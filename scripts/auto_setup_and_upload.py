@@ -1,14 +1,27 @@
 """
 Automatic setup and upload to Supabase
 This script will attempt to insert data directly into Supabase
+
+Only rows that changed since the last successful upload are sent (see sync_state.py).
+
+Usage:
+    python auto_setup_and_upload.py                     # Upload new/changed rows
+    python auto_setup_and_upload.py --full              # Ignore sync state, upload everything
+    python auto_setup_and_upload.py --delete-missing    # Also delete rows no longer in the CSV
 """
 
 import pandas as pd
 import os
-import requests
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from pipeline_schema import read_pipeline_csv
+from sync_state import SyncState, state_path, in_filter, print_delta
+from supabase_client import get_client
+
 # Load environment variables
 load_dotenv()
 
@@ -20,6 +33,7 @@ SUPABASE_SERVICE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
 
 # Paths
 CSV_FILE = Path("SUPABASE_UPLOAD_242_LEADS.csv")
+TABLE = "priority_leads"
 
 def create_table_via_http():
     """Try to create table via HTTP POST to SQL endpoint"""
@@ -35,17 +49,13 @@ def create_table_via_http():
         sql = f.read()
 
     # Try to execute via REST API (this usually requires service role key)
+    client = get_client(SUPABASE_URL, SUPABASE_SERVICE_KEY if SUPABASE_SERVICE_KEY else SUPABASE_KEY)
     url = f"{SUPABASE_URL}/rest/v1/rpc/exec_sql"
-    headers = {
-        "apikey": SUPABASE_SERVICE_KEY if SUPABASE_SERVICE_KEY else SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_KEY if SUPABASE_SERVICE_KEY else SUPABASE_KEY}",
-        "Content-Type": "application/json"
-    }
 
     payload = {"query": sql}
 
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = client.post(url, json=payload)
         if response.status_code == 200:
             print("Table created successfully!")
             return True
@@ -66,7 +76,7 @@ def upload_data_via_rest():
         return False
 
     # Load CSV
-    df = pd.read_csv(CSV_FILE)
+    df = read_pipeline_csv(CSV_FILE)
     print(f"Loaded {len(df)} rows from CSV")
 
     # Convert to list of dicts
@@ -78,12 +88,18 @@ def upload_data_via_rest():
             if pd.isna(value):
                 record[key] = None
 
-    url = f"{SUPABASE_URL}/rest/v1/priority_leads"
+    # Only send rows whose hash changed since the last successful upload
+    state = SyncState(state_path(CSV_FILE, TABLE))
+    total_records = len(records)
+    records, current_hashes, removed_keys = state.diff(records, full='--full' in sys.argv)
+    delete_missing = '--delete-missing' in sys.argv
+    print_delta(records, current_hashes, removed_keys, delete_missing)
+
+    client = get_client(SUPABASE_URL, SUPABASE_KEY)
+    url = f"{SUPABASE_URL}/rest/v1/{TABLE}"
     headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
         "Content-Type": "application/json",
-        "Prefer": "return=minimal"
+        "Prefer": "return=minimal,resolution=merge-duplicates"
     }
 
     # Upload in batches of 50
@@ -96,10 +112,11 @@ def upload_data_via_rest():
         print(f"Uploading batch {i//batch_size + 1}/{(len(records)-1)//batch_size + 1} ({len(batch)} records)...")
 
         try:
-            response = requests.post(url, json=batch, headers=headers)
+            response = client.post(url, json=batch, headers=headers, params={"on_conflict": "account_number"})
 
             if response.status_code in [200, 201]:
                 total_uploaded += len(batch)
+                state.mark_synced(batch, current_hashes)
                 print(f"  Success! Total uploaded: {total_uploaded}/{len(records)}")
             else:
                 error_msg = f"Batch {i//batch_size + 1} failed: {response.status_code} - {response.text[:200]}"
@@ -117,14 +134,35 @@ def upload_data_via_rest():
             print(f"  ERROR: {error_msg}")
             errors.append(error_msg)
 
+    # Remove rows whose account_number vanished from the CSV
+    total_deleted = 0
+    if delete_missing and removed_keys:
+        print(f"Deleting {len(removed_keys)} vanished records...")
+        for i in range(0, len(removed_keys), 100):
+            keys = removed_keys[i:i+100]
+            try:
+                response = client.delete(url, headers=headers, params={"account_number": in_filter(keys)})
+                if response.status_code in [200, 204]:
+                    state.forget(keys)
+                    total_deleted += len(keys)
+                else:
+                    errors.append(f"Delete failed: {response.status_code} - {response.text[:200]}")
+            except Exception as e:
+                errors.append(f"Delete error: {str(e)}")
+
+    state.save()
+
     print(f"\n{'='*80}")
     print(f"Upload Complete!")
-    print(f"Total uploaded: {total_uploaded}/{len(records)}")
+    print(f"Total uploaded: {total_uploaded}/{len(records)} changed ({total_records} in CSV)")
+    if delete_missing:
+        print(f"Total deleted: {total_deleted}")
     if errors:
         print(f"Errors: {len(errors)}")
     print(f"{'='*80}")
 
-    return total_uploaded > 0
+    # Nothing to send is a successful sync
+    return total_uploaded > 0 or not errors
 
 def main():
     print("="*80)
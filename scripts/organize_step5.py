@@ -5,13 +5,39 @@ Separa: Lovable (React) | Scripts Python | Dados | Docs
 
 Autor: Claude Code
 Data: 19 Dezembro 2025
+
+As pastas grandes (node_modules, .git, src, dados) sao espelhadas com
+reflinks/hardlinks em vez de copias completas; rodar de novo so atualiza o
+que mudou (tamanho + mtime).
+
+Uso:
+    python organize_step5.py                      # --link-mode auto (reflink -> hardlink -> copia)
+    python organize_step5.py --link-mode copy     # Copias independentes, como antes
+    (modos: auto, reflink, hardlink, copy)
 """
 
 import os
+import sys
 import shutil
 from pathlib import Path
 from datetime import datetime
 
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+
+from file_mirror import Mirror, MODES
+
+def link_mode():
+    """--link-mode MODE (default auto)"""
+    if '--link-mode' in sys.argv:
+        index = sys.argv.index('--link-mode') + 1
+        mode = sys.argv[index] if index < len(sys.argv) else ''
+        if mode not in MODES:
+            print(f"❌ --link-mode deve ser um de: {', '.join(MODES)}")
+            sys.exit(2)
+        return mode
+    return "auto"
+
 def create_backup():
     """Cria backup antes de reorganizar"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -65,8 +91,8 @@ def create_folder_structure():
 
     print("✅ Estrutura criada!")
 
-def move_lovable_files():
-    """Move arquivos do projeto Lovable"""
+def move_lovable_files(mirror):
+    """Espelha o projeto Lovable em LOVABLE_PROJECT/ (links, so o que mudou)"""
     lovable_items = [
         "src",
         "public",
@@ -95,17 +121,12 @@ def move_lovable_files():
     for item in lovable_items:
         source = Path(item)
         if source.exists():
-            dest = Path("LOVABLE_PROJECT") / item
-            if source.is_dir():
-                if dest.exists():
-                    shutil.rmtree(dest)
-                shutil.copytree(source, dest)
-            else:
-                shutil.copy2(source, dest)
+            mirror.mirror(source, Path("LOVABLE_PROJECT") / item)
             print(f"  ✓ {item}")
             moved += 1
 
     print(f"✅ {moved} itens movidos para LOVABLE_PROJECT/")
+    print(f"   {mirror.describe()}")
 
 def move_python_scripts():
     """Move scripts Python"""
@@ -140,7 +161,7 @@ Pillow==10.0.0
 
     print(f"✅ {moved} scripts movidos + requirements.txt criado")
 
-def move_data_files():
+def move_data_files(mirror):
     """Move arquivos de dados"""
     csv_patterns = {
         "LOVABLE_UPLOAD": "DATA/processed",
@@ -164,10 +185,7 @@ def move_data_files():
     for folder in data_folders:
         source = Path(folder)
         if source.exists():
-            dest = Path("DATA/processed") / folder
-            if dest.exists():
-                shutil.rmtree(dest)
-            shutil.copytree(source, dest)
+            mirror.mirror(source, Path("DATA/processed") / folder)
             print(f"  ✓ {folder}/ → DATA/processed/")
             moved += 1
 
@@ -345,6 +363,9 @@ def main():
     print("🔄 REORGANIZADOR AUTOMÁTICO - STEP 5")
     print("=" * 60)
 
+    mirror = Mirror(link_mode())
+    print(f"\n🔗 Modo de cópia: {mirror.mode}")
+
     # Confirmação
     print("\n⚠️  ATENÇÃO: Este script vai reorganizar toda a estrutura!")
     print("   Um backup será criado automaticamente.")
@@ -362,9 +383,9 @@ def main():
         create_folder_structure()
 
         # 3. Mover arquivos
-        move_lovable_files()
+        move_lovable_files(mirror)
         move_python_scripts()
-        move_data_files()
+        move_data_files(mirror)
         move_database_files()
         move_documentation()
 
@@ -375,6 +396,7 @@ def main():
         print("✅ REORGANIZAÇÃO COMPLETA!")
         print("=" * 60)
         print(f"\n📦 Backup: {backup_folder}/")
+        print(f"🔗 {mirror.describe()}")
         print("📝 Novo README: README_NEW.md")
         print("\n⚠️  PRÓXIMOS PASSOS:")
         print("   1. Verificar se tudo está OK")
@@ -6,13 +6,32 @@ MANTÉM estrutura Lovable intacta na raiz!
 
 Autor: Claude Code
 Data: 19 Dezembro 2025
+
+Os movimentos sao planejados antes (origem, destino, tamanho, hash), executados
+em paralelo e verificados por hash. Um manifesto .reorg_manifest_*.json
+permite desfazer tudo exatamente.
+
+Uso:
+    python organize_step5_SAFE.py                      # Reorganiza
+    python organize_step5_SAFE.py --workers 16         # Mais threads (padrao 8)
+    python organize_step5_SAFE.py --rollback           # Desfaz a ultima reorganizacao
+    python organize_step5_SAFE.py --rollback MANIFEST  # Desfaz a partir de um manifesto
 """
 
 import os
-import shutil
+import sys
 from pathlib import Path
 from datetime import datetime
 
+# Shared pipeline modules live in tools/ (scripts/tools/ after an older
+# reorganization moved it there), so --rollback can always import them
+_SCRIPTS = Path(__file__).resolve().parent
+for _tools in (_SCRIPTS / "tools", _SCRIPTS.parent / "tools"):
+    if (_tools / "verified_move.py").exists():
+        sys.path.insert(0, str(_tools))
+
+from verified_move import VerifiedMover, rollback, latest_manifest, DEFAULT_WORKERS
+
 # ==========================================
 # ARQUIVOS QUE LOVABLE PRECISA NA RAIZ
 # (NÃO MOVER ESSES!)
@@ -68,7 +87,7 @@ def create_safe_structure():
 
     print("✅ Pastas criadas!")
 
-def move_python_scripts():
+def move_python_scripts(mover):
     """Move scripts Python para scripts/"""
     python_files = [
         "auto_setup_and_upload.py",
@@ -87,7 +106,7 @@ def move_python_scripts():
         source = Path(file)
         if source.exists():
             dest = Path("scripts") / file
-            shutil.move(source, dest)
+            mover.add(source, dest)
             print(f"  ✓ {file} → scripts/")
             moved += 1
 
@@ -107,7 +126,7 @@ Pillow>=10.0.0
 
     print(f"✅ {moved} scripts Python movidos")
 
-def move_data_files():
+def move_data_files(mover):
     """Move CSVs para data/"""
     print("\n💾 Movendo arquivos de dados...")
     moved = 0
@@ -119,7 +138,7 @@ def move_data_files():
             continue
 
         dest = Path("data/processed") / file.name
-        shutil.move(file, dest)
+        mover.add(file, dest)
         print(f"  ✓ {file.name} → data/processed/")
         moved += 1
 
@@ -129,15 +148,14 @@ def move_data_files():
         source = Path(folder)
         if source.exists():
             dest = Path("data/processed") / folder
-            if dest.exists():
-                shutil.rmtree(dest)
-            shutil.move(source, dest)
+            # Um destino antigo vai para o backup do manifesto (nao e apagado)
+            mover.add(source, dest, replace=True)
             print(f"  ✓ {folder}/ → data/processed/")
             moved += 1
 
     print(f"✅ {moved} itens de dados movidos")
 
-def move_database_files():
+def move_database_files(mover):
     """Move SQLs para database/"""
     sql_files = [
         "setup_supabase_tables.sql",
@@ -150,13 +168,13 @@ def move_database_files():
         source = Path(file)
         if source.exists():
             dest = Path("database") / file
-            shutil.move(source, dest)
+            mover.add(source, dest)
             print(f"  ✓ {file} → database/")
             moved += 1
 
     print(f"✅ {moved} arquivos SQL movidos")
 
-def move_documentation():
+def move_documentation(mover):
     """Move documentação para docs/"""
     docs_mapping = {
         # Setup guides
@@ -203,30 +221,19 @@ def move_documentation():
             source = Path(file)
             if source.exists():
                 dest = Path(dest_folder) / file
-                shutil.move(source, dest)
+                mover.add(source, dest)
                 print(f"  ✓ {file} → {dest_folder}/")
                 moved += 1
 
     # Move pasta DOCS antiga
     if Path("DOCS").exists() and Path("DOCS").is_dir():
         dest_docs = Path("docs/archives_old")
-        dest_docs.mkdir(parents=True, exist_ok=True)
-        shutil.move("DOCS", dest_docs / "DOCS_old")
+        mover.add("DOCS", dest_docs / "DOCS_old")
         print(f"  ✓ DOCS/ → docs/archives_old/")
         moved += 1
 
-    # Move pasta tools se existir
-    if Path("tools").exists() and Path("tools").is_dir():
-        if not any(Path("tools").iterdir()):  # Se vazia
-            Path("tools").rmdir()
-        else:
-            dest_tools = Path("scripts/tools")
-            dest_tools.mkdir(parents=True, exist_ok=True)
-            for item in Path("tools").iterdir():
-                shutil.move(str(item), str(dest_tools / item.name))
-            Path("tools").rmdir()
-            print(f"  ✓ tools/ → scripts/tools/")
-            moved += 1
+    # tools/ fica na raiz: e o pacote compartilhado do pipeline (verified_move,
+    # pipeline_schema...) que os scripts, o cli.py e o --rollback importam
 
     print(f"✅ {moved} documentos movidos")
 
@@ -336,6 +343,23 @@ def verify_lovable_structure():
 
 def main():
     """Função principal"""
+    workers = DEFAULT_WORKERS
+    if '--workers' in sys.argv:
+        workers = int(sys.argv[sys.argv.index('--workers') + 1])
+
+    if '--rollback' in sys.argv:
+        index = sys.argv.index('--rollback') + 1
+        manifest = sys.argv[index] if index < len(sys.argv) and not sys.argv[index].startswith('--') else latest_manifest()
+        if manifest is None:
+            print("❌ Nenhum manifesto .reorg_manifest_*.json encontrado")
+            return
+        print(f"↩️  Desfazendo: {manifest}")
+        restored, failed = rollback(manifest, workers=workers)
+        print(f"✅ {restored} arquivos restaurados")
+        if failed:
+            print(f"❌ {failed} arquivos nao verificados - veja o manifesto")
+        return
+
     print("=" * 70)
     print("REORGANIZADOR SEGURO - STEP 5")
     print("(NAO quebra o Lovable - mantem estrutura na raiz)")
@@ -357,15 +381,28 @@ def main():
         print("\n❌ Operação cancelada.")
         return
 
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    mover = VerifiedMover(f".reorg_manifest_{timestamp}.json", workers=workers)
+
     try:
         # 1. Criar estrutura
         create_safe_structure()
 
         # 2. Mover apenas arquivos não-Lovable
-        move_python_scripts()
-        move_data_files()
-        move_database_files()
-        move_documentation()
+        move_python_scripts(mover)
+        move_data_files(mover)
+        move_database_files(mover)
+        move_documentation(mover)
+
+        files, size = mover.plan()
+        print(f"\n📋 Plano: {files} arquivos, {size / 1e6:.1f} MB (tamanho + hash de cada um)")
+        ok = mover.run()
+        print(f"✅ Movidos e verificados: {mover.summary()}")
+        for entry in mover.failures()[:10]:
+            print(f"  ❌ {entry['source']}: {entry['error']}")
+        print(f"📜 Manifesto: {mover.manifest_path} (desfazer: --rollback)")
+        if not ok:
+            print("⚠️  Arquivos com falha ficaram no lugar original")
 
         # 3. Criar README explicativo
         create_organization_readme()
@@ -393,7 +430,10 @@ def main():
 
     except Exception as e:
         print(f"\n❌ ERRO: {e}")
-        print("   Nenhum arquivo crítico foi movido.")
+        if mover.manifest_path.exists():
+            print(f"   Arquivos podem ter sido movidos - desfazer: --rollback {mover.manifest_path}")
+        else:
+            print("   Nenhum arquivo crítico foi movido.")
         print("   Estrutura Lovable deve estar intacta.")
 
 if __name__ == "__main__":
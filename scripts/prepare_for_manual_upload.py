@@ -4,8 +4,13 @@ Creates a single CSV file optimized for Supabase import
 """
 
 import pandas as pd
+import sys
 from pathlib import Path
 
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from pipeline_schema import read_pipeline_csv
+
 # Paths
 CONTACT_LIST = Path("../Step 4 - AI Review & Evaluate/CONTACT_LISTS/CONTACT_LIST_FOCUSED.csv")
 LAND_LIST = Path("../Step 4 - AI Review & Evaluate/CONTACT_LISTS/VACANT_LAND/VACANT_LAND_PRIORITY.csv")
@@ -18,12 +23,12 @@ def prepare_data():
 
     # Load properties
     print(f"\nLoading properties from: {CONTACT_LIST}")
-    df_properties = pd.read_csv(CONTACT_LIST)
+    df_properties = read_pipeline_csv(CONTACT_LIST)
     print(f"Loaded {len(df_properties)} properties")
 
     # Load land
     print(f"\nLoading land from: {LAND_LIST}")
-    df_land = pd.read_csv(LAND_LIST)
+    df_land = read_pipeline_csv(LAND_LIST)
     print(f"Loaded {len(df_land)} land parcels")
 
     # Combine
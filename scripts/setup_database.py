@@ -2,9 +2,14 @@
 Setup Supabase Database - Create Tables and Permissions
 """
 
-from supabase import create_client
 from dotenv import load_dotenv
 import os
+import sys
+from pathlib import Path
+
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from supabase_client import get_client
 
 # Load environment variables
 load_dotenv()
@@ -79,7 +84,7 @@ def main():
     print(f"\nConnecting to: {SUPABASE_URL}")
 
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_client(SUPABASE_URL, SUPABASE_KEY)
         print("Connected successfully")
     except Exception as e:
         print(f"Connection failed: {e}")
@@ -1,15 +1,29 @@
 """
 Simple upload script - just uploads the data
 Assumes table already exists
+
+Only rows that changed since the last successful run are sent (see sync_state.py).
+
+Usage:
+    python simple_upload.py                     # Upload new/changed rows
+    python simple_upload.py --full              # Ignore sync state, upload everything
+    python simple_upload.py --delete-missing    # Also delete rows no longer in the CSV
 """
 
 import pandas as pd
 import os
-import requests
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 import json
 
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from pipeline_schema import read_pipeline_csv
+from sync_state import SyncState, state_path, in_filter, print_delta
+from supabase_client import get_client
+from supabase_async import bulk_upsert
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +31,10 @@ SUPABASE_URL = os.getenv('VITE_SUPABASE_URL')
 SUPABASE_KEY = os.getenv('VITE_SUPABASE_PUBLISHABLE_KEY')
 
 CSV_FILE = Path("SUPABASE_UPLOAD_242_LEADS.csv")
+TABLE = "priority_leads"
+
+FULL_SYNC = '--full' in sys.argv
+DELETE_MISSING = '--delete-missing' in sys.argv
 
 print("="*80)
 print("SIMPLE SUPABASE UPLOAD")
@@ -28,7 +46,7 @@ if not CSV_FILE.exists():
     exit(1)
 
 # Load CSV
-df = pd.read_csv(CSV_FILE)
+df = read_pipeline_csv(CSV_FILE)
 print(f"\nLoaded {len(df)} rows from {CSV_FILE}")
 
 # Convert to list of dicts and clean NaN
@@ -46,17 +64,22 @@ for _, row in df.iterrows():
 
 print(f"Prepared {len(records)} records for upload")
 
+# Only send rows whose hash changed since the last successful sync
+state = SyncState(state_path(CSV_FILE, TABLE))
+total_records = len(records)
+records, current_hashes, removed_keys = state.diff(records, full=FULL_SYNC)
+print_delta(records, current_hashes, removed_keys, DELETE_MISSING)
+
 # Try to upload
-url = f"{SUPABASE_URL}/rest/v1/priority_leads"
+client = get_client(SUPABASE_URL, SUPABASE_KEY)
+url = f"{SUPABASE_URL}/rest/v1/{TABLE}"
 headers = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
     "Content-Type": "application/json",
-    "Prefer": "return=minimal,resolution=ignore-duplicates"
+    "Prefer": "return=minimal,resolution=merge-duplicates"
 }
 
 print(f"\nUploading to: {url}")
-print("Using upsert mode (will skip duplicates)")
+print("Using upsert mode (changed rows are updated by account_number)")
 
 # Upload in smaller batches
 batch_size = 10
@@ -64,58 +87,83 @@ total_uploaded = 0
 total_skipped = 0
 errors = []
 
-for i in range(0, len(records), batch_size):
-    batch = records[i:i+batch_size]
-    batch_num = i//batch_size + 1
-    total_batches = (len(records)-1)//batch_size + 1
+total_batches = (len(records)-1)//batch_size + 1
 
-    print(f"\nBatch {batch_num}/{total_batches} ({len(batch)} records)...", end=" ")
+# Batches are sent concurrently; results come back in batch order
+results = bulk_upsert(SUPABASE_URL, SUPABASE_KEY, TABLE, records,
+                      on_conflict="account_number", batch_size=batch_size)
 
-    try:
-        response = requests.post(url, json=batch, headers=headers)
+for batch_num, result in enumerate(results, start=1):
+    batch = result.item
 
-        if response.status_code in [200, 201]:
-            total_uploaded += len(batch)
-            print(f"OK ({total_uploaded} total)")
+    print(f"\nBatch {batch_num}/{total_batches} ({len(batch)} records)...", end=" ")
 
-        elif response.status_code == 409:  # Conflict/duplicate
-            total_skipped += len(batch)
-            print(f"SKIPPED (duplicates)")
+    if result.error is not None:
+        print(f"EXCEPTION: {str(result.error)[:100]}")
+        errors.append({
+            'batch': batch_num,
+            'error': str(result.error)
+        })
+
+    elif result.status_code in [200, 201]:
+        total_uploaded += len(batch)
+        state.mark_synced(batch, current_hashes)
+        print(f"OK ({total_uploaded} total)")
+
+    elif result.status_code == 409:  # Conflict/duplicate
+        total_skipped += len(batch)
+        print(f"SKIPPED (duplicates)")
+
+    else:
+        error_detail = result.text[:300]
+        print(f"ERROR {result.status_code}")
+
+        # Check for specific errors
+        if "relation \"public.priority_leads\" does not exist" in error_detail:
+            state.save()
+            print("\n" + "="*80)
+            print("ERROR: Table 'priority_leads' does not exist!")
+            print("="*80)
+            print("\nYou must create it first:")
+            print("1. Open: https://atwdkhlyrffbaugkaker.supabase.co/project/atwdkhlyrffbaugkaker/sql")
+            print("2. Copy ALL content from: setup_supabase_tables.sql")
+            print("3. Paste and click RUN")
+            print("\nThen run this script again.")
+            exit(1)
 
-        else:
-            error_detail = response.text[:300]
-            print(f"ERROR {response.status_code}")
-
-            # Check for specific errors
-            if "relation \"public.priority_leads\" does not exist" in error_detail:
-                print("\n" + "="*80)
-                print("ERROR: Table 'priority_leads' does not exist!")
-                print("="*80)
-                print("\nYou must create it first:")
-                print("1. Open: https://atwdkhlyrffbaugkaker.supabase.co/project/atwdkhlyrffbaugkaker/sql")
-                print("2. Copy ALL content from: setup_supabase_tables.sql")
-                print("3. Paste and click RUN")
-                print("\nThen run this script again.")
-                exit(1)
-
-            errors.append({
-                'batch': batch_num,
-                'status': response.status_code,
-                'detail': error_detail
-            })
-
-    except Exception as e:
-        print(f"EXCEPTION: {str(e)[:100]}")
         errors.append({
             'batch': batch_num,
-            'error': str(e)
+            'status': result.status_code,
+            'detail': error_detail
         })
 
+# Remove rows whose account_number vanished from the CSV
+total_deleted = 0
+if DELETE_MISSING and removed_keys:
+    print(f"\nDeleting {len(removed_keys)} vanished records...", end=" ")
+    for i in range(0, len(removed_keys), 100):
+        keys = removed_keys[i:i+100]
+        try:
+            response = client.delete(url, headers=headers, params={"account_number": in_filter(keys)})
+            if response.status_code in [200, 204]:
+                state.forget(keys)
+                total_deleted += len(keys)
+            else:
+                errors.append({'batch': 'delete', 'status': response.status_code, 'detail': response.text[:300]})
+        except Exception as e:
+            errors.append({'batch': 'delete', 'error': str(e)})
+    print(f"{total_deleted} deleted")
+
+state.save()
+
 print("\n" + "="*80)
 print("UPLOAD SUMMARY")
 print("="*80)
-print(f"Total records: {len(records)}")
+print(f"Total records: {total_records}")
+print(f"Changed since last sync: {len(records)}")
 print(f"Uploaded: {total_uploaded}")
+if DELETE_MISSING:
+    print(f"Deleted (vanished): {total_deleted}")
 print(f"Skipped (duplicates): {total_skipped}")
 print(f"Errors: {len(errors)}")
 
@@ -131,6 +179,6 @@ if total_uploaded > 0:
 else:
     print("\nNO DATA WAS UPLOADED")
     if not errors:
-        print("All records may already exist (duplicates)")
+        print("No records changed since the last sync (use --full to resend everything)")
 
 print("="*80)
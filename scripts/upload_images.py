@@ -2,10 +2,16 @@
 Upload property images to Supabase Storage
 """
 
-import os
-import requests
+import sys
 from pathlib import Path
-import pandas as pd
+
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from pipeline_schema import read_pipeline_csv
+from account_keys import AccountIndex
+from supabase_async import bulk_upload
+from photo_dedup import load_exclusions
+from photo_normalize import NormalizedPhotos
 
 # Supabase credentials
 SUPABASE_URL = "https://atwdkhlyrffbaugkaker.supabase.co"
@@ -20,9 +26,9 @@ print("UPLOAD PROPERTY IMAGES TO SUPABASE STORAGE")
 print("="*80)
 
 # Load CSV to get list of account numbers
-df = pd.read_csv(CSV_FILE)
-# Convert account numbers from hyphen format (28-22-29) to underscore format (28_22_29) for matching with image files
-accounts = set(acc.replace('-', '_') for acc in df['account_number'].tolist())
+df = read_pipeline_csv(CSV_FILE, columns=['account_number'])
+# Hyphen (28-22-29) and underscore (28_22_29) spellings both match the image files
+accounts = AccountIndex((account, None) for account in df['account_number'].dropna())
 print(f"\nFound {len(accounts)} accounts in CSV")
 
 # Get list of images
@@ -30,7 +36,9 @@ if not IMAGES_DIR.exists():
     print(f"ERROR: Images directory not found: {IMAGES_DIR}")
     exit(1)
 
-images = list(IMAGES_DIR.glob("*.jpg"))
+# Skip visual duplicates found by photo_dedup.py
+excluded = load_exclusions(IMAGES_DIR)
+images = [img for img in IMAGES_DIR.glob("*.jpg") if img.name not in excluded]
 print(f"Found {len(images)} images in {IMAGES_DIR}")
 
 # Filter to only upload images for accounts in our CSV
@@ -48,54 +56,37 @@ uploaded = 0
 skipped = 0
 errors = []
 
-for account, image_path in images_to_upload:
-    # Keep original filename with underscores
-    filename = f"{account}.jpg"
-
-    # Upload URL
-    url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{filename}"
-
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-    }
-
-    try:
-        # Read image file
-        with open(image_path, 'rb') as f:
-            image_data = f.read()
-
-        # Upload
-        response = requests.post(
-            url,
-            headers=headers,
-            files={'file': (filename, image_data, 'image/jpeg')}
-        )
-
-        if response.status_code in [200, 201]:
-            uploaded += 1
-            if uploaded % 20 == 0:
-                print(f"Progress: {uploaded}/{len(images_to_upload)} uploaded")
-        elif response.status_code == 409:
-            # Already exists
-            skipped += 1
-        else:
-            error_msg = response.text[:200]
-            errors.append({
-                'account': account,
-                'status': response.status_code,
-                'error': error_msg
-            })
-            if len(errors) <= 5:
-                print(f"ERROR: {account} - {response.status_code}: {error_msg[:100]}")
-
-    except Exception as e:
+# Normalized versions (photo_normalize.py) are uploaded where available
+normalized = NormalizedPhotos(IMAGES_DIR)
+
+# Keep original filename with underscores; all uploads go out concurrently
+results = bulk_upload(SUPABASE_URL, SUPABASE_KEY, BUCKET_NAME,
+                      [(f"{account}.jpg", normalized.get(image_path)) for account, image_path in images_to_upload])
+
+for (account, _), result in zip(images_to_upload, results):
+    if result.error is not None:
+        errors.append({
+            'account': account,
+            'error': str(result.error)
+        })
+        if len(errors) <= 5:
+            print(f"EXCEPTION: {account} - {str(result.error)[:100]}")
+    elif result.status_code in [200, 201]:
+        uploaded += 1
+        if uploaded % 20 == 0:
+            print(f"Progress: {uploaded}/{len(images_to_upload)} uploaded")
+    elif result.status_code == 409:
+        # Already exists
+        skipped += 1
+    else:
+        error_msg = result.text[:200]
         errors.append({
             'account': account,
-            'error': str(e)
+            'status': result.status_code,
+            'error': error_msg
         })
         if len(errors) <= 5:
-            print(f"EXCEPTION: {account} - {str(e)[:100]}")
+            print(f"ERROR: {account} - {result.status_code}: {error_msg[:100]}")
 
 print("\n" + "="*80)
 print("UPLOAD COMPLETE")
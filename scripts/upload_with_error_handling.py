@@ -3,9 +3,15 @@ Upload with better error handling - uploads one by one and shows errors
 """
 
 import pandas as pd
-import requests
 import os
+import sys
 import json
+from pathlib import Path
+
+# Shared pipeline modules live in tools/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "tools"))
+from pipeline_schema import read_pipeline_csv
+from supabase_client import get_client
 
 # Load environment
 SUPABASE_URL = "https://atwdkhlyrffbaugkaker.supabase.co"
@@ -18,14 +24,13 @@ print("SUPABASE UPLOAD WITH ERROR HANDLING")
 print("="*80)
 
 # Load CSV
-df = pd.read_csv(CSV_FILE)
+df = read_pipeline_csv(CSV_FILE)
 print(f"\nLoaded {len(df)} rows from {CSV_FILE}")
 
 # Prepare URL and headers
+client = get_client(SUPABASE_URL, SUPABASE_KEY)
 url = f"{SUPABASE_URL}/rest/v1/priority_leads"
 headers = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
     "Content-Type": "application/json",
     "Prefer": "return=minimal,resolution=merge-duplicates"
 }
@@ -80,7 +85,7 @@ for idx, row in df.iterrows():
     account = record.get('account_number', f'row_{idx}')
 
     try:
-        response = requests.post(url, json=[record], headers=headers)
+        response = client.post(url, json=[record], headers=headers)
 
         if response.status_code in [200, 201]:
             uploaded += 1
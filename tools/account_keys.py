@@ -0,0 +1,119 @@
+"""
+Account-number spellings and a one-probe lookup index
+
+The same parcel shows up as 28-22-29-5600-81200 (county exports, DB uploads),
+28_22_29_5600_81200 (canonical key, image filenames) and 28-22-29-5600-81200
+lowercased as a slug (storage paths). Instead of probing each spelling with a
+separate exists() check or DB query, build an AccountIndex once per run: every
+spelling reduces to the same match key, so a lookup is a single dict probe.
+
+    images = AccountIndex.from_directory(IMAGES_DIR)    # one directory scan
+    path = images.get("28-22-29-5600-81200")           # also finds 28_22_29_5600_81200.jpg
+
+The canonical key is the underscore form used by pipeline_schema.ACCOUNT_KEY.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline_schema import normalize_account_key
+
+
+def canonical_account(value):
+    """Canonical (underscore) key for one account number; None when blank/NA"""
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    key = str(value).strip().replace("-", "_")
+    return key or None
+
+
+def match_key(value):
+    """Spelling-insensitive key: canonical form, lowercased"""
+    key = canonical_account(value)
+    return key.lower() if key is not None else None
+
+
+def match_keys(series):
+    """Vectorized match_key for a column (NA stays NA)"""
+    keys = normalize_account_key(series).str.lower()
+    return keys.where(keys != "", pd.NA)
+
+
+def dedup_accounts(df, column="account_number", keep="first"):
+    """Drop rows whose account repeats under any spelling"""
+    return df[~match_keys(df[column]).duplicated(keep=keep)]
+
+
+def hyphen_account(value):
+    """County/DB spelling: 28_22_29_5600_81200 -> 28-22-29-5600-81200"""
+    key = canonical_account(value)
+    return key.replace("_", "-") if key is not None else None
+
+
+def slugify(account_number):
+    """Slug spelling used for storage paths: lowercase with hyphens"""
+    return str(account_number).replace("_", "-").lower()
+
+
+def account_variants(value):
+    """Every distinct spelling worth querying an exact-match column with"""
+    key = canonical_account(value)
+    if key is None:
+        return []
+    variants = [str(value).strip(), key, key.replace("_", "-"), slugify(key)]
+    return list(dict.fromkeys(variants))
+
+
+class AccountIndex:
+    """Canonical account key -> value, addressable by any spelling"""
+
+    def __init__(self, items=()):
+        self._keys = {}     # match key -> canonical key (first spelling seen)
+        self._values = {}   # canonical key -> value
+        for account, value in items:
+            self.add(account, value)
+
+    @classmethod
+    def from_directory(cls, directory, pattern="*.jpg", exclude=()):
+        """Index files by account (file stem) with a single directory scan, skipping `exclude` file names"""
+        directory = Path(directory)
+        if not directory.exists():
+            return cls()
+        return cls((path.stem, path) for path in sorted(directory.glob(pattern)) if path.name not in exclude)
+
+    def add(self, account, value=None):
+        """Register `account`; returns False (keeping the first value) if it was already present"""
+        key = match_key(account)
+        if key is None or key in self._keys:
+            return False
+        canonical = canonical_account(account)
+        self._keys[key] = canonical
+        self._values[canonical] = value
+        return True
+
+    def resolve(self, account):
+        """Canonical key for any spelling of `account` (None when unknown)"""
+        key = match_key(account)
+        return self._keys.get(key) if key is not None else None
+
+    def get(self, account, default=None):
+        """Value stored for any spelling of `account`"""
+        canonical = self.resolve(account)
+        return self._values[canonical] if canonical is not None else default
+
+    def resolve_series(self, series):
+        """Vectorized resolve(): canonical key per row, NA where unknown"""
+        return match_keys(series).map(self._keys).astype("string")
+
+    def __contains__(self, account):
+        return self.resolve(account) is not None
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def items(self):
+        return self._values.items()
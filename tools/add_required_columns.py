@@ -1,9 +1,11 @@
 """
 Add all required columns for Supabase with default values
 """
-import pandas as pd
 
-df = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv')
+from pipeline_schema import read_artifact, write_artifact, IMPORT_ARTIFACT
+from priority_scoring import offer_amounts
+
+df = read_artifact(IMPORT_ARTIFACT)
 
 print(f"Original: {len(df)} rows, {len(df.columns)} columns")
 print(f"Columns: {list(df.columns[:20])}")
@@ -18,16 +20,9 @@ if 'state' not in df.columns:
     df['state'] = 'FL'
     print("Added 'state' column")
 
-# Add cash_offer_amount based on just_value or estimated value
+# Add cash_offer_amount (normally already priced by the scoring stage of create_complete_import_csv.py)
 if 'cash_offer_amount' not in df.columns:
-    if 'just_value' in df.columns:
-        df['cash_offer_amount'] = df['just_value'].fillna(100000) * 0.7
-    elif 'assessed_value' in df.columns:
-        df['cash_offer_amount'] = df['assessed_value'].fillna(100000) * 0.7
-    else:
-        df['cash_offer_amount'] = 70000
-
-    df['cash_offer_amount'] = df['cash_offer_amount'].fillna(70000).astype(int)
+    df['cash_offer_amount'] = offer_amounts(df)
     print("Added 'cash_offer_amount' column")
 
 # Make sure estimated_value exists
@@ -47,7 +42,6 @@ print(f"\nSample values:")
 print(df[['property_address', 'city', 'state', 'zip_code', 'estimated_value', 'cash_offer_amount']].head(3))
 
 # Save
-output_path = 'Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv'
-df.to_csv(output_path, index=False, encoding='utf-8')
+output_path = write_artifact(df, IMPORT_ARTIFACT)
 
-print(f"\n[OK] CSV updated with required columns")
+print(f"\n[OK] {output_path} updated with required columns")
@@ -4,7 +4,9 @@ Add zip_code column to CSV by extracting from property_address
 import pandas as pd
 import re
 
-df = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv')
+from pipeline_schema import read_artifact, write_artifact, IMPORT_ARTIFACT
+
+df = read_artifact(IMPORT_ARTIFACT)
 
 print(f"Original: {len(df)} rows, {len(df.columns)} columns")
 
@@ -40,9 +42,8 @@ print(f"\nFinal: {len(df)} rows, {len(df.columns)} columns")
 print(f"Columns now include zip_code at position: {cols.index('zip_code') + 1}")
 
 # Save
-output_path = 'Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv'
-df.to_csv(output_path, index=False, encoding='utf-8')
+output_path = write_artifact(df, IMPORT_ARTIFACT)
 
-print(f"\n[OK] CSV updated with zip_code column")
+print(f"\n[OK] {output_path} updated with zip_code column")
 print(f"\nSample:")
 print(df[['property_address', 'zip_code']].head(3))
@@ -0,0 +1,365 @@
+"""
+Benchmarks for the Python import and upload paths
+
+Generates synthetic Step 4/Step 5 inputs (property CSV, priority contact list,
+photo set), starts fake_supabase.py as a local PostgREST/Storage stand-in and
+runs the real tools against it, one child process per scenario:
+
+- import          import_csv_to_supabase.import_properties (half the rows pre-exist)
+- priority_leads  upload_priority_leads_OLD data upload
+- images          upload_images_to_supabase (Storage uploads)
+
+For each scenario/scale it records wall time, rows/s, requests issued, bytes
+sent/received, the child's peak RSS and seconds per stage category
+(instrumentation.py), and writes everything to JSON so runs can be compared
+across commits.
+
+Usage:
+    python benchmark.py                                   # 1k rows, every scenario
+    python benchmark.py --scale 1k,10k,100k
+    python benchmark.py --scenario import --latency-ms 20 --error-rate 0.01
+    python benchmark.py --baseline benchmark_results/<old>.json
+    python benchmark.py --output results.json --workdir /tmp/bench --keep-data
+
+Tool output goes to <workdir>/<scale>/<scenario>-<scale>.log (kept with --keep-data
+or --workdir; the default temp workdir is deleted after the run).
+"""
+
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+TOOLS_DIR = Path(__file__).resolve().parent
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000}
+SCENARIOS = ["import", "priority_leads", "images"]
+
+DEFAULT_EXISTING_SHARE = 0.5   # share of import rows already in the table (exercises fill-empty updates)
+DEFAULT_PHOTO_BYTES = 4096
+RESULTS_DIR = Path("benchmark_results")
+
+BENCH_KEY = "benchmark-key"
+
+
+# Synthetic inputs ------------------------------------------------------------
+
+def account_numbers(rows):
+    """Distinct county-style account numbers: 28-22-29-5600-81200"""
+    import numpy as np
+    ids = np.arange(rows, dtype=np.int64)
+    return [
+        f"{20 + a % 10:02d}-{22 + b % 3:02d}-{28 + c % 3:02d}-{d:04d}-{e:05d}"
+        for a, b, c, d, e in zip(ids % 7, ids % 5, ids % 11, (ids // 100000) % 10000, ids % 100000)
+    ]
+
+
+def generate_master_csv(path, accounts, rng):
+    """Step 4 MASTER combined analysis CSV (columns read by import_csv_to_supabase)"""
+    import pandas as pd
+    rows = len(accounts)
+    df = pd.DataFrame({
+        "Account_Number": accounts,
+        "Property_Address": [f"{n} SYNTHETIC ST" for n in rng.integers(100, 9999, rows)],
+        "Owner_Name": [f"OWNER {n}" for n in rng.integers(1, 50000, rows)],
+        "Mailing_Address": [f"{n} MAILING AVE" for n in rng.integers(100, 9999, rows)],
+        "DOR_UC": rng.choice(["0100", "0000", "0400"], rows),
+        "Total_Market_Value": rng.integers(50_000, 900_000, rows),
+        "Total_Assessed_Value": rng.integers(40_000, 800_000, rows),
+        "Exemptions": rng.integers(0, 50_000, rows),
+        "Taxable_Value": rng.integers(30_000, 700_000, rows),
+        "Years_Delinquent": rng.integers(0, 6, rows),
+        "Total_Amount_Due": rng.uniform(500, 40_000, rows).round(2),
+        "Face_Amount": rng.uniform(500, 30_000, rows).round(2),
+        "Certificate_Count": rng.integers(0, 5, rows),
+        "Tax_Score": rng.uniform(0, 100, rows).round(1),
+        "Visual_Score": rng.uniform(0, 100, rows).round(1),
+        "Final_Combined_Score": rng.uniform(0, 200, rows).round(1),
+        "Tier": rng.choice(["TIER 1", "TIER 2", "TIER 3"], rows),
+    })
+    df.to_csv(path, index=False)
+
+
+def generate_contact_list(path, accounts, rng):
+    """Step 4 CONTACT_LIST_FOCUSED.csv (columns read by upload_priority_leads_OLD)"""
+    import pandas as pd
+    rows = len(accounts)
+    df = pd.DataFrame({
+        "Account Number": accounts,
+        "Priority_Class": rng.choice(["P1", "P2", "P3", "P4", "P5", "P6"], rows),
+        "Score": rng.integers(50, 250, rows),
+        "Condition_Score": rng.integers(1, 11, rows),
+        "Condition_Category": rng.choice(["SEVERE", "POOR", "FAIR"], rows),
+        "Owner Name": [f"OWNER {n}" for n in rng.integers(1, 50000, rows)],
+        "Property Address": [f"{n} SYNTHETIC ST" for n in rng.integers(100, 9999, rows)],
+        "Visual_Summary": "Synthetic benchmark property",
+        "Equity": rng.uniform(0, 500_000, rows).round(2),
+        "Times Delinquent": rng.integers(0, 6, rows),
+        "Estate/Trust": rng.choice([True, False], rows),
+        "Out of State": rng.choice([True, False], rows),
+    })
+    df.to_csv(path, index=False)
+
+
+def generate_photos(directory, accounts, size, rng):
+    """One pseudo-JPEG per account, named like Step 3 (underscore form)"""
+    directory.mkdir(parents=True, exist_ok=True)
+    header = b"\xff\xd8\xff\xe0"
+    for account in accounts:
+        (directory / f"{account.replace('-', '_')}.jpg").write_bytes(header + rng.bytes(size - len(header)))
+
+
+def prepare_inputs(workdir, rows, photo_bytes):
+    """Write every synthetic input for `rows` into workdir (reused when present)"""
+    import numpy as np
+    workdir.mkdir(parents=True, exist_ok=True)
+    marker = workdir / "inputs.json"
+    spec = {"rows": rows, "photo_bytes": photo_bytes}
+    if marker.exists() and json.loads(marker.read_text()) == spec:
+        return
+
+    rng = np.random.default_rng(rows)
+    accounts = account_numbers(rows)
+    print(f"  Generating {rows:,} synthetic rows and photos in {workdir}...")
+    generate_master_csv(workdir / "master.csv", accounts, rng)
+    generate_contact_list(workdir / "contact_list.csv", accounts, rng)
+    photos = workdir / "photos"
+    if photos.exists():
+        shutil.rmtree(photos)
+    generate_photos(photos, accounts, photo_bytes, rng)
+    marker.write_text(json.dumps(spec))
+
+
+def seed_existing(server, workdir, share):
+    """Pre-load `share` of the import rows with sparse fields so the import also updates"""
+    import pandas as pd
+    accounts = pd.read_csv(workdir / "master.csv", usecols=["Account_Number"], dtype=str)["Account_Number"]
+    existing = accounts.iloc[:int(len(accounts) * share)]
+    server.seed_rows("properties", (
+        {"account_number": account, "lead_status": "contacted", "approval_status": "approved"}
+        for account in existing
+    ))
+
+
+# Child process (one scenario) --------------------------------------------------
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None without `resource`)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_scenario(scenario, workdir, url):
+    """Run the real tool for `scenario` against the fake server at `url`"""
+    if scenario == "import":
+        import import_csv_to_supabase as tool
+        tool.SUPABASE_URL, tool.SUPABASE_SERVICE_KEY = url, BENCH_KEY
+        tool.CSV_PATH = str(workdir / "master.csv")
+        tool.import_properties()
+    elif scenario == "priority_leads":
+        import upload_priority_leads_OLD as tool
+        tool.CONTACT_LIST = workdir / "contact_list.csv"
+        tool.LAND_LIST = workdir / "land_list.csv"   # absent: properties only
+        df_properties, df_land = tool.load_priority_leads()
+        tool.upload_to_supabase(df_properties, df_land, upload_images=False, upload_data=True, resume=False)
+    elif scenario == "images":
+        import upload_images_to_supabase as tool
+        tool.SUPABASE_URL, tool.SUPABASE_ANON_KEY = url, BENCH_KEY
+        tool.PHOTOS_DIR = str(workdir / "photos")
+        tool.main()
+    else:
+        raise ValueError(f"unknown scenario: {scenario}")
+
+
+def child_main(scenario, workdir, url, log_path):
+    """Entry point of the per-scenario child; prints one JSON line"""
+    workdir = Path(workdir)
+    os.environ.update({"SUPABASE_URL": url, "SUPABASE_KEY": BENCH_KEY})
+    # Per-stage breakdown from instrumentation.py (written at exit)
+    os.environ["PIPELINE_METRICS_JSON"] = str(Path(log_path).with_suffix(".metrics.json"))
+    sys.path.insert(0, str(TOOLS_DIR))
+
+    error = None
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        start = time.perf_counter()
+        try:
+            run_scenario(scenario, workdir, url)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+
+    print(json.dumps({"seconds": seconds, "peak_rss_mb": peak_rss_mb(), "error": error}))
+
+
+# Parent ---------------------------------------------------------------------
+
+def benchmark(scenario, scale, rows, workdir, options):
+    """Fresh fake server + child process for one scenario/scale"""
+    from fake_supabase import FakeSupabase
+
+    server = FakeSupabase(latency=options["latency_ms"] / 1000, error_rate=options["error_rate"], seed=rows)
+    if scenario == "import":
+        seed_existing(server, workdir, options["existing_share"])
+    server.start()
+
+    env = dict(os.environ, SUPABASE_RATE_LIMIT=str(options["rate_limit"]))
+    log_path = workdir / f"{scenario}-{scale}.log"
+    started = time.perf_counter()
+    try:
+        child = subprocess.run(
+            [sys.executable, str(Path(__file__).resolve()), "--child", scenario, str(workdir), server.url, str(log_path)],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    finally:
+        wall = time.perf_counter() - started
+        stats = server.snapshot()
+        server.stop()
+
+    try:
+        measured = json.loads(child.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        measured = {"seconds": None, "peak_rss_mb": None, "error": child.stderr.strip()[-500:] or "no result"}
+
+    categories = None
+    metrics_path = log_path.with_suffix(".metrics.json")
+    if metrics_path.exists():
+        with open(metrics_path, "r", encoding="utf-8") as f:
+            categories = {name: round(totals["seconds"], 3) for name, totals in json.load(f)["categories"].items()}
+
+    seconds = measured["seconds"]
+    return {
+        "scenario": scenario,
+        "scale": scale,
+        "rows": rows,
+        "seconds": round(seconds, 3) if seconds else None,
+        "wall_seconds": round(wall, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else None,
+        "requests": stats["requests"],
+        "requests_by_method": stats["by_method"],
+        "bytes_sent": stats["bytes_received"],      # client -> server
+        "bytes_received": stats["bytes_sent"],      # server -> client
+        "errors_injected": stats["errors_injected"],
+        "peak_rss_mb": measured["peak_rss_mb"],
+        "stage_seconds": categories,
+        "error": measured["error"],
+        "log": str(log_path),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=TOOLS_DIR).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    previous = {(r["scenario"], r["scale"]): r for r in (baseline or {}).get("results", [])}
+
+    print(f"\n{'Scenario':<16} {'Scale':>6} {'Seconds':>9} {'Rows/s':>10} {'Requests':>9} {'MB sent':>8} {'Peak MB':>8}  vs baseline")
+    print("-" * 90)
+    for r in results:
+        rate = f"{r['rows_per_sec']:,.0f}" if r["rows_per_sec"] else "-"
+        seconds = f"{r['seconds']:.2f}" if r["seconds"] else "-"
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] else "-"
+        delta = ""
+        old = previous.get((r["scenario"], r["scale"]))
+        if old and old.get("rows_per_sec") and r["rows_per_sec"]:
+            delta = f"{(r['rows_per_sec'] / old['rows_per_sec'] - 1) * 100:+.1f}% rows/s"
+        print(f"{r['scenario']:<16} {r['scale']:>6} {seconds:>9} {rate:>10} {r['requests']:>9,} "
+              f"{r['bytes_sent'] / 1e6:>8.1f} {rss:>8}  {delta}")
+        if r["error"]:
+            print(f"   ERROR: {r['error'][:200]}")
+
+
+def main():
+    if "--child" in sys.argv:
+        i = sys.argv.index("--child")
+        child_main(*sys.argv[i + 1:i + 5])
+        return
+
+    def option(flag, default):
+        return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+    scales = option("--scale", "1k").split(",")
+    scenarios = option("--scenario", ",".join(SCENARIOS)).split(",")
+    unknown = [s for s in scales if s not in SCALES] + [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        print(f"Unknown scale/scenario: {', '.join(unknown)}")
+        print(f"Scales: {', '.join(SCALES)}  Scenarios: {', '.join(SCENARIOS)}")
+        sys.exit(2)
+
+    options = {
+        "latency_ms": float(option("--latency-ms", 0)),
+        "error_rate": float(option("--error-rate", 0)),
+        "rate_limit": float(option("--rate-limit", 0)),   # 0 = client-side limiter off
+        "existing_share": float(option("--existing", DEFAULT_EXISTING_SHARE)),
+        "photo_bytes": int(option("--photo-bytes", DEFAULT_PHOTO_BYTES)),
+    }
+
+    keep_data = "--keep-data" in sys.argv or "--workdir" in sys.argv
+    root = Path(option("--workdir", tempfile.mkdtemp(prefix="bench_")))
+
+    commit = git_commit()
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = Path(option("--output", RESULTS_DIR / f"{stamp}_{commit or 'nocommit'}.json"))
+
+    baseline = None
+    if "--baseline" in sys.argv:
+        with open(option("--baseline", None), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print("=" * 80)
+    print("PYTHON TOOLING BENCHMARK")
+    print("=" * 80)
+    print(f"Scales: {', '.join(scales)} | Scenarios: {', '.join(scenarios)}")
+    print(f"Latency: {options['latency_ms']} ms | Error rate: {options['error_rate']:.1%} | "
+          f"Client rate limit: {options['rate_limit'] or 'off'}")
+
+    results = []
+    try:
+        for scale in scales:
+            rows = SCALES[scale]
+            workdir = root / scale
+            prepare_inputs(workdir, rows, options["photo_bytes"])
+            for scenario in scenarios:
+                print(f"  Running {scenario} @ {scale}...")
+                results.append(benchmark(scenario, scale, rows, workdir, options))
+    finally:
+        if not keep_data:
+            shutil.rmtree(root, ignore_errors=True)
+
+    print_results(results, baseline)
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "options": options,
+            "results": results,
+        }, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Durable checkpoints for long-running imports
+
+After each committed batch an importer records how far it got (per stage)
+together with a fingerprint of its input files. Re-running with --resume
+continues from the recorded offsets; if the inputs changed since the
+checkpoint was written, the run starts over instead of skipping rows it
+never saw.
+
+Checkpoint files are JSON, stored next to the first input:
+    CONTACT_LIST_FOCUSED.csv -> CONTACT_LIST_FOCUSED.priority_leads.checkpoint.json
+
+A run that finishes cleanly deletes its checkpoint.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+
+from instrumentation import span
+
+CHECKPOINT_VERSION = 1
+
+
+def file_fingerprint(*paths):
+    """Content hash of the input files (missing files hash as empty)"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        path = Path(path)
+        digest.update(str(path.name).encode("utf-8"))
+        if not path.exists():
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def checkpoint_path(input_path, job):
+    """Default checkpoint file for `job` reading `input_path`"""
+    input_path = Path(input_path)
+    return input_path.with_name(f"{input_path.stem}.{job}.checkpoint.json")
+
+
+class Checkpoint:
+    """Committed offsets per stage, tied to an input fingerprint"""
+
+    def __init__(self, path, fingerprint, resume=False):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.offsets = {}
+        self.resumed = False
+
+        if not resume or not self.path.exists():
+            return
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != CHECKPOINT_VERSION or data.get("fingerprint") != fingerprint:
+            print(f"   Checkpoint {self.path.name} is for different input - starting from the beginning")
+            return
+
+        self.offsets = data.get("offsets", {})
+        self.resumed = True
+
+    def offset(self, stage):
+        """First row of `stage` that has not been committed yet"""
+        return self.offsets.get(stage, 0)
+
+    def commit(self, stage, offset):
+        """Record that rows [0, offset) of `stage` are committed (durable on return)"""
+        self.offsets[stage] = offset
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "fingerprint": self.fingerprint,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "offsets": self.offsets,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with span("checkpoint.commit", "disk"):
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        """Delete the checkpoint after a complete run"""
+        if self.path.exists():
+            self.path.unlink()
+
+    def describe(self):
+        """Human-readable resume point"""
+        if not self.offsets:
+            return "starting from the beginning"
+        return "at " + ", ".join(f"{stage} row {offset}" for stage, offset in self.offsets.items())
@@ -4,8 +4,10 @@ Clean CSV for Lovable - ensure no empty values in critical columns
 import pandas as pd
 import numpy as np
 
+from pipeline_schema import read_artifact, write_artifact, normalize_account_key, IMPORT_ARTIFACT
+
 # Read CSV
-df = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv')
+df = read_artifact(IMPORT_ARTIFACT)
 
 print(f"Original: {len(df)} rows, {len(df.columns)} columns")
 
@@ -33,9 +35,14 @@ if removed > 0:
 print("\nCleaning empty values...")
 
 # For text columns, replace NaN with empty string
-text_columns = df.select_dtypes(include=['object']).columns
+text_columns = df.select_dtypes(include=['object', 'string', 'category']).columns
 for col in text_columns:
-    df[col] = df[col].fillna('')
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        if '' not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories('')
+        df[col] = df[col].fillna('').cat.remove_unused_categories()
+    else:
+        df[col] = df[col].fillna('')
 
 # For numeric columns, keep NaN as is (Lovable can handle this)
 # Just ensure no empty strings in numeric columns
@@ -44,15 +51,14 @@ print(f"  Text columns: {len(text_columns)}")
 print(f"  Numeric columns: {len(numeric_columns)}")
 
 # Ensure account_number is clean (no hyphens, consistent format)
-df['account_number'] = df['account_number'].str.replace('-', '_')
+df['account_number'] = normalize_account_key(df['account_number'])
 
 print(f"\nFinal: {len(df)} rows, {len(df.columns)} columns")
 
-# Save cleaned CSV
-output_path = 'Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv'
-df.to_csv(output_path, index=False, encoding='utf-8')
+# Save cleaned dataset
+output_path = write_artifact(df, IMPORT_ARTIFACT)
 
-print(f"\n[OK] Cleaned CSV saved: {output_path}")
+print(f"\n[OK] Cleaned dataset saved: {output_path}")
 
 # Show sample
 print("\nSample row (first 5 columns):")
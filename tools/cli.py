@@ -0,0 +1,232 @@
+"""
+Single entry point for the Python pipeline tools
+
+    python tools/cli.py                          # list commands
+    python tools/cli.py <command> --help         # the command's usage
+    python tools/cli.py <command> [options]      # run it
+
+Each command runs the existing tool as __main__ with the remaining arguments,
+so flags are unchanged:
+    python tools/cli.py import --resume  ==  python tools/import_csv_to_supabase.py --resume
+
+Nothing heavy is imported here. pandas, requests and httpx load only inside
+the command that runs, so listing commands, --help and rejecting a mistyped
+flag stay well under 100 ms. The tools' own sys.argv membership checks
+silently ignore unknown flags; this entry point refuses them before anything
+runs.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS_DIR = os.path.join(ROOT, "tools")
+
+# command -> (script relative to the repo root, summary, accepted flags)
+# A token in capitals after a flag means that flag takes a value.
+COMMANDS = {
+    "import": (
+        "tools/import_csv_to_supabase.py",
+        "Import the Step 4 MASTER CSV into properties (fills empty fields only)",
+        "--resume --plan --save-plan --apply-plan",
+    ),
+    "import-lovable": (
+        "tools/import_csv_to_lovable.py",
+        "Sync LOVABLE_UPLOAD_WITH_IMAGES.csv into properties (changed rows only)",
+        "--full --delete-missing",
+    ),
+    "upload-leads": (
+        "tools/upload_priority_leads_OLD.py",
+        "Upload the priority leads, land parcels and their photos",
+        "--preview --data-only --images-only --resume --plan --save-plan --apply-plan",
+    ),
+    "sync-leads": (
+        "scripts/simple_upload.py",
+        "Upsert SUPABASE_UPLOAD_242_LEADS.csv into priority_leads (changed rows only)",
+        "--full --delete-missing",
+    ),
+    "upload-images": (
+        "tools/upload_images_to_supabase.py",
+        "Upload every Step 3 photo to the property-photos bucket",
+        "",
+    ),
+    "upload-images-lovable": (
+        "tools/upload_images_to_lovable.py",
+        "Upload the photos of the accounts in LOVABLE_UPLOAD_WITH_IMAGES.csv",
+        "",
+    ),
+    "update-image-urls": (
+        "scripts/update_image_urls.py",
+        "Backfill property_image_url from the FINAL_PARA_IMPORT CSV",
+        "",
+    ),
+    "dedup-photos": (
+        "tools/photo_dedup.py",
+        "Find visually duplicate photos (perceptual hash) and write the upload exclusion list",
+        "--threshold BITS --workers N",
+    ),
+    "normalize-photos": (
+        "tools/photo_normalize.py",
+        "Orient, strip EXIF, cap size and re-encode photos into the upload cache",
+        "--max-dim PX --quality Q --workers N",
+    ),
+    "score-leads": (
+        "tools/lead_scoring.py",
+        "Rescore leads from new lead_activities (update_lead_score rules) and upsert changed lead_scores",
+        "--full --dry-run --state PATH --snapshot PATH --campaign-clicks --output PATH",
+    ),
+    "build-csv": (
+        "tools/create_complete_import_csv.py",
+        "Merge Steps 2 and 4 into the Step 5 import artifact",
+        "--stream --chunksize N --weights SPEC",
+    ),
+    "dedup-owners": (
+        "tools/owner_dedup.py",
+        "Cluster parcels by owner (fuzzy owner name / mailing address) and write the owner list",
+        "--threshold T --address-threshold T --max-block N",
+    ),
+    "geocode": (
+        "tools/geocoder.py",
+        "Fill latitude/longitude before upload (batch geocoder with a SQLite cache)",
+        "--provider NAME --cache PATH --concurrency N --rate N --retry-missing",
+    ),
+    "comps-distance": (
+        "tools/spatial_index.py",
+        "Find each property's nearest comparables and check cached comp distances (grid index)",
+        "--radius MILES --k N --beds N --sqft FRACTION --cell MILES --any-type",
+    ),
+    "score-priority": (
+        "tools/priority_scoring.py",
+        "Re-score, re-tier and re-price the Step 5 import artifact (e.g. after changing weights)",
+        "--weights SPEC",
+    ),
+    "export-csv": (
+        "tools/export_lovable_csv.py",
+        "Export the Step 5 artifact as the final Lovable CSV",
+        "--bom",
+    ),
+    "prepare-lovable": (
+        "tools/prepare_lovable_upload.py",
+        "Dedup the 242 leads and keep the ones with photos",
+        "",
+    ),
+    "profile": (
+        "tools/profile_csv.py",
+        "Profile a pipeline CSV/Parquet file and gate on data quality",
+        "--csv --strict --chunksize N --max-null PCT --output PATH",
+    ),
+    "backup": (
+        "backup_scheduler.py",
+        "Run the database backup function and save the result locally",
+        "",
+    ),
+    "benchmark": (
+        "tools/benchmark.py",
+        "Time the import/upload paths against a local fake Supabase",
+        "--scale LIST --scenario LIST --latency-ms MS --error-rate RATE --rate-limit N "
+        "--existing SHARE --photo-bytes N --output PATH --workdir DIR --baseline PATH --keep-data",
+    ),
+    "fake-server": (
+        "tools/fake_supabase.py",
+        "Serve an in-memory PostgREST/Storage stand-in",
+        "--port N --latency-ms MS --error-rate RATE",
+    ),
+}
+
+
+def parse_flags(spec):
+    """'--stream --chunksize N' -> {'--stream': False, '--chunksize': True} (True = takes a value)"""
+    flags = {}
+    tokens = spec.split()
+    for i, token in enumerate(tokens):
+        if token.startswith("--"):
+            flags[token] = i + 1 < len(tokens) and not tokens[i + 1].startswith("--")
+    return flags
+
+
+def check_args(command, args):
+    """Error message for an unknown flag or a missing value, else None"""
+    flags = parse_flags(COMMANDS[command][2])
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg.startswith("--"):
+            if arg not in flags:
+                known = ", ".join(flags) or "none"
+                return f"unknown option for '{command}': {arg} (accepted: {known})"
+            if flags[arg]:
+                if i + 1 >= len(args):
+                    return f"option {arg} needs a value"
+                i += 1
+        i += 1
+    return None
+
+
+def docstring(path):
+    """Leading docstring of a script, read without importing it"""
+    import ast
+    with open(path, "r", encoding="utf-8") as f:
+        return ast.get_docstring(ast.parse(f.read())) or ""
+
+
+def print_commands():
+    print("Usage: python tools/cli.py <command> [options]\n")
+    print("Commands:")
+    width = max(len(name) for name in COMMANDS)
+    for name, (_, summary, _) in COMMANDS.items():
+        print(f"  {name:<{width}}  {summary}")
+    print("\nRun 'python tools/cli.py <command> --help' for a command's options.")
+    print("Set PIPELINE_METRICS=1 for a per-stage timing report (see tools/instrumentation.py).")
+
+
+def print_help(command):
+    script, summary, spec = COMMANDS[command]
+    print(f"{command}: {summary}")
+    print(f"Runs: {script}")
+    if spec:
+        print(f"Options: {spec}")
+    text = docstring(os.path.join(ROOT, script))
+    if text:
+        print("\n" + text)
+
+
+def run(command, args):
+    """Execute the command's script as __main__ with `args`"""
+    import runpy
+
+    path = os.path.join(ROOT, COMMANDS[command][0])
+    for directory in (TOOLS_DIR, os.path.dirname(path)):
+        if directory not in sys.path:
+            sys.path.insert(0, directory)
+    sys.argv = [path] + list(args)
+    runpy.run_path(path, run_name="__main__")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if not argv or argv[0] in ("-h", "--help", "help"):
+        print_commands()
+        return 0
+
+    command, args = argv[0], argv[1:]
+    if command not in COMMANDS:
+        print(f"Unknown command: {command}\n")
+        print_commands()
+        return 2
+
+    if "-h" in args or "--help" in args:
+        print_help(command)
+        return 0
+
+    error = check_args(command, args)
+    if error:
+        print(f"Error: {error}")
+        return 2
+
+    run(command, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
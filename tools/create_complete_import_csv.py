@@ -1,35 +1,238 @@
 """
 Create complete CSV with ALL columns from Steps 1, 2, and 4
 Merges all data sources for complete Lovable import
+
+Usage:
+    python create_complete_import_csv.py                      # In-memory merge (shortlists)
+    python create_complete_import_csv.py --stream             # Chunked merge (full county roll)
+    python create_complete_import_csv.py --stream --chunksize 100000
+    python create_complete_import_csv.py --weights equity=0.4,delinquency=0.3,condition=0.2,vacancy=0.1
+
+Every build scores and tiers the merged leads and prices the cash offer
+(see priority_scoring.py for the signals and --weights).
 """
 
+import sys
+from functools import lru_cache
+
 import pandas as pd
-import os
 
-def main():
+from pipeline_schema import (
+    read_pipeline_csv, iter_pipeline_csv, read_csv_header, write_artifact,
+    frame_memory_mb, ArtifactWriter, IMPORT_ARTIFACT,
+)
+from account_keys import AccountIndex
+from instrumentation import span
+from priority_scoring import score_frame, weights_from_args, print_tiers, DEFAULT_WEIGHTS
+
+STEP2_CSV = "Step 2 - Score & Create Call List/SCORED_ENRICHED_LEADS.csv"
+STEP4_CSV = "Step 4 - AI Review & Evaluate/data/property_condition_analysis.csv"
+
+# Rename columns to snake_case for database
+COLUMN_MAPPING = {
+    'Account Number': 'account_number',
+    'Owner Name': 'owner_name',
+    'Owner Address': 'owner_address',
+    'Property Address': 'property_address',
+    'Balance Amount': 'balance_amount',
+    'Assessed Value': 'assessed_value',
+    'Roll Yr': 'roll_year',
+    'Tax Yr': 'tax_year',
+    'Alternate Key': 'alternate_key',
+    'Account Status': 'account_status',
+    'Billing Address': 'billing_address',
+    'Legal Desc': 'legal_description',
+    'Millage Code': 'millage_code',
+    'Cert #': 'cert_number',
+    'Bidder #': 'bidder_number',
+    'Cert Buyer': 'cert_buyer',
+    'Cert Status': 'cert_status',
+    'Deed Status': 'deed_status',
+    'Equity': 'equity',
+    'Years Old': 'years_old',
+    'Times Delinquent': 'times_delinquent',
+    'Estate/Trust': 'is_estate_trust',
+    'Out of State': 'is_out_of_state',
+    'Deed Certified': 'is_deed_certified',
+    'Cert Issued': 'is_cert_issued',
+    'Is LLC': 'is_llc',
+    'Score': 'priority_score',
+    'Equity Ratio': 'equity_ratio',
+    'Value Per Acre': 'value_per_acre',
+    'Condition_Score': 'condition_score',
+    'Condition_Category': 'condition_category',
+    'Lawn_Condition': 'lawn_condition',
+    'Exterior_Condition': 'exterior_condition',
+    'Visible_Issues': 'visible_issues',
+    'Appears_Vacant': 'appears_vacant',
+    'Estimated_Repair_Cost': 'estimated_repair_cost',
+    'Visual_Summary': 'visual_summary',
+    'Roof_Condition': 'roof_condition',
+    'Driveway_Condition': 'driveway_condition',
+    'Pool_Condition': 'pool_condition',
+    'Vehicles_Present': 'vehicles_present',
+    'Distress_Indicators': 'distress_indicators',
+    'Neighbor_Comparison': 'neighbor_comparison',
+    'Estimated_Repair_Cost_Low': 'estimated_repair_cost_low',
+    'Estimated_Repair_Cost_High': 'estimated_repair_cost_high',
+    'Image_Appears_Current': 'image_appears_current',
+    'Image_Path': 'image_path',
+    'Analysis_Date': 'analysis_date'
+}
+
+# Select and order columns for import
+COLUMNS_ORDER = [
+    # Essential identifiers
+    'account_number',
+    'property_address',
+    'owner_name',
+    'owner_address',
+
+    # Photo
+    'photo_url',
+
+    # Financial data
+    'balance_amount',
+    'assessed_value',
+    'market_value_2025',
+    'assessed_value_2025',
+    'land_value_2025',
+    'building_value_2025',
+    'equity',
+    'equity_ratio',
+
+    # Property details
+    'year_built',
+    'years_old',
+    'living_area_sqft',
+    'gross_area_sqft',
+    'bedrooms',
+    'bathrooms',
+    'floors',
+    'building_type',
+    'exterior_wall',
+    'interior_wall',
+    'land_use_code',
+    'land_use_description',
+    'zoning',
+    'land_qty',
+    'land_qty_code',
+    'land_acres',
+    'land_sqft',
+    'value_per_acre',
+
+    # Tax & legal
+    'roll_year',
+    'tax_year',
+    'alternate_key',
+    'account_status',
+    'billing_address',
+    'legal_description',
+    'millage_code',
+    'cert_number',
+    'bidder_number',
+    'cert_buyer',
+    'cert_status',
+    'deed_status',
+
+    # Scoring & flags
+    'priority_score',
+    'priority_tier',
+    'step2_score',
+    'cash_offer_amount',
+    'times_delinquent',
+    'is_estate_trust',
+    'is_out_of_state',
+    'is_deed_certified',
+    'is_cert_issued',
+    'is_llc',
+
+    # Visual analysis
+    'condition_score',
+    'condition_category',
+    'lawn_condition',
+    'exterior_condition',
+    'roof_condition',
+    'driveway_condition',
+    'pool_condition',
+    'visible_issues',
+    'appears_vacant',
+    'vehicles_present',
+    'distress_indicators',
+    'neighbor_comparison',
+    'visual_summary',
+    'estimated_repair_cost',
+    'estimated_repair_cost_low',
+    'estimated_repair_cost_high',
+    'image_appears_current',
+
+    # Metadata
+    'pid',
+    'image_path',
+    'analysis_date'
+]
+
+# Only parse the columns that can end up in the output (raw or already snake_case)
+SOURCE_COLUMNS = set(COLUMN_MAPPING) | set(COLUMNS_ORDER)
+
+# Added by the scoring stage (priority_score is recomputed, Step 2's kept as step2_score)
+SCORED_COLUMNS = {'priority_score', 'priority_tier', 'step2_score', 'cash_offer_amount'}
+
+# Priority properties (SEVERE, POOR, FAIR, VACANT LAND)
+PRIORITY_CATEGORIES = ['SEVERE', 'POOR', 'FAIR', 'VACANT LAND']
+
+STORAGE_BASE_URL = "https://lzowptxqnuundzhhqvko.supabase.co/storage/v1/object/public/property-images"
+
+DEFAULT_CHUNKSIZE = 50000
+
+
+# Original download location and the FINAL_PARA_IMPORT copy
+IMAGE_DIRS = [
+    "Step 3 - Download Images/downloaded_images",
+    "Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/02_IMAGENS_206_FOTOS",
+]
+
+
+@lru_cache(maxsize=1)
+def image_index():
+    """Accounts with a photo in any IMAGE_DIRS (scanned once per run)"""
+    index = AccountIndex()
+    for directory in IMAGE_DIRS:
+        for account, path in AccountIndex.from_directory(directory).items():
+            index.add(account, path)
+    return index
+
+
+def get_image_url(account_number):
+    account = image_index().resolve(account_number)
+    if account is not None:
+        return f"{STORAGE_BASE_URL}/{account}.jpg"
+    return None
+
+
+def main(weights=DEFAULT_WEIGHTS):
     print("Loading data from all steps...")
 
     # Load Step 2 (has all Step 1 data + scores)
-    step2_df = pd.read_csv("Step 2 - Score & Create Call List/SCORED_ENRICHED_LEADS.csv")
-    print(f"Step 2: {len(step2_df)} rows, {len(step2_df.columns)} columns")
+    # canonical_key normalizes 'Account Number' into account_number (- -> _)
+    step2_df = read_pipeline_csv(STEP2_CSV, columns=SOURCE_COLUMNS, canonical_key=True)
+    print(f"Step 2: {len(step2_df)} rows, {len(step2_df.columns)} columns ({frame_memory_mb(step2_df):.1f} MB)")
 
     # Load Step 4 (visual analysis)
-    step4_df = pd.read_csv("Step 4 - AI Review & Evaluate/data/property_condition_analysis.csv")
-    print(f"Step 4: {len(step4_df)} rows, {len(step4_df.columns)} columns")
-
-    # Standardize Account Number columns - normalize format (replace - with _)
-    step2_df['account_number'] = step2_df['Account Number'].str.strip().str.replace('-', '_')
-    step4_df['account_number'] = step4_df['Account Number'].str.strip().str.replace('-', '_')
+    step4_df = read_pipeline_csv(STEP4_CSV, columns=SOURCE_COLUMNS, canonical_key=True)
+    print(f"Step 4: {len(step4_df)} rows, {len(step4_df.columns)} columns ({frame_memory_mb(step4_df):.1f} MB)")
 
     # Merge Step 2 and Step 4
     print("\nMerging Step 2 and Step 4...")
-    merged_df = pd.merge(
-        step2_df,
-        step4_df,
-        on='account_number',
-        how='inner',  # Only keep properties that have visual analysis
-        suffixes=('', '_visual')
-    )
+    with span("merge.step2_step4", "merge") as s:
+        merged_df = pd.merge(
+            step2_df,
+            step4_df,
+            on='account_number',
+            how='inner',  # Only keep properties that have visual analysis
+            suffixes=('', '_visual')
+        )
+        s.add(rows=len(step2_df))
 
     # Drop duplicate Account Number columns from merge - keep only the normalized account_number
     cols_to_drop = [col for col in merged_df.columns if col in ['Account Number', 'Account Number_visual']]
@@ -40,8 +243,7 @@ def main():
     print(f"After merge: {len(merged_df)} rows, {len(merged_df.columns)} columns")
 
     # Filter to priority properties (SEVERE, POOR, FAIR, VACANT LAND)
-    priority_categories = ['SEVERE', 'POOR', 'FAIR', 'VACANT LAND']
-    priority_df = merged_df[merged_df['Condition_Category'].isin(priority_categories)].copy()
+    priority_df = merged_df[merged_df['Condition_Category'].isin(PRIORITY_CATEGORIES)].copy()
 
     print(f"\nPriority properties: {len(priority_df)} rows")
     print(f"  SEVERE: {len(priority_df[priority_df['Condition_Category'] == 'SEVERE'])}")
@@ -55,169 +257,22 @@ def main():
     print(f"After dedup: {len(priority_df)} rows")
 
     # Add photo_url column
-    STORAGE_BASE_URL = "https://lzowptxqnuundzhhqvko.supabase.co/storage/v1/object/public/property-images"
-
-    def get_image_url(account_number):
-        image_filename = str(account_number).replace('-', '_')
-        # Check both original location and FINAL_PARA_IMPORT folder
-        image_path1 = f"Step 3 - Download Images/downloaded_images/{image_filename}.jpg"
-        image_path2 = f"Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/02_IMAGENS_206_FOTOS/{image_filename}.jpg"
-        if os.path.exists(image_path1) or os.path.exists(image_path2):
-            return f"{STORAGE_BASE_URL}/{image_filename}.jpg"
-        return None
-
     priority_df['photo_url'] = priority_df['account_number'].apply(get_image_url)
 
     # Filter to only properties with images
     priority_df = priority_df[priority_df['photo_url'].notna()].copy()
     print(f"After filtering for images: {len(priority_df)} rows")
 
-    # Rename columns to snake_case for database
-    column_mapping = {
-        'Account Number': 'account_number',
-        'Owner Name': 'owner_name',
-        'Owner Address': 'owner_address',
-        'Property Address': 'property_address',
-        'Balance Amount': 'balance_amount',
-        'Assessed Value': 'assessed_value',
-        'Roll Yr': 'roll_year',
-        'Tax Yr': 'tax_year',
-        'Alternate Key': 'alternate_key',
-        'Account Status': 'account_status',
-        'Billing Address': 'billing_address',
-        'Legal Desc': 'legal_description',
-        'Millage Code': 'millage_code',
-        'Cert #': 'cert_number',
-        'Bidder #': 'bidder_number',
-        'Cert Buyer': 'cert_buyer',
-        'Cert Status': 'cert_status',
-        'Deed Status': 'deed_status',
-        'Equity': 'equity',
-        'Years Old': 'years_old',
-        'Times Delinquent': 'times_delinquent',
-        'Estate/Trust': 'is_estate_trust',
-        'Out of State': 'is_out_of_state',
-        'Deed Certified': 'is_deed_certified',
-        'Cert Issued': 'is_cert_issued',
-        'Is LLC': 'is_llc',
-        'Score': 'priority_score',
-        'Equity Ratio': 'equity_ratio',
-        'Value Per Acre': 'value_per_acre',
-        'Condition_Score': 'condition_score',
-        'Condition_Category': 'condition_category',
-        'Lawn_Condition': 'lawn_condition',
-        'Exterior_Condition': 'exterior_condition',
-        'Visible_Issues': 'visible_issues',
-        'Appears_Vacant': 'appears_vacant',
-        'Estimated_Repair_Cost': 'estimated_repair_cost',
-        'Visual_Summary': 'visual_summary',
-        'Roof_Condition': 'roof_condition',
-        'Driveway_Condition': 'driveway_condition',
-        'Pool_Condition': 'pool_condition',
-        'Vehicles_Present': 'vehicles_present',
-        'Distress_Indicators': 'distress_indicators',
-        'Neighbor_Comparison': 'neighbor_comparison',
-        'Estimated_Repair_Cost_Low': 'estimated_repair_cost_low',
-        'Estimated_Repair_Cost_High': 'estimated_repair_cost_high',
-        'Image_Appears_Current': 'image_appears_current',
-        'Image_Path': 'image_path',
-        'Analysis_Date': 'analysis_date'
-    }
-
     # Apply mapping for columns that exist
-    priority_df = priority_df.rename(columns={k: v for k, v in column_mapping.items() if k in priority_df.columns})
-
-    # Select and order columns for import
-    columns_order = [
-        # Essential identifiers
-        'account_number',
-        'property_address',
-        'owner_name',
-        'owner_address',
-
-        # Photo
-        'photo_url',
-
-        # Financial data
-        'balance_amount',
-        'assessed_value',
-        'market_value_2025',
-        'assessed_value_2025',
-        'land_value_2025',
-        'building_value_2025',
-        'equity',
-        'equity_ratio',
-
-        # Property details
-        'year_built',
-        'years_old',
-        'living_area_sqft',
-        'gross_area_sqft',
-        'bedrooms',
-        'bathrooms',
-        'floors',
-        'building_type',
-        'exterior_wall',
-        'interior_wall',
-        'land_use_code',
-        'land_use_description',
-        'zoning',
-        'land_qty',
-        'land_qty_code',
-        'land_acres',
-        'land_sqft',
-        'value_per_acre',
-
-        # Tax & legal
-        'roll_year',
-        'tax_year',
-        'alternate_key',
-        'account_status',
-        'billing_address',
-        'legal_description',
-        'millage_code',
-        'cert_number',
-        'bidder_number',
-        'cert_buyer',
-        'cert_status',
-        'deed_status',
-
-        # Scoring & flags
-        'priority_score',
-        'times_delinquent',
-        'is_estate_trust',
-        'is_out_of_state',
-        'is_deed_certified',
-        'is_cert_issued',
-        'is_llc',
-
-        # Visual analysis
-        'condition_score',
-        'condition_category',
-        'lawn_condition',
-        'exterior_condition',
-        'roof_condition',
-        'driveway_condition',
-        'pool_condition',
-        'visible_issues',
-        'appears_vacant',
-        'vehicles_present',
-        'distress_indicators',
-        'neighbor_comparison',
-        'visual_summary',
-        'estimated_repair_cost',
-        'estimated_repair_cost_low',
-        'estimated_repair_cost_high',
-        'image_appears_current',
-
-        # Metadata
-        'pid',
-        'image_path',
-        'analysis_date'
-    ]
+    priority_df = priority_df.rename(columns={k: v for k, v in COLUMN_MAPPING.items() if k in priority_df.columns})
+
+    # Priority score, tier and cash offer
+    score_frame(priority_df, weights)
+    print("\nPriority tiers:")
+    print_tiers(priority_df)
 
     # Only include columns that exist in the dataframe
-    available_columns = [col for col in columns_order if col in priority_df.columns]
+    available_columns = [col for col in COLUMNS_ORDER if col in priority_df.columns]
     final_df = priority_df[available_columns].copy()
 
     # Remove columns that are completely empty (100% null)
@@ -232,16 +287,112 @@ def main():
     for i, col in enumerate(final_df.columns, 1):
         print(f"  {i}. {col}")
 
-    # Save to FINAL_PARA_IMPORT folder
-    output_path = "Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv"
-    final_df.to_csv(output_path, index=False, encoding='utf-8-sig')
+    # Save canonical intermediate to FINAL_PARA_IMPORT folder (Parquet; CSV via export_lovable_csv.py)
+    output_path = write_artifact(final_df, IMPORT_ARTIFACT)
 
-    print(f"\n[OK] Complete CSV saved to: {output_path}")
-    print(f"[OK] Ready for Lovable import!")
+    print(f"\n[OK] Complete dataset saved to: {output_path}")
+    print(f"[OK] Run export_lovable_csv.py to produce the Lovable CSV")
 
     # Show sample data
     print("\nSample data (first 2 rows):")
     print(final_df.head(2).T)
 
+def main_streaming(chunksize=DEFAULT_CHUNKSIZE, weights=DEFAULT_WEIGHTS):
+    """
+    Chunked merge for full-county inputs
+
+    Step 4 (the smaller file) is filtered to priority categories and indexed by
+    account key; Step 2 is streamed in chunks, joined, deduped against the keys
+    already written and appended to the artifact. Memory stays bounded by the
+    chunk size plus the Step 4 index, not by the Step 2 roll.
+    """
+    print(f"Streaming merge (chunksize={chunksize})...")
+
+    # Index Step 4 by account key - filter and dedup before the join so the
+    # first priority match per account wins, as in the in-memory merge
+    step4_df = read_pipeline_csv(STEP4_CSV, columns=SOURCE_COLUMNS, canonical_key=True)
+    print(f"Step 4: {len(step4_df)} rows, {len(step4_df.columns)} columns ({frame_memory_mb(step4_df):.1f} MB)")
+    step4_df = step4_df[step4_df['Condition_Category'].isin(PRIORITY_CATEGORIES)]
+    step4_df = step4_df.drop_duplicates(subset=['account_number'], keep='first')
+    step4_df = step4_df.drop(columns=['Account Number'], errors='ignore').set_index('account_number')
+    print(f"Step 4 priority index: {len(step4_df)} accounts")
+
+    # Output columns are fixed up front so every appended chunk shares one schema
+    step2_columns = [col for col in read_csv_header(STEP2_CSV) if col in SOURCE_COLUMNS]
+    merged_columns = set(step2_columns) | set(step4_df.columns) | {'account_number', 'photo_url'}
+    renamed_columns = {COLUMN_MAPPING.get(col, col) for col in merged_columns} | SCORED_COLUMNS
+    output_columns = [col for col in COLUMNS_ORDER if col in renamed_columns]
+
+    seen_accounts = set()
+    category_counts = {category: 0 for category in PRIORITY_CATEGORIES}
+    tier_counts = {}
+    non_null_counts = {col: 0 for col in output_columns}
+    rows_read = 0
+    rows_matched = 0
+
+    with ArtifactWriter(IMPORT_ARTIFACT, output_columns) as writer:
+        for chunk in iter_pipeline_csv(STEP2_CSV, chunksize, columns=SOURCE_COLUMNS, canonical_key=True):
+            rows_read += len(chunk)
+
+            # Incremental dedup: first occurrence across all chunks wins
+            chunk = chunk.drop(columns=['Account Number'], errors='ignore')
+            chunk = chunk[~chunk['account_number'].isin(seen_accounts)]
+            chunk = chunk.drop_duplicates(subset=['account_number'], keep='first')
+
+            # Inner join against the Step 4 index (priority filter already applied)
+            with span("merge.chunk", "merge") as s:
+                merged = chunk.join(step4_df, on='account_number', how='inner', rsuffix='_visual')
+                s.add(rows=len(chunk))
+            if merged.empty:
+                continue
+
+            rows_matched += len(merged)
+            seen_accounts.update(merged['account_number'].tolist())
+            for category, count in merged['Condition_Category'].value_counts().items():
+                category_counts[category] = category_counts.get(category, 0) + int(count)
+
+            # Only properties with images
+            merged['photo_url'] = merged['account_number'].apply(get_image_url)
+            merged = merged[merged['photo_url'].notna()]
+
+            merged = merged.rename(columns={k: v for k, v in COLUMN_MAPPING.items() if k in merged.columns})
+            score_frame(merged, weights)
+            for tier, count in merged['priority_tier'].value_counts().items():
+                tier_counts[tier] = tier_counts.get(tier, 0) + int(count)
+            output = merged.reindex(columns=output_columns)
+            for col, count in output.notna().sum().items():
+                non_null_counts[col] += int(count)
+
+            writer.write(output)
+            print(f"  Read {rows_read} rows -> {writer.rows} written")
+
+    print(f"\nPriority properties (deduped): {rows_matched} rows")
+    for category, count in category_counts.items():
+        print(f"  {category}: {count}")
+    print(f"After filtering for images: {writer.rows} rows")
+    print("\nPriority tiers:")
+    for tier, count in sorted(tier_counts.items()):
+        print(f"  {tier}: {count}")
+
+    # Columns can't be dropped after the fact without a second pass - report them
+    empty_cols = [col for col, count in non_null_counts.items() if count == 0]
+    if empty_cols:
+        print(f"\nEmpty columns kept in streaming mode ({len(empty_cols)}): {empty_cols}")
+
+    print(f"\nFinal dataset: {writer.rows} rows, {len(output_columns)} columns")
+    print(f"\n[OK] Complete dataset saved to: {writer.path}")
+    print(f"[OK] Run export_lovable_csv.py to produce the Lovable CSV")
+
 if __name__ == "__main__":
-    main()
+    weights = weights_from_args(sys.argv)
+    if '--stream' in sys.argv:
+        chunksize = DEFAULT_CHUNKSIZE
+        if '--chunksize' in sys.argv:
+            try:
+                chunksize = int(sys.argv[sys.argv.index('--chunksize') + 1])
+            except (IndexError, ValueError):
+                print("[ERROR] Invalid --chunksize value")
+                sys.exit(1)
+        main_streaming(chunksize, weights)
+    else:
+        main(weights)
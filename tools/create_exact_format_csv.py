@@ -4,11 +4,13 @@ but with complete data from all steps
 """
 import pandas as pd
 
-# Load the complete data
-df_complete = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv')
+from pipeline_schema import read_pipeline_csv, read_artifact, write_artifact, IMPORT_ARTIFACT
 
 # Load the old working CSV to get exact column order
-df_old = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_206_PROPERTIES.csv', nrows=1)
+df_old = read_pipeline_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_206_PROPERTIES.csv', nrows=1)
+
+# Load the complete data (only the columns the old format keeps)
+df_complete = read_artifact(IMPORT_ARTIFACT, columns=df_old.columns.tolist())
 
 print(f"Complete CSV: {len(df_complete)} rows, {len(df_complete.columns)} columns")
 print(f"Old working CSV columns: {len(df_old.columns)}")
@@ -35,12 +37,11 @@ for col in old_columns:
 print(f"\nFinal CSV: {len(new_df)} rows, {len(new_df.columns)} columns")
 
 # Save with EXACT same format
-output_path = 'Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv'
-new_df.to_csv(output_path, index=False, encoding='utf-8')
+output_path = write_artifact(new_df, IMPORT_ARTIFACT)
 
-print(f"\n[OK] CSV saved with exact format: {output_path}")
+print(f"\n[OK] Dataset saved with exact format: {output_path}")
 print(f"[OK] Columns: {len(new_df.columns)}")
-print(f"[OK] Ready for Lovable import!")
+print(f"[OK] Run export_lovable_csv.py to produce the Lovable CSV")
 
 # Verify
 print("\nFirst row sample:")
@@ -5,9 +5,11 @@ Maps column names to what Lovable expects + adds all extra columns
 
 import pandas as pd
 
+from pipeline_schema import read_artifact, write_artifact, IMPORT_ARTIFACT
+
 def main():
     print("Loading complete CSV...")
-    df = pd.read_csv('Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv')
+    df = read_artifact(IMPORT_ARTIFACT)
     print(f"Loaded: {len(df)} rows, {len(df.columns)} columns")
 
     # Create new columns with Lovable-compatible names
@@ -122,7 +124,8 @@ def main():
             return 'P4-LAND'
         return 'P4-MODERATE'
 
-    if 'condition_category' in df.columns:
+    # Keep the tiers of the scoring stage; older artifacts fall back to the category
+    if 'priority_tier' not in df.columns and 'condition_category' in df.columns:
         lovable_df['priority_tier'] = df['condition_category'].apply(get_priority_tier)
 
     # Map equity -> equity_estimate
@@ -212,12 +215,11 @@ def main():
         print(f"  {i}. {col}")
 
     # Save
-    output_path = "Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS.csv"
-    final_df.to_csv(output_path, index=False, encoding='utf-8')
+    output_path = write_artifact(final_df, IMPORT_ARTIFACT)
 
-    print(f"\n[OK] Lovable-compatible CSV saved: {output_path}")
+    print(f"\n[OK] Lovable-compatible dataset saved: {output_path}")
     print(f"[OK] Total columns: {len(final_df.columns)}")
-    print(f"[OK] Ready for import!")
+    print(f"[OK] Run export_lovable_csv.py to produce the Lovable CSV")
 
     # Sample data
     print("\nSample row:")
@@ -0,0 +1,33 @@
+"""
+Export the Step 5 intermediate to the final CSV for Lovable import
+
+The pipeline keeps 01_DADOS_COMPLETO_TODAS_COLUNAS as a Parquet artifact
+between stages; this is the only step that writes CSV text, to
+01_DADOS_COMPLETO_LOVABLE.csv (never over the artifact's own CSV fallback).
+
+Usage:
+    python export_lovable_csv.py                 # Full export
+    python export_lovable_csv.py --bom           # Write UTF-8 with BOM (Excel)
+"""
+
+import sys
+
+from pipeline_schema import read_artifact, IMPORT_ARTIFACT, LOVABLE_EXPORT_CSV
+
+OUTPUT_CSV = LOVABLE_EXPORT_CSV
+
+
+def main():
+    encoding = 'utf-8-sig' if '--bom' in sys.argv else 'utf-8'
+
+    df = read_artifact(IMPORT_ARTIFACT)
+    print(f"Loaded: {len(df)} rows, {len(df.columns)} columns")
+
+    df.to_csv(OUTPUT_CSV, index=False, encoding=encoding)
+
+    print(f"\n[OK] Lovable CSV exported: {OUTPUT_CSV} ({encoding})")
+    print(f"[OK] Ready for Lovable import!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Local stand-in for Supabase PostgREST + Storage (benchmarks and dry runs)
+
+An in-memory HTTP server that speaks the subset of the REST and Storage APIs
+the Python tools use, so imports and uploads can run end to end without a
+real project:
+
+- GET/POST/PATCH/DELETE /rest/v1/<table> with eq/neq/in/is/gt/gte/lt/lte
+  filters, select, order/offset/limit, on_conflict upserts and Prefer
+  return=/count=
+- POST/PUT /storage/v1/object/<bucket>/<path> (409 when the object exists
+  and x-upsert is not set), object list/remove, bucket list/create
+
+Latency and failures can be injected per request, and every request is
+counted (method, bytes in/out, injected errors) in `stats`.
+
+    server = FakeSupabase(latency=0.02, error_rate=0.01).start()
+    os.environ["SUPABASE_URL"] = server.url
+    ...
+    print(server.snapshot())
+    server.stop()
+
+Run standalone (Ctrl+C to stop):
+    python fake_supabase.py --port 54321 --latency-ms 20 --error-rate 0.01
+"""
+
+import json
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qsl, unquote
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "offset", "limit", "on_conflict", "columns"}
+
+# Range filters compare as text: fine for ISO timestamps in one format, not for numbers
+COMPARISONS = {
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+
+def parse_prefer(header):
+    """Prefer: return=minimal,resolution=merge-duplicates -> dict"""
+    prefer = {}
+    for part in (header or "").split(","):
+        if "=" in part:
+            name, value = part.split("=", 1)
+            prefer[name.strip()] = value.strip()
+    return prefer
+
+
+def parse_literal(text):
+    """PostgREST filter literal -> comparable value (quotes removed)"""
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        return text[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return text
+
+
+def split_list(text):
+    """Body of in.(a,"b,c",d) -> ['a', 'b,c', 'd']"""
+    items, current, quoted, escaped = [], [], False, False
+    for ch in text:
+        if escaped:
+            current.append(ch)
+            escaped = False
+        elif ch == "\\" and quoted:
+            current.append(ch)
+            escaped = True
+        elif ch == '"':
+            quoted = not quoted
+            current.append(ch)
+        elif ch == "," and not quoted:
+            items.append(parse_literal("".join(current)))
+            current = []
+        else:
+            current.append(ch)
+    if current or items:
+        items.append(parse_literal("".join(current)))
+    return items
+
+
+def as_text(value):
+    """Stored values compare as text, like PostgREST filter literals"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(value).lower()
+    return str(value)
+
+
+class Table:
+    """Rows by id plus lazily built hash indexes for filtered columns"""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_id = 1
+        self.indexes = {}
+
+    def index(self, column):
+        if column not in self.indexes:
+            index = defaultdict(set)
+            for row_id, row in self.rows.items():
+                index[as_text(row.get(column))].add(row_id)
+            self.indexes[column] = index
+        return self.indexes[column]
+
+    def _unindex(self, row_id, row):
+        for column, index in self.indexes.items():
+            index[as_text(row.get(column))].discard(row_id)
+
+    def _reindex(self, row_id, row):
+        for column, index in self.indexes.items():
+            index[as_text(row.get(column))].add(row_id)
+
+    def insert(self, row):
+        row = dict(row)
+        if row.get("id") is None:
+            row["id"] = self.next_id
+        if isinstance(row["id"], int):
+            self.next_id = max(self.next_id, row["id"] + 1)
+        self.rows[row["id"]] = row
+        self._reindex(row["id"], row)
+        return row
+
+    def update(self, row_id, values):
+        row = self.rows[row_id]
+        self._unindex(row_id, row)
+        row.update(values)
+        self._reindex(row_id, row)
+        return row
+
+    def delete(self, row_id):
+        self._unindex(row_id, self.rows.pop(row_id))
+
+    def match(self, filters):
+        """Ids of rows matching every (column, op, value) filter"""
+        ids = None
+        for column, op, value in filters:
+            if op == "eq":
+                found = set(self.index(column).get(as_text(value), ()))
+            elif op == "in":
+                index = self.index(column)
+                found = set().union(*(index.get(v, ()) for v in value)) if value else set()
+            elif op == "is":
+                wanted = None if value == "null" else value
+                found = set(self.index(column).get(as_text(wanted), ()))
+            elif op == "neq":
+                found = {row_id for row_id, row in self.rows.items() if as_text(row.get(column)) != value}
+            elif op in COMPARISONS:
+                compare = COMPARISONS[op]
+                found = {row_id for row_id, row in self.rows.items()
+                         if row.get(column) is not None and compare(as_text(row[column]), value)}
+            else:
+                raise ValueError(f"unsupported operator: {op}")
+            ids = found if ids is None else ids & found
+        return set(self.rows) if ids is None else ids
+
+
+class FakeSupabase:
+    """Threaded in-memory PostgREST + Storage server with latency/error injection"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tables = defaultdict(Table)
+        self.buckets = {}   # bucket -> {object path: size}
+        self.reset_stats()
+
+        handler = type("Handler", (_Handler,), {"backend": self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def reset_stats(self):
+        self.stats = {
+            "requests": 0,
+            "errors_injected": 0,
+            "bytes_received": 0,
+            "bytes_sent": 0,
+            "by_method": defaultdict(int),
+        }
+
+    def snapshot(self):
+        """Copy of the counters (safe to json.dump)"""
+        with self.lock:
+            stats = dict(self.stats)
+            stats["by_method"] = dict(self.stats["by_method"])
+        return stats
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # Seeding -----------------------------------------------------------------
+
+    def seed_rows(self, table, rows):
+        with self.lock:
+            for row in rows:
+                self.tables[table].insert(row)
+
+    def seed_bucket(self, bucket):
+        with self.lock:
+            self.buckets.setdefault(bucket, {})
+
+    # REST --------------------------------------------------------------------
+
+    def rest(self, method, table_name, params, prefer, body):
+        """Handle one PostgREST request -> (status, payload, headers)"""
+        filters = []
+        options = {}
+        for name, value in params:
+            if name in RESERVED_PARAMS:
+                options[name] = value
+                continue
+            op, _, literal = value.partition(".")
+            if op == "in":
+                filters.append((name, "in", split_list(literal.strip()[1:-1])))
+            else:
+                filters.append((name, op, parse_literal(literal)))
+
+        representation = prefer.get("return") == "representation"
+        with self.lock:
+            table = self.tables[table_name]
+
+            if method == "GET":
+                ids = table.match(filters)
+                rows = [table.rows[row_id] for row_id in ids]
+                if "order" in options:
+                    column, _, direction = options["order"].partition(".")
+                    rows.sort(key=lambda row: (row.get(column) is None, as_text(row.get(column)) or ""),
+                              reverse=direction.startswith("desc"))
+                total = len(rows)
+                offset = int(options.get("offset", 0))
+                limit = options.get("limit")
+                rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+                rows = self._project(rows, options.get("select", "*"))
+                headers = {}
+                if prefer.get("count"):
+                    headers["Content-Range"] = f"{offset}-{offset + max(len(rows) - 1, 0)}/{total}"
+                return 200, rows, headers
+
+            if method == "POST":
+                records = body if isinstance(body, list) else [body]
+                conflict = options.get("on_conflict")
+                merge = prefer.get("resolution") == "merge-duplicates"
+                ignore = prefer.get("resolution") == "ignore-duplicates"
+                written = []
+                for record in records:
+                    existing = set()
+                    if conflict and record.get(conflict) is not None:
+                        existing = table.match([(conflict, "eq", as_text(record[conflict]))])
+                    elif "id" in record and record["id"] in table.rows:
+                        existing = {record["id"]}
+                    if existing:
+                        if ignore:
+                            continue
+                        if not merge:
+                            return 409, {"code": "23505", "message": "duplicate key value violates unique constraint"}, {}
+                        written.extend(table.update(row_id, record) for row_id in existing)
+                    else:
+                        written.append(table.insert(record))
+                return 201, (written if representation else None), {}
+
+            if method == "PATCH":
+                ids = table.match(filters)
+                written = [table.update(row_id, body or {}) for row_id in ids]
+                return (200, written, {}) if representation else (204, None, {})
+
+            if method == "DELETE":
+                ids = table.match(filters)
+                removed = [table.rows[row_id] for row_id in ids]
+                for row_id in ids:
+                    table.delete(row_id)
+                return (200, removed, {}) if representation else (204, None, {})
+
+        return 405, {"message": f"method {method} not supported"}, {}
+
+    @staticmethod
+    def _project(rows, select):
+        if select.strip() in ("", "*"):
+            return [dict(row) for row in rows]
+        columns = [column.strip() for column in select.split(",")]
+        return [{column: row.get(column) for column in columns} for row in rows]
+
+    # Storage -----------------------------------------------------------------
+
+    def storage(self, method, parts, headers, body, size):
+        """Handle one Storage request -> (status, payload, headers)"""
+        with self.lock:
+            if parts == ["bucket"]:
+                if method == "GET":
+                    return 200, [{"id": name, "name": name, "public": True} for name in self.buckets], {}
+                if method == "POST":
+                    bucket = (body or {}).get("id") or (body or {}).get("name")
+                    if bucket in self.buckets:
+                        return 409, {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"}, {}
+                    self.buckets[bucket] = {}
+                    return 200, {"name": bucket}, {}
+
+            if len(parts) >= 3 and parts[:2] == ["object", "list"]:
+                objects = self.buckets.get(parts[2], {})
+                prefix = (body or {}).get("prefix", "")
+                limit = int((body or {}).get("limit", 100))
+                offset = int((body or {}).get("offset", 0))
+                names = sorted(name for name in objects if name.startswith(prefix))[offset:offset + limit]
+                return 200, [{"name": name, "metadata": {"size": objects[name]}} for name in names], {}
+
+            if len(parts) >= 2 and parts[0] == "object":
+                bucket = parts[1]
+                if bucket not in self.buckets:
+                    self.buckets[bucket] = {}
+                objects = self.buckets[bucket]
+
+                if method == "DELETE" and len(parts) == 2:
+                    removed = [name for name in (body or {}).get("prefixes", []) if objects.pop(name, None) is not None]
+                    return 200, [{"name": name} for name in removed], {}
+
+                name = "/".join(parts[2:])
+                if method in ("POST", "PUT"):
+                    upsert = headers.get("x-upsert", "").lower() == "true" or method == "PUT"
+                    if name in objects and not upsert:
+                        return 409, {"statusCode": "409", "error": "Duplicate", "message": "The resource already exists"}, {}
+                    objects[name] = size
+                    return 200, {"Key": f"{bucket}/{name}"}, {}
+
+        return 404, {"message": "not found"}, {}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, like the real API
+    backend = None
+
+    def log_message(self, *args):
+        pass
+
+    def _handle(self):
+        backend = self.backend
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+
+        with backend.lock:
+            backend.stats["requests"] += 1
+            backend.stats["by_method"][self.command] += 1
+            backend.stats["bytes_received"] += length
+            inject = backend.error_rate and backend.random.random() < backend.error_rate
+
+        if backend.latency:
+            time.sleep(backend.latency)
+
+        if inject:
+            with backend.lock:
+                backend.stats["errors_injected"] += 1
+            return self._reply(backend.error_status, {"message": "injected failure"}, {})
+
+        split = urlsplit(self.path)
+        params = parse_qsl(split.query, keep_blank_values=True)
+        parts = [unquote(part) for part in split.path.strip("/").split("/")]
+
+        is_json = "json" in (self.headers.get("Content-Type") or "")
+        try:
+            body = json.loads(raw) if raw and is_json else None
+        except ValueError:
+            return self._reply(400, {"message": "invalid JSON body"}, {})
+
+        try:
+            if parts[:2] == ["rest", "v1"] and len(parts) == 3:
+                prefer = parse_prefer(self.headers.get("Prefer"))
+                status, payload, headers = backend.rest(self.command, parts[2], params, prefer, body)
+            elif parts[:2] == ["storage", "v1"]:
+                headers_in = {k.lower(): v for k, v in self.headers.items()}
+                status, payload, headers = backend.storage(self.command, parts[2:], headers_in, body, length)
+            else:
+                status, payload, headers = 404, {"message": "not found"}, {}
+        except (ValueError, KeyError) as e:
+            status, payload, headers = 400, {"message": str(e)}, {}
+
+        self._reply(status, payload, headers)
+
+    def _reply(self, status, payload, headers):
+        data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if data:
+            self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+        with self.backend.lock:
+            self.backend.stats["bytes_sent"] += len(data)
+
+    do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _handle
+
+
+def main():
+    def option(flag, default):
+        return sys.argv[sys.argv.index(flag) + 1] if flag in sys.argv else default
+
+    server = FakeSupabase(
+        port=int(option('--port', 54321)),
+        latency=float(option('--latency-ms', 0)) / 1000,
+        error_rate=float(option('--error-rate', 0)),
+    ).start()
+    print(f"Fake Supabase listening on {server.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\n{json.dumps(server.snapshot(), indent=2)}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
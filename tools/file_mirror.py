@@ -0,0 +1,182 @@
+"""
+Mirror files and folders with links instead of full copies
+
+The Step 5 reorganizer used to copytree node_modules, .git and src into
+LOVABLE_PROJECT/. That duplicated gigabytes and took minutes. A Mirror
+recreates the tree file by file using the cheapest method that works:
+
+    reflink    copy-on-write clone (Linux: btrfs, XFS, bcachefs...) - no extra disk, files stay independent
+    hardlink   os.link - no extra disk, but source and mirror share the same file
+    copy       shutil.copy2 - the old behaviour
+
+Mode "auto" tries them in that order. When a method fails on a device (a
+cross-device link, a filesystem without reflinks), it is not tried there
+again.
+
+Re-running is incremental. Files with the same size and mtime (or the same
+inode) are skipped, and entries that vanished from the source are removed,
+just as the old rmtree + copytree left them. Symlinks (node_modules/.bin) are
+recreated as symlinks. In "copy" and "reflink" mode a mirror file that is a
+hardlink of its source (left by an earlier auto/hardlink run) counts as
+changed and is re-created, so the two become independent.
+
+    mirror = Mirror("auto")
+    mirror.mirror("node_modules", "LOVABLE_PROJECT/node_modules")
+    print(mirror.describe())
+"""
+
+import os
+import shutil
+import stat
+import sys
+from pathlib import Path
+
+MODES = ("auto", "reflink", "hardlink", "copy")
+METHODS = {
+    "auto": ("reflink", "hardlink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "hardlink": ("hardlink", "copy"),
+    "copy": ("copy",),
+}
+
+# FICLONE ioctl (linux/fs.h); other platforms fall back to hardlinks/copies
+FICLONE = 0x40049409
+try:
+    import fcntl
+    REFLINK_AVAILABLE = sys.platform.startswith("linux")
+except ImportError:
+    REFLINK_AVAILABLE = False
+
+
+def remove(path):
+    """Delete a file, symlink or folder"""
+    path = Path(path)
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def unchanged(current, source_stat, shared=True):
+    """
+    Same file already in place: same inode, or same size and mtime
+
+    With shared=False the same inode (a hardlink of the source) is not
+    good enough and counts as changed.
+    """
+    if current is None or not stat.S_ISREG(current.st_mode):
+        return False
+    if current.st_ino == source_stat.st_ino and current.st_dev == source_stat.st_dev:
+        return shared
+    return current.st_size == source_stat.st_size and current.st_mtime_ns == source_stat.st_mtime_ns
+
+
+class Mirror:
+    """Incremental tree mirror; counts what each method did"""
+
+    def __init__(self, mode="auto"):
+        if mode not in MODES:
+            raise ValueError(f"unknown link mode: {mode} (choose from {', '.join(MODES)})")
+        self.mode = mode
+        self.counts = {"reflink": 0, "hardlink": 0, "copy": 0, "symlink": 0, "skipped": 0, "removed": 0}
+        self.bytes_copied = 0
+        self._failed = set()  # (method, st_dev) that raised once
+
+    def mirror(self, source, dest):
+        """Make `dest` an up-to-date mirror of the file or folder `source`"""
+        source, dest = Path(source), Path(dest)
+        if source.is_symlink():
+            self._mirror_symlink(source, dest)
+        elif source.is_dir():
+            self._mirror_dir(source, dest)
+        else:
+            self._mirror_file(source, dest, source.stat())
+
+    def describe(self):
+        c = self.counts
+        linked = c["reflink"] + c["hardlink"]
+        return (f"{linked} linked ({c['reflink']} reflink, {c['hardlink']} hardlink), "
+                f"{c['copy']} copied ({self.bytes_copied / 1e6:.1f} MB), "
+                f"{c['skipped']} unchanged, {c['removed']} removed")
+
+    # Internals -----------------------------------------------------------------
+
+    def _mirror_dir(self, source, dest):
+        if dest.is_symlink() or (dest.exists() and not dest.is_dir()):
+            remove(dest)
+        dest.mkdir(parents=True, exist_ok=True)
+
+        names = set()
+        with os.scandir(source) as entries:
+            for entry in entries:
+                names.add(entry.name)
+                target = dest / entry.name
+                if entry.is_symlink():
+                    self._mirror_symlink(Path(entry.path), target)
+                elif entry.is_dir(follow_symlinks=False):
+                    self._mirror_dir(Path(entry.path), target)
+                else:
+                    self._mirror_file(Path(entry.path), target, entry.stat(follow_symlinks=False))
+
+        # Drop what is no longer in the source, as rmtree + copytree did
+        with os.scandir(dest) as entries:
+            stale = [entry.path for entry in entries if entry.name not in names]
+        for path in stale:
+            remove(path)
+            self.counts["removed"] += 1
+
+    def _mirror_file(self, source, dest, source_stat):
+        try:
+            current = os.stat(dest, follow_symlinks=False)
+        except FileNotFoundError:
+            current = None
+        if unchanged(current, source_stat, shared="hardlink" in METHODS[self.mode]):
+            self.counts["skipped"] += 1
+            return
+        if current is not None:
+            remove(dest)
+
+        for method in METHODS[self.mode]:
+            if (method, source_stat.st_dev) in self._failed:
+                continue
+            try:
+                getattr(self, "_" + method)(source, dest)
+            except OSError:
+                if method == "copy":
+                    raise
+                self._failed.add((method, source_stat.st_dev))
+                if os.path.lexists(dest):
+                    os.unlink(dest)
+                continue
+            self.counts[method] += 1
+            if method == "copy":
+                self.bytes_copied += source_stat.st_size
+            return
+
+    def _mirror_symlink(self, source, dest):
+        target = os.readlink(source)
+        if dest.is_symlink() and os.readlink(dest) == target:
+            self.counts["skipped"] += 1
+            return
+        if os.path.lexists(dest):
+            remove(dest)
+        try:
+            os.symlink(target, dest, target_is_directory=source.is_dir())
+            self.counts["symlink"] += 1
+        except OSError:
+            # No symlink privilege (Windows): mirror what it points to, like copytree
+            if source.exists():
+                self.mirror(source.resolve(), dest)
+
+    def _reflink(self, source, dest):
+        if not REFLINK_AVAILABLE:
+            raise OSError("reflinks not supported on this platform")
+        with open(source, "rb") as src, open(dest, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        shutil.copystat(source, dest)
+
+    def _hardlink(self, source, dest):
+        os.link(source, dest)
+
+    def _copy(self, source, dest):
+        shutil.copy2(source, dest)
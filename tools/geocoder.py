@@ -0,0 +1,446 @@
+"""
+Batch geocoding for the import pipeline, with a local SQLite cache
+
+Coordinates used to come only from the geocode edge function: one address
+per call, with nothing kept on our side, so every re-import geocoded the same
+addresses again. This stage fills latitude/longitude before upload:
+
+1. rows that already have coordinates are left alone
+2. addresses are normalized: upper case, punctuation dropped, street words
+   abbreviated, ZIP cut to 5 digits. "123 Main Street, 32801-1234" and
+   "123 MAIN ST 32801" become one lookup
+3. each distinct address is looked up in the cache
+4. only the rest go to the provider. Requests run concurrently
+   (--concurrency) under a request rate (--rate), and 429/5xx are retried
+   like supabase_async.py
+
+Every answer is written to the cache as it arrives, "not found" included.
+An interrupted run loses nothing, and a repeat import makes almost no
+provider calls. --retry-missing asks again for cached misses.
+
+Providers (--provider):
+- google     Google Geocoding API; needs GOOGLE_MAPS_API_KEY (the default when set)
+- nominatim  OpenStreetMap Nominatim, 1 request/s per its usage policy
+- stub       deterministic offline coordinates around Orlando for tests and
+             benchmarks; the real providers never use its cache entries
+
+There is no city-center fallback like the edge function has. An address that
+isn't found keeps empty coordinates, because a made-up point would make comps
+distances (spatial_index.py) meaningless.
+
+The cache is geocode_cache.sqlite next to the input (--cache PATH to share one).
+
+Usage:
+    python geocoder.py                                     # fill the Step 5 import artifact
+    python geocoder.py ../LOVABLE_UPLOAD_WITH_IMAGES.csv   # fill a CSV in place (only latitude/longitude change)
+    python geocoder.py leads.csv --provider stub --concurrency 8 --rate 5 --retry-missing
+"""
+
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from pipeline_schema import read_artifact, write_artifact, artifact_path, IMPORT_ARTIFACT
+from owner_dedup import STREET_WORDS, NON_WORD, ZIP, first_column
+from spatial_index import coordinates
+from supabase_async import AsyncTokenBucket
+from supabase_client import RETRY_STATUSES, DEFAULT_MAX_RETRIES, backoff_delay, retry_after
+from instrumentation import span, count
+
+load_dotenv()
+
+CACHE_NAME = "geocode_cache.sqlite"
+# Cache writes are committed in groups of this many answers
+COMMIT_EVERY = 100
+# Same User-Agent as the geocode edge function (Nominatim requires one)
+USER_AGENT = "MyLocalInvest/1.0 (contact@mylocalinvest.com)"
+
+FOUND = "found"
+NOT_FOUND = "not_found"
+
+# Column choices, most specific first
+ADDRESS_COLUMNS = ("property_address", "Property_Address", "Property Address", "address")
+CITY_COLUMNS = ("city", "property_city")
+STATE_COLUMNS = ("state", "property_state")
+ZIP_COLUMNS = ("zip_code", "property_zip", "zip")
+
+
+class GeocodeError(Exception):
+    """Provider refused or failed a lookup; `retry` when asking again may help"""
+
+    def __init__(self, message, retry=False, delay=None):
+        super().__init__(message)
+        self.retry = retry
+        self.delay = delay
+
+
+def check_response(response):
+    """Raise GeocodeError for a non-200 response (retryable for 429/5xx)"""
+    if response.status_code != 200:
+        raise GeocodeError(f"HTTP {response.status_code}: {response.text[:200]}",
+                           retry=response.status_code in RETRY_STATUSES, delay=retry_after(response))
+
+
+# Providers ---------------------------------------------------------------------
+#
+# A provider has a name, a default request rate (per second, 0 = unlimited)
+# and concurrency, and `async lookup(http, query)` returning (lat, lon) or
+# None when the address isn't found.
+
+class GoogleProvider:
+    name = "google"
+    rate = 40.0
+    concurrency = 16
+    URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+    def __init__(self):
+        self.api_key = os.getenv("GOOGLE_MAPS_API_KEY")
+        if not self.api_key:
+            raise GeocodeError("GOOGLE_MAPS_API_KEY is not set")
+
+    async def lookup(self, http, query):
+        response = await http.get(self.URL, params={"address": query, "key": self.api_key})
+        check_response(response)
+        data = response.json()
+        status = data.get("status")
+        if status == "OK" and data.get("results"):
+            location = data["results"][0]["geometry"]["location"]
+            return location["lat"], location["lng"]
+        if status == "ZERO_RESULTS":
+            return None
+        raise GeocodeError(f"{status}: {data.get('error_message', '')}", retry=status == "OVER_QUERY_LIMIT")
+
+
+class NominatimProvider:
+    name = "nominatim"
+    rate = 1.0
+    concurrency = 1
+    URL = "https://nominatim.openstreetmap.org/search"
+
+    async def lookup(self, http, query):
+        response = await http.get(self.URL, params={"format": "json", "q": query, "limit": 1})
+        check_response(response)
+        data = response.json()
+        if not data:
+            return None
+        return float(data[0]["lat"]), float(data[0]["lon"])
+
+
+class StubProvider:
+    """Offline: a fixed point per address within ~10 miles of Orlando; 'not found' without a house number"""
+    name = "stub"
+    rate = 0
+    concurrency = 32
+    CENTER = (28.5383, -81.3792)    # the edge function's default location
+    SPREAD = 0.15                   # degrees either way
+
+    async def lookup(self, http, query):
+        await asyncio.sleep(0)
+        if not re.match(r"\s*\d", query):
+            return None
+        digest = zlib.crc32(query.upper().encode("utf-8"))
+        lat = self.CENTER[0] + ((digest & 0xFFFF) / 0xFFFF - 0.5) * 2 * self.SPREAD
+        lon = self.CENTER[1] + ((digest >> 16) / 0xFFFF - 0.5) * 2 * self.SPREAD
+        return round(lat, 7), round(lon, 7)
+
+
+PROVIDERS = {"google": GoogleProvider, "nominatim": NominatimProvider, "stub": StubProvider}
+
+
+def default_provider():
+    return "google" if os.getenv("GOOGLE_MAPS_API_KEY") else "nominatim"
+
+
+# Addresses ---------------------------------------------------------------------
+
+def text(value):
+    """Cell as stripped text ('' when missing)"""
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def clean_words(value):
+    words = NON_WORD.sub(" ", text(value).upper()).split()
+    return " ".join(STREET_WORDS.get(word, word) for word in words)
+
+
+def normalize_address(street, city=None, zip_code=None):
+    """Cache key 'STREET|CITY|ZIP5' (None without a street)"""
+    street_key = clean_words(street)
+    if not street_key:
+        return None
+    match = ZIP.search(text(zip_code)) or ZIP.search(text(street))
+    return "|".join((street_key, clean_words(city), match.group(1) if match else ""))
+
+
+def query_text(street, city=None, state=None, zip_code=None):
+    """Human-readable address sent to the provider: 'street, city, state zip'"""
+    region = " ".join(part for part in (text(state), text(zip_code)) if part)
+    return ", ".join(part for part in (text(street), text(city), region) if part)
+
+
+# Cache -------------------------------------------------------------------------
+
+class GeocodeCache:
+    """SQLite table of normalized address -> coordinates, one row per provider"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS geocodes (
+            address_key TEXT NOT NULL,
+            provider TEXT NOT NULL,
+            status TEXT NOT NULL,
+            latitude REAL,
+            longitude REAL,
+            query TEXT,
+            geocoded_at TEXT NOT NULL,
+            PRIMARY KEY (address_key, provider)
+        )
+    """
+    LOOKUP_CHUNK = 900   # bound parameters per SELECT
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(self.SCHEMA)
+        self.uncommitted = 0
+
+    def lookup(self, keys, provider):
+        """
+        {key: (status, lat, lon)} for the keys the cache can answer for `provider`
+
+        A location found by any real provider is used, preferring
+        `provider`'s own; a "not found" only counts from `provider` itself.
+        Stub entries only answer the stub, and never a real provider.
+        """
+        keys = list(keys)
+        answers = {}
+        for i in range(0, len(keys), self.LOOKUP_CHUNK):
+            chunk = keys[i:i + self.LOOKUP_CHUNK]
+            rows = self.db.execute(
+                "SELECT address_key, provider, status, latitude, longitude FROM geocodes "
+                f"WHERE address_key IN ({','.join('?' * len(chunk))})", chunk)
+            for key, source, status, lat, lon in rows:
+                if (source == StubProvider.name) != (provider == StubProvider.name):
+                    continue
+                known = answers.get(key)
+                if status == FOUND:
+                    if known is None or known[0] != FOUND or source == provider:
+                        answers[key] = (FOUND, lat, lon)
+                elif source == provider and known is None:
+                    answers[key] = (NOT_FOUND, None, None)
+        return answers
+
+    def store(self, key, provider, location, query):
+        status, (lat, lon) = (FOUND, location) if location else (NOT_FOUND, (None, None))
+        self.db.execute(
+            "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, provider, status, lat, lon, query, datetime.now().isoformat(timespec="seconds")))
+        self.uncommitted += 1
+        if self.uncommitted >= COMMIT_EVERY:
+            self.commit()
+
+    def commit(self):
+        self.db.commit()
+        self.uncommitted = 0
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0]
+
+
+# Geocoding ---------------------------------------------------------------------
+
+async def lookup_all(provider, jobs, cache, concurrency, rate, stats, max_retries=DEFAULT_MAX_RETRIES):
+    """
+    Look up {key: query} with the provider; returns {key: (lat, lon)} for the ones found
+
+    At most `concurrency` requests are in flight and at most `rate` start per
+    second. Answers go to the cache as they arrive; failures after the
+    retries are counted in stats["errors"] and not cached.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = AsyncTokenBucket(rate)
+    found = {}
+
+    async def one(http, key, query):
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                await bucket.acquire()
+                stats["requests"] += 1
+                try:
+                    location = await provider.lookup(http, query)
+                except (httpx.TransportError, httpx.TimeoutException, GeocodeError) as e:
+                    retry = getattr(e, "retry", True)
+                    if not retry or attempt == max_retries:
+                        stats["errors"] += 1
+                        stats["last_error"] = f"{query}: {e}"
+                        return
+                    stats["retries"] += 1
+                    count("geocode.retries")
+                    await asyncio.sleep(getattr(e, "delay", None) or backoff_delay(attempt))
+                    continue
+                cache.store(key, provider.name, location, query)
+                if location:
+                    found[key] = location
+                    stats["found"] += 1
+                else:
+                    stats["not_found"] += 1
+                return
+
+    async with httpx.AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+        timeout=httpx.Timeout(30.0, connect=5.0),
+    ) as http:
+        await asyncio.gather(*(one(http, key, query) for key, query in jobs.items()))
+    cache.commit()
+    return found
+
+
+def geocode_frame(df, cache, provider, concurrency=None, rate=None, retry_missing=False):
+    """
+    Fill latitude/longitude of `df` (in place) where missing; returns the stats
+
+    Only distinct normalized addresses are looked up, cache first.
+    """
+    stats = {"rows": len(df), "located": 0, "no_address": 0, "addresses": 0, "cached": 0,
+             "cached_missing": 0, "lookups": 0, "requests": 0, "retries": 0,
+             "found": 0, "not_found": 0, "errors": 0, "filled": 0}
+    lat, lon = coordinates(df)
+    todo = np.flatnonzero(np.isnan(lat) | np.isnan(lon))
+    stats["located"] = len(df) - len(todo)
+
+    with span("geocode.normalize", "parse") as s:
+        columns = [first_column(df, names).iloc[todo].tolist()
+                   for names in (ADDRESS_COLUMNS, CITY_COLUMNS, STATE_COLUMNS, ZIP_COLUMNS)]
+        keys = []
+        queries = {}
+        for street, city, state, zip_code in zip(*columns):
+            key = normalize_address(street, city, zip_code)
+            keys.append(key)
+            if key is not None and key not in queries:
+                queries[key] = query_text(street, city, state, zip_code)
+        stats["no_address"] = keys.count(None)
+        stats["addresses"] = len(queries)
+        s.add(rows=len(todo))
+
+    with span("geocode.cache", "disk") as s:
+        answers = cache.lookup(queries, provider.name)
+        locations = {key: (a_lat, a_lon) for key, (status, a_lat, a_lon) in answers.items() if status == FOUND}
+        stats["cached"] = len(locations)
+        misses = {key for key, (status, _, _) in answers.items() if status == NOT_FOUND}
+        if not retry_missing:
+            stats["cached_missing"] = len(misses)
+        jobs = {key: query for key, query in queries.items()
+                if key not in locations and (retry_missing or key not in misses)}
+        s.add(rows=len(queries))
+
+    stats["lookups"] = len(jobs)
+    if jobs:
+        with span("geocode.provider", "network") as s:
+            locations.update(asyncio.run(lookup_all(
+                provider, jobs, cache, concurrency or provider.concurrency,
+                provider.rate if rate is None else rate, stats)))
+            s.add(rows=len(jobs))
+
+    filled = [(position, locations[key]) for position, key in zip(todo, keys) if key in locations]
+    stats["filled"] = len(filled)
+    if filled:
+        positions = [position for position, _ in filled]
+        for column, values in zip(("latitude", "longitude"), zip(*(location for _, location in filled))):
+            set_cells(df, column, positions, values)
+    return stats
+
+
+def set_cells(df, column, positions, values):
+    """Write `values` at `positions` only; text columns (CSV read as str) get text"""
+    if column not in df.columns:
+        df[column] = np.nan
+    if not pd.api.types.is_numeric_dtype(df[column]):
+        values = [repr(float(value)) for value in values]
+    df.iloc[positions, df.columns.get_loc(column)] = list(values)
+
+
+def print_summary(stats):
+    print(f"📍 {stats['rows']} rows: {stats['located']} already had coordinates, "
+          f"{stats['no_address']} have no address")
+    answered = stats["cached"] + stats["cached_missing"]
+    rate = answered / stats["addresses"] * 100 if stats["addresses"] else 100.0
+    print(f"💾 {stats['addresses']} distinct addresses: {answered} answered by the cache ({rate:.1f}% hit rate)")
+    print(f"🌐 {stats['lookups']} sent to the provider ({stats['requests']} requests, {stats['retries']} retries): "
+          f"{stats['found']} found, {stats['not_found']} not found, {stats['errors']} failed")
+    if stats["errors"]:
+        print(f"❌ Last error: {stats['last_error']}")
+    print(f"✅ {stats['filled']} rows filled")
+
+
+def main():
+    options = ("--provider", "--cache", "--concurrency", "--rate")
+    args = [arg for i, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith("--") and sys.argv[i - 1] not in options]
+    name = sys.argv[sys.argv.index("--provider") + 1] if "--provider" in sys.argv else default_provider()
+    concurrency = int(sys.argv[sys.argv.index("--concurrency") + 1]) if "--concurrency" in sys.argv else None
+    rate = float(sys.argv[sys.argv.index("--rate") + 1]) if "--rate" in sys.argv else None
+    retry_missing = "--retry-missing" in sys.argv
+
+    if name not in PROVIDERS:
+        print(f"❌ Unknown provider '{name}' (choose from {', '.join(PROVIDERS)})")
+        sys.exit(1)
+    try:
+        provider = PROVIDERS[name]()
+    except GeocodeError as e:
+        print(f"❌ {name}: {e}")
+        sys.exit(1)
+
+    if args:
+        input_path = Path(args[0])
+        if not input_path.exists():
+            print(f"❌ Input not found: {input_path}")
+            sys.exit(1)
+        # Raw text, so the cells the geocoder doesn't fill are written back as they were
+        with open(input_path, "rb") as f:
+            bom = f.read(3) == b"\xef\xbb\xbf"
+        df = pd.read_csv(input_path, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    else:
+        input_path = artifact_path(IMPORT_ARTIFACT)
+        df = read_artifact(IMPORT_ARTIFACT)
+    cache_path = Path(sys.argv[sys.argv.index("--cache") + 1]) if "--cache" in sys.argv else input_path.with_name(CACHE_NAME)
+    print(f"Loaded: {input_path} ({len(df)} rows)")
+    print(f"Provider: {provider.name}, cache: {cache_path}")
+
+    cache = GeocodeCache(cache_path)
+    try:
+        stats = geocode_frame(df, cache, provider, concurrency, rate, retry_missing)
+    finally:
+        cache.close()
+    print_summary(stats)
+
+    if not stats["filled"]:
+        print("[OK] Nothing new to write")
+    elif args:
+        tmp_path = input_path.with_name(input_path.name + ".tmp")
+        df.to_csv(tmp_path, index=False, encoding="utf-8-sig" if bom else "utf-8")
+        os.replace(tmp_path, input_path)
+        print(f"[OK] {input_path} updated with latitude / longitude")
+    else:
+        output_path = write_artifact(df, IMPORT_ARTIFACT)
+        print(f"[OK] {output_path} updated with latitude / longitude")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,31 @@
 """
 Importa as 84 properties para o Supabase
 Cria tabela 'properties' e importa todos os dados
+
+Só envia properties que mudaram desde o último import (ver sync_state.py).
+
+Uso:
+    python import_csv_to_lovable.py                     # Envia novas/alteradas
+    python import_csv_to_lovable.py --full              # Ignora o estado, envia tudo
+    python import_csv_to_lovable.py --delete-missing    # Também apaga as que sumiram do CSV
 """
 
 import os
+import sys
 import pandas as pd
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from pipeline_schema import read_pipeline_csv
+from sync_state import SyncState, state_path, print_delta
+from supabase_client import get_client
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
 CSV_FILE = "../LOVABLE_UPLOAD_WITH_IMAGES.csv"
+TABLE = "properties"
 
 def clean_value(value):
     """Clean pandas values for Supabase"""
@@ -28,6 +40,72 @@ def clean_value(value):
             return None
     return value
 
+def build_property_data(row):
+    """Properties payload for one CSV row"""
+    data = {
+        "account_number": clean_value(row.get("account_number")),
+        "property_address": clean_value(row.get("property_address")),
+        "photo_url": clean_value(row.get("photo_url")),
+
+        # Condition
+        "condition_score": clean_value(row.get("condition_score")),
+        "condition_category": clean_value(row.get("condition_category")),
+        "visual_summary": clean_value(row.get("visual_summary")),
+        "appears_vacant": clean_value(row.get("appears_vacant")),
+        "lawn_condition": clean_value(row.get("lawn_condition")),
+        "exterior_condition": clean_value(row.get("exterior_condition")),
+        "roof_condition": clean_value(row.get("roof_condition")),
+        "visible_issues": clean_value(row.get("visible_issues")),
+
+        # Owner info
+        "owner_name": clean_value(row.get("owner_name")),
+        "mailing_address": clean_value(row.get("mailing_address")),
+        "mailing_city": clean_value(row.get("mailing_city")),
+        "mailing_state": clean_value(row.get("mailing_state")),
+        "mailing_zip": clean_value(row.get("mailing_zip")),
+
+        # Property details
+        "property_type": clean_value(row.get("property_type")),
+        "beds": clean_value(row.get("beds")),
+        "baths": clean_value(row.get("baths")),
+        "year_built": clean_value(row.get("year_built")),
+        "sqft": clean_value(row.get("sqft")),
+        "lot_size": clean_value(row.get("lot_size")),
+
+        # Financial
+        "just_value": clean_value(row.get("just_value")),
+        "taxable_value": clean_value(row.get("taxable_value")),
+        "exemptions": clean_value(row.get("exemptions")),
+        "total_tax_due": clean_value(row.get("total_tax_due")),
+        "years_delinquent": int(clean_value(row.get("years_delinquent")) or 0),
+
+        # Scoring
+        "lead_score": clean_value(row.get("lead_score")),
+        "priority_tier": clean_value(row.get("priority_tier")),
+
+        # Estimates
+        "equity_estimate": clean_value(row.get("equity_estimate")),
+        "estimated_repair_cost_low": clean_value(row.get("estimated_repair_cost_low")),
+        "estimated_repair_cost_high": clean_value(row.get("estimated_repair_cost_high")),
+
+        # Flags
+        "is_estate": clean_value(row.get("is_estate")),
+        "is_out_of_state": clean_value(row.get("is_out_of_state")),
+        "is_vacant_land": clean_value(row.get("is_vacant_land")),
+        "distress_indicators": clean_value(row.get("distress_indicators")),
+
+        # Status
+        "lead_status": "new",
+        "approval_status": "pending",
+    }
+
+    # Location (geocoder.py): only sent when known, so coordinates set in the app are kept
+    for column in ("latitude", "longitude"):
+        value = clean_value(row.get(column))
+        if value is not None:
+            data[column] = value
+    return data
+
 def import_properties():
     """Import CSV data to Supabase"""
 
@@ -45,17 +123,15 @@ def import_properties():
         print(f"ERRO: Arquivo nao encontrado: {CSV_FILE}")
         return
 
-    df = pd.read_csv(CSV_FILE)
+    df = read_pipeline_csv(CSV_FILE)
     print(f"\nCarregando {len(df)} properties do CSV...")
 
     # Create Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    supabase = get_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
 
-    success = 0
-    updated = 0
-    inserted = 0
+    # Prepare data for every row, then keep only rows that changed since the last import
+    records = []
     errors = 0
-
     for idx, row in df.iterrows():
         account_number = row.get('account_number')
 
@@ -64,80 +140,38 @@ def import_properties():
             errors += 1
             continue
 
+        records.append(build_property_data(row))
+
+    state = SyncState(state_path(CSV_FILE, TABLE))
+    records, current_hashes, removed_keys = state.diff(records, full='--full' in sys.argv)
+    delete_missing = '--delete-missing' in sys.argv
+    print_delta(records, current_hashes, removed_keys, delete_missing)
+
+    success = 0
+    updated = 0
+    inserted = 0
+    deleted = 0
+
+    for idx, property_data in enumerate(records):
+        account_number = property_data["account_number"]
+
         try:
             # Check if property exists
-            existing = supabase.table("properties").select("*").eq("account_number", account_number).execute()
-
-            # Prepare data
-            property_data = {
-                "account_number": clean_value(account_number),
-                "property_address": clean_value(row.get("property_address")),
-                "photo_url": clean_value(row.get("photo_url")),
-
-                # Condition
-                "condition_score": clean_value(row.get("condition_score")),
-                "condition_category": clean_value(row.get("condition_category")),
-                "visual_summary": clean_value(row.get("visual_summary")),
-                "appears_vacant": clean_value(row.get("appears_vacant")),
-                "lawn_condition": clean_value(row.get("lawn_condition")),
-                "exterior_condition": clean_value(row.get("exterior_condition")),
-                "roof_condition": clean_value(row.get("roof_condition")),
-                "visible_issues": clean_value(row.get("visible_issues")),
-
-                # Owner info
-                "owner_name": clean_value(row.get("owner_name")),
-                "mailing_address": clean_value(row.get("mailing_address")),
-                "mailing_city": clean_value(row.get("mailing_city")),
-                "mailing_state": clean_value(row.get("mailing_state")),
-                "mailing_zip": clean_value(row.get("mailing_zip")),
-
-                # Property details
-                "property_type": clean_value(row.get("property_type")),
-                "beds": clean_value(row.get("beds")),
-                "baths": clean_value(row.get("baths")),
-                "year_built": clean_value(row.get("year_built")),
-                "sqft": clean_value(row.get("sqft")),
-                "lot_size": clean_value(row.get("lot_size")),
-
-                # Financial
-                "just_value": clean_value(row.get("just_value")),
-                "taxable_value": clean_value(row.get("taxable_value")),
-                "exemptions": clean_value(row.get("exemptions")),
-                "total_tax_due": clean_value(row.get("total_tax_due")),
-                "years_delinquent": int(clean_value(row.get("years_delinquent")) or 0),
-
-                # Scoring
-                "lead_score": clean_value(row.get("lead_score")),
-                "priority_tier": clean_value(row.get("priority_tier")),
-
-                # Estimates
-                "equity_estimate": clean_value(row.get("equity_estimate")),
-                "estimated_repair_cost_low": clean_value(row.get("estimated_repair_cost_low")),
-                "estimated_repair_cost_high": clean_value(row.get("estimated_repair_cost_high")),
-
-                # Flags
-                "is_estate": clean_value(row.get("is_estate")),
-                "is_out_of_state": clean_value(row.get("is_out_of_state")),
-                "is_vacant_land": clean_value(row.get("is_vacant_land")),
-                "distress_indicators": clean_value(row.get("distress_indicators")),
-
-                # Status
-                "lead_status": "new",
-                "approval_status": "pending",
-            }
+            existing = supabase.table(TABLE).select("id").eq("account_number", account_number).execute()
 
             if existing.data and len(existing.data) > 0:
                 # Update existing
                 property_id = existing.data[0]["id"]
-                supabase.table("properties").update(property_data).eq("id", property_id).execute()
+                supabase.table(TABLE).update(property_data).eq("id", property_id).execute()
                 print(f"  >> Updated: {account_number}")
                 updated += 1
             else:
                 # Insert new
-                supabase.table("properties").insert(property_data).execute()
+                supabase.table(TABLE).insert(property_data).execute()
                 print(f"  OK Inserted: {account_number}")
                 inserted += 1
 
+            state.mark_synced([property_data], current_hashes)
             success += 1
 
         except Exception as e:
@@ -146,13 +180,30 @@ def import_properties():
 
         # Progress update every 20 rows
         if (idx + 1) % 20 == 0:
-            print(f"\n--- Progress: {idx + 1}/{len(df)} ---\n")
+            print(f"\n--- Progress: {idx + 1}/{len(records)} ---\n")
+
+    # Remove properties whose account_number vanished from the CSV
+    if delete_missing and removed_keys:
+        for i in range(0, len(removed_keys), 100):
+            keys = removed_keys[i:i + 100]
+            try:
+                supabase.table(TABLE).delete().in_("account_number", keys).execute()
+                state.forget(keys)
+                deleted += len(keys)
+            except Exception as e:
+                print(f"  X Error deleting {len(keys)} properties: {e}")
+                errors += 1
+
+    state.save()
 
     print(f"\n{'='*60}")
     print(f"RESULTADO:")
-    print(f"  Total processadas: {success}/{len(df)}")
+    print(f"  Total processadas: {success}/{len(records)} alteradas ({len(df)} no CSV)")
     print(f"  Inseridas (novas): {inserted}")
     print(f"  Atualizadas: {updated}")
+    print(f"  Sem alteracao: {len(current_hashes) - len(records)}")
+    if delete_missing:
+        print(f"  Apagadas: {deleted}")
     if errors > 0:
         print(f"  Erros: {errors}")
     print(f"{'='*60}")
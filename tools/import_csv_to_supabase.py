@@ -4,13 +4,31 @@ Import CSV data to Supabase with UPSERT logic
 Imports all properties from Step 4 results WITHOUT overwriting existing approvals/rejections.
 - Existing properties: UPDATE only empty fields
 - New properties: INSERT with 'pending' status
+
+Progress is checkpointed after every committed batch of rows.
+
+Usage:
+    python import_csv_to_supabase.py                        # Import from the first row
+    python import_csv_to_supabase.py --resume               # Continue an interrupted import
+    python import_csv_to_supabase.py --plan                 # Dry run: insert/update/no-op/reject counts, request and payload estimates
+    python import_csv_to_supabase.py --plan --save-plan     # ...and save the plan next to the CSV
+    python import_csv_to_supabase.py --apply-plan           # Execute the saved plan without re-reading the table
 """
 
+import math
 import os
+import sys
+import numpy as np
 import pandas as pd
-from supabase import create_client, Client
 from dotenv import load_dotenv
 
+from pipeline_schema import read_pipeline_csv
+from account_keys import dedup_accounts
+from checkpoint import Checkpoint, checkpoint_path, file_fingerprint
+from supabase_client import get_client
+from instrumentation import span
+from write_plan import WritePlan, plan_path
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -18,19 +36,245 @@ SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")  # Service key for admi
 
 CSV_PATH = "../../Step 4 - AI Review & Evaluate/RESULTS/01_MASTER_Combined_Tax_Visual_Analysis.csv"
 
+# Only these MASTER columns are imported
+CSV_COLUMNS = [
+    "Account_Number", "Property_Address", "Owner_Name", "Mailing_Address", "DOR_UC",
+    "Total_Market_Value", "Total_Assessed_Value", "Exemptions", "Taxable_Value",
+    "Years_Delinquent", "Total_Amount_Due", "Face_Amount", "Certificate_Count",
+    "Tax_Score", "Visual_Score", "Final_Combined_Score", "Tier",
+]
+
+# CSV column for each properties field (photo_url / status fields are derived)
+FIELD_SOURCES = {
+    "account_number": "Account_Number",
+    "property_address": "Property_Address",
+    "owner_name": "Owner_Name",
+    "mailing_address": "Mailing_Address",
+    "property_use": "DOR_UC",
+
+    # Financial
+    "total_market_value": "Total_Market_Value",
+    "total_assessed_value": "Total_Assessed_Value",
+    "exemptions": "Exemptions",
+    "taxable_value": "Taxable_Value",
+
+    # Tax Analysis
+    "years_delinquent": "Years_Delinquent",
+    "total_amount_due": "Total_Amount_Due",
+    "face_amount": "Face_Amount",
+    "certificate_count": "Certificate_Count",
+
+    # Scores
+    "tax_score": "Tax_Score",
+    "visual_score": "Visual_Score",
+    "final_combined_score": "Final_Combined_Score",
+    "tier": "Tier",
+}
+
+# NEVER overwrite these approval/user tracking fields
+PROTECTED_FIELDS = [
+    "approval_status", "approved_by", "approved_by_name",
+    "approved_at", "rejection_reason", "rejection_notes",
+    "created_by", "created_by_name", "updated_by", "updated_by_name"
+]
+
+FETCH_BATCH_SIZE = 200   # account numbers per in.() filter (keeps URLs short)
+INSERT_BATCH_SIZE = 500
+IMPORT_BATCH_SIZE = 1000  # CSV rows per committed (checkpointed) batch
+
 def get_image_url(account_number):
     """Generate Supabase Storage URL for property image"""
     if pd.isna(account_number):
         return None
     return f"{SUPABASE_URL}/storage/v1/object/public/property-photos/{account_number}.jpg"
 
-def clean_value(value):
-    """Clean pandas values for Supabase"""
-    if pd.isna(value):
-        return None
-    if isinstance(value, (int, float)):
-        return float(value) if value != float('inf') else None
-    return str(value)
+def clean_column(series):
+    """Clean a pandas column for Supabase: numbers -> float (inf -> None), text -> str, NA -> None"""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.astype("float64").replace([np.inf, -np.inf], np.nan)
+    else:
+        values = series.astype("string")
+    return values.astype(object).where(values.notna(), None)
+
+def build_property_frame(df):
+    """Build the properties payload for every CSV row at once (one column per field)"""
+    frame = pd.DataFrame(index=df.index)
+    for field, column in FIELD_SOURCES.items():
+        if column in df.columns:
+            frame[field] = clean_column(df[column])
+        else:
+            frame[field] = None
+
+    # Counts default to 0 rather than NULL
+    for field in ("years_delinquent", "certificate_count"):
+        counts = pd.to_numeric(frame[field], errors="coerce").fillna(0)
+        frame[field] = counts.astype("int64").astype(object)
+
+    frame["photo_url"] = [get_image_url(account) for account in frame["account_number"]]
+    frame["lead_status"] = "new"
+    frame["approval_status"] = "pending"
+    return frame
+
+def fetch_existing_properties(supabase, account_numbers, batch_size=FETCH_BATCH_SIZE):
+    """Prefetch existing rows for the given account numbers (one request per batch)"""
+    rows = []
+    for i in range(0, len(account_numbers), batch_size):
+        batch = account_numbers[i:i + batch_size]
+        response = supabase.table("properties").select("*").in_("account_number", batch).execute()
+        rows.extend(response.data or [])
+    return pd.DataFrame(rows)
+
+def empty_mask(frame):
+    """True where an existing value counts as empty (None, NaN, "" or 0)"""
+    values = frame.to_numpy(dtype=object)
+    return pd.isna(values) | (values == "") | (values == 0)
+
+def plan_fill_empty(new_df, existing_df):
+    """
+    Columnar "fill only empty fields" merge
+
+    Aligns the CSV payloads with the existing rows on account_number and returns
+    (insert_records, update_payloads) where update_payloads is a list of
+    (id, account_number, fields) holding only fields that are empty in the
+    existing row, have a value in the CSV and are not protected.
+    """
+    if existing_df.empty or "account_number" not in existing_df.columns:
+        return new_df.to_dict("records"), []
+
+    existing_df = existing_df.drop_duplicates(subset=["account_number"], keep="first")
+    existing_df = existing_df.set_index("account_number")
+    is_existing = new_df["account_number"].isin(existing_df.index)
+
+    inserts = new_df[~is_existing].to_dict("records")
+
+    to_update = new_df[is_existing].set_index("account_number")
+    fields = [col for col in to_update.columns if col not in PROTECTED_FIELDS]
+    # Columns the table doesn't return count as empty, as with existing_prop.get()
+    current = existing_df.reindex(index=to_update.index, columns=fields)
+
+    candidate = to_update[fields].to_numpy(dtype=object)
+    current_values = current.to_numpy(dtype=object)
+    has_value = ~pd.isna(candidate)
+    same = has_value & (candidate == current_values)
+    mask = empty_mask(current) & has_value & ~same
+
+    ids = existing_df.loc[to_update.index, "id"].tolist()
+    accounts = to_update.index.tolist()
+
+    # Flatten the mask once (row-major), then cut it into one payload per row
+    rows, columns = np.nonzero(mask)
+    names = np.array(fields, dtype=object)[columns].tolist()
+    values = candidate[rows, columns].tolist()
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]]) if len(rows) else np.array([], dtype=int)
+    ends = np.r_[starts[1:], len(rows)]
+
+    updates = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        row = rows[start]
+        updates.append((ids[row], accounts[row], dict(zip(names[start:end], values[start:end]))))
+    return inserts, updates
+
+def plan_batch(supabase, properties):
+    """Prefetch existing rows for one batch of payloads and plan the merge; returns (inserts, updates)"""
+    # Prefetch existing rows once instead of one SELECT per property
+    existing_df = fetch_existing_properties(supabase, properties["account_number"].tolist())
+    with span("merge.fill_empty", "merge") as s:
+        inserts, updates = plan_fill_empty(properties, existing_df)
+        s.add(rows=len(properties))
+    return inserts, updates
+
+def write_changes(supabase, inserts, updates):
+    """Send planned inserts and fill-empty updates; returns counts"""
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "errors": 0}
+
+    # New properties - bulk INSERT
+    for i in range(0, len(inserts), INSERT_BATCH_SIZE):
+        batch = inserts[i:i + INSERT_BATCH_SIZE]
+        try:
+            supabase.table("properties").insert(batch).execute()
+            counts["inserted"] += len(batch)
+            print(f"✅ Inserted: {len(batch)} new properties")
+        except Exception as e:
+            print(f"❌ Error inserting {len(batch)} properties: {e}")
+            counts["errors"] += len(batch)
+
+    # Existing properties - UPDATE only empty fields. Rows needing the same
+    # payload share one PATCH; the rest get one PATCH each.
+    groups = {}
+    for property_id, account_number, payload in updates:
+        key = tuple(sorted(payload.items()))
+        groups.setdefault(key, []).append((property_id, account_number))
+
+    for key, members in groups.items():
+        payload = dict(key)
+        ids = [property_id for property_id, _ in members]
+        try:
+            for i in range(0, len(ids), FETCH_BATCH_SIZE):
+                supabase.table("properties").update(payload).in_("id", ids[i:i + FETCH_BATCH_SIZE]).execute()
+            for _, account_number in members:
+                print(f"🔄 Updated: {account_number} ({len(payload)} fields)")
+            counts["updated"] += len(members)
+        except Exception as e:
+            print(f"❌ Error updating {len(members)} properties: {e}")
+            counts["errors"] += len(members)
+
+    return counts
+
+def sync_batch(supabase, properties):
+    """Prefetch, plan and write one batch of property payloads; returns counts"""
+    inserts, updates = plan_batch(supabase, properties)
+    counts = write_changes(supabase, inserts, updates)
+    counts["unchanged"] = len(properties) - len(inserts) - len(updates)
+    return counts
+
+def build_plan(supabase, properties, rejects):
+    """Dry run: plan every batch against the prefetched rows without writing anything"""
+    plan = WritePlan("properties", "account_number", file_fingerprint(CSV_PATH))
+    for account_number, reason in rejects:
+        plan.reject(account_number, reason)
+
+    for offset in range(0, len(properties), IMPORT_BATCH_SIZE):
+        batch = properties.iloc[offset:offset + IMPORT_BATCH_SIZE]
+        inserts, updates = plan_batch(supabase, batch)
+        plan.prefetch_requests += math.ceil(len(batch) / FETCH_BATCH_SIZE)
+
+        changed = set()
+        for record in inserts:
+            plan.insert(record)
+            changed.add(record["account_number"])
+        for property_id, account_number, fields in updates:
+            plan.update(account_number, fields, row_id=property_id)
+            changed.add(account_number)
+        for account_number in batch["account_number"]:
+            if account_number not in changed:
+                plan.noop(account_number)
+        print(f"📋 Planned {offset + len(batch)}/{len(properties)}")
+
+    return plan
+
+def apply_plan(supabase, plan_file):
+    """Replay a saved plan without reading the table again"""
+    try:
+        plan = WritePlan.load(plan_file, "properties", file_fingerprint(CSV_PATH))
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot apply plan: {e}")
+        sys.exit(2)
+
+    print(f"📋 Applying plan from {plan.created_at}: {len(plan.inserts)} inserts, {len(plan.updates)} updates")
+    updates = [(entry["id"], entry["account_number"], entry["fields"]) for entry in plan.updates]
+    with span("import.apply_plan", "commit") as s:
+        counts = write_changes(supabase, plan.inserts, updates)
+        s.add(rows=len(plan.inserts) + len(updates))
+
+    print(f"\n{'='*60}")
+    print(f"📥 Inserted (new): {counts['inserted']}")
+    print(f"🔄 Updated (existing): {counts['updated']}")
+    if counts["errors"]:
+        print(f"❌ Errors: {counts['errors']} - plan kept at {plan_file}; plan again before retrying")
+    else:
+        os.remove(plan_file)
+        print(f"✅ Plan applied and removed")
+    print(f"{'='*60}")
 
 def import_properties():
     """Import CSV data with UPSERT logic"""
@@ -49,108 +293,91 @@ def import_properties():
         print(f"❌ Error: CSV not found: {CSV_PATH}")
         return
 
-    df = pd.read_csv(CSV_PATH)
+    # Create Supabase client
+    supabase = get_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+
+    plan_file = plan_path(CSV_PATH, "properties")
+    if '--apply-plan' in sys.argv:
+        apply_plan(supabase, plan_file)
+        return
+
+    df = read_pipeline_csv(CSV_PATH, columns=CSV_COLUMNS)
     print(f"📊 Loaded {len(df)} properties from CSV")
 
-    # Create Supabase client
-    supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
+    missing = df["Account_Number"].isna()
+    skipped = int(missing.sum())
+    rejects = [(None, f"missing Account_Number (CSV row {i + 2})") for i in np.flatnonzero(missing.to_numpy())]
+    df = df[~missing]
+    # Hyphen/underscore spellings of one account count as duplicates
+    deduped = dedup_accounts(df, "Account_Number")
+    duplicates = len(df) - len(deduped)
+    if duplicates:
+        print(f"⚠️  Ignoring {duplicates} duplicate account numbers in CSV (first row wins)")
+        dropped = df.loc[df.index.difference(deduped.index), "Account_Number"]
+        rejects += [(str(account), "duplicate account number (first row wins)") for account in dropped]
+    df = deduped
+
+    with span("build.properties", "merge") as s:
+        properties = build_property_frame(df)
+        s.add(rows=len(properties))
+
+    if '--plan' in sys.argv:
+        plan = build_plan(supabase, properties, rejects)
+        estimate = plan.estimate(INSERT_BATCH_SIZE, update_batch=FETCH_BATCH_SIZE)
+        plan.print_summary(estimate)
+        if '--save-plan' in sys.argv:
+            plan.save(plan_file, estimate)
+            print(f"💾 Plan saved to {plan_file}")
+            print("Run with --apply-plan to execute it")
+        return
+
+    checkpoint = Checkpoint(
+        checkpoint_path(CSV_PATH, "properties"),
+        file_fingerprint(CSV_PATH),
+        resume='--resume' in sys.argv,
+    )
+    start = checkpoint.offset("properties")
+    print(f"📍 Checkpoint: {checkpoint.describe()}")
 
     success = 0
     updated = 0
     inserted = 0
-    skipped = 0
     errors = 0
+    committed = True
+
+    try:
+        for offset in range(start, len(properties), IMPORT_BATCH_SIZE):
+            batch = properties.iloc[offset:offset + IMPORT_BATCH_SIZE]
+            with span("import.batch", "commit") as s:
+                counts = sync_batch(supabase, batch)
+                s.add(rows=len(batch))
+            inserted += counts["inserted"]
+            updated += counts["updated"]
+            skipped += counts["unchanged"]
+            success += counts["inserted"] + counts["updated"] + counts["unchanged"]
+            errors += counts["errors"]
+
+            # The checkpoint stops at the first batch with errors so --resume retries it
+            if counts["errors"]:
+                committed = False
+            if committed:
+                checkpoint.commit("properties", offset + len(batch))
+
+            print(f"\n--- Progress: {offset + len(batch)}/{len(properties)} ---\n")
+    except KeyboardInterrupt:
+        print(f"\n⚠️  Interrupted - run again with --resume to continue from row {checkpoint.offset('properties')}")
+        return
+    except Exception:
+        print(f"\n❌ Import failed - run again with --resume to continue from row {checkpoint.offset('properties')}")
+        raise
 
-    for idx, row in df.iterrows():
-        account_number = row.get("Account_Number")
-
-        if pd.isna(account_number):
-            skipped += 1
-            continue
-
-        try:
-            # Check if property already exists
-            existing = supabase.table("properties").select("*").eq("account_number", account_number).execute()
-
-            # Prepare data
-            property_data = {
-                "account_number": clean_value(account_number),
-                "property_address": clean_value(row.get("Property_Address")),
-                "owner_name": clean_value(row.get("Owner_Name")),
-                "mailing_address": clean_value(row.get("Mailing_Address")),
-                "property_use": clean_value(row.get("DOR_UC")),
-
-                # Financial
-                "total_market_value": clean_value(row.get("Total_Market_Value")),
-                "total_assessed_value": clean_value(row.get("Total_Assessed_Value")),
-                "exemptions": clean_value(row.get("Exemptions")),
-                "taxable_value": clean_value(row.get("Taxable_Value")),
-
-                # Tax Analysis
-                "years_delinquent": int(clean_value(row.get("Years_Delinquent")) or 0),
-                "total_amount_due": clean_value(row.get("Total_Amount_Due")),
-                "face_amount": clean_value(row.get("Face_Amount")),
-                "certificate_count": int(clean_value(row.get("Certificate_Count")) or 0),
-
-                # Scores
-                "tax_score": clean_value(row.get("Tax_Score")),
-                "visual_score": clean_value(row.get("Visual_Score")),
-                "final_combined_score": clean_value(row.get("Final_Combined_Score")),
-                "tier": clean_value(row.get("Tier")),
-
-                # Image
-                "photo_url": get_image_url(account_number),
-
-                # Default status for new properties
-                "lead_status": "new",
-                "approval_status": "pending",
-            }
-
-            if existing.data and len(existing.data) > 0:
-                # Property exists - UPDATE only empty fields
-                existing_prop = existing.data[0]
-
-                # NEVER overwrite these approval/user tracking fields
-                protected_fields = [
-                    "approval_status", "approved_by", "approved_by_name",
-                    "approved_at", "rejection_reason", "rejection_notes",
-                    "created_by", "created_by_name", "updated_by", "updated_by_name"
-                ]
-
-                # Only update fields that are empty/null in existing record
-                update_data = {}
-                for key, value in property_data.items():
-                    if key not in protected_fields:
-                        existing_value = existing_prop.get(key)
-                        if existing_value is None or existing_value == "" or existing_value == 0:
-                            update_data[key] = value
-
-                if update_data:
-                    supabase.table("properties").update(update_data).eq("id", existing_prop["id"]).execute()
-                    print(f"🔄 Updated: {account_number} ({len(update_data)} fields)")
-                    updated += 1
-                else:
-                    print(f"⏭️  Skipped (complete): {account_number}")
-                    skipped += 1
-
-                success += 1
-            else:
-                # New property - INSERT
-                supabase.table("properties").insert(property_data).execute()
-                print(f"✅ Inserted: {account_number}")
-                inserted += 1
-                success += 1
-
-        except Exception as e:
-            print(f"❌ Error with {account_number}: {e}")
-            errors += 1
-
-        # Progress update every 100 rows
-        if (idx + 1) % 100 == 0:
-            print(f"\n--- Progress: {idx + 1}/{len(df)} ---\n")
+    if committed:
+        checkpoint.clear()
+    else:
+        print(f"⚠️  Some batches failed - run again with --resume to retry from row {checkpoint.offset('properties')}")
 
     print(f"\n{'='*60}")
-    print(f"✅ Total processed: {success}/{len(df)}")
+    print(f"✅ Total processed: {success}/{len(properties) - start}")
     print(f"📥 Inserted (new): {inserted}")
     print(f"🔄 Updated (existing): {updated}")
     print(f"⏭️  Skipped (complete): {skipped}")
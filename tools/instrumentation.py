@@ -0,0 +1,282 @@
+"""
+Lightweight spans and counters for the pipeline tools
+
+Hot paths (CSV loads, merges, HTTP calls, batch commits, file I/O) are wrapped
+in spans. Each span has a name and a category: parse, merge, network, commit
+or disk. When instrumentation is off, span() returns a shared no-op object, so
+the wrappers cost next to nothing.
+
+    from instrumentation import span, count
+
+    with span("csv.read", "parse", path=str(path)) as s:
+        df = pd.read_csv(path)
+        s.add(rows=len(df), bytes=os.path.getsize(path))
+    count("rows.skipped", 3)
+
+Enable it per run with environment variables:
+
+    PIPELINE_METRICS=1               per-stage timing/throughput summary at exit (stderr)
+    PIPELINE_METRICS_JSON=run.json   the same summary as JSON
+    PIPELINE_TRACE=trace.json        Chrome trace (open in chrome://tracing or Perfetto)
+    PIPELINE_CPROFILE=run.prof       cProfile capture (inspect with python -m pstats)
+    PIPELINE_TRACEMALLOC=1           peak traced memory + top allocation sites in the summary
+
+The category totals show whether a slow run was parse-bound, network-bound or
+disk-bound. Only the process that reads the variables reports: multiprocessing
+workers inherit the environment, but stay off instead of printing their own
+summaries and overwriting the JSON, trace and profile files.
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+CATEGORIES = ["parse", "merge", "network", "commit", "disk"]
+TRACEMALLOC_TOP = 10
+
+_lock = threading.Lock()
+_state = {
+    "enabled": False,
+    "summary": False,
+    "summary_json": None,
+    "trace": None,
+    "cprofile": None,
+    "profiler": None,
+    "tracemalloc": False,
+    "pid": None,
+    "started": time.perf_counter(),
+}
+_stages = defaultdict(lambda: {"category": None, "calls": 0, "seconds": 0.0, "rows": 0, "bytes": 0, "errors": 0})
+_counters = defaultdict(int)
+_events = []
+
+
+class _NullSpan:
+    """Returned by span() while instrumentation is off"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, rows=0, bytes=0):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed stage; add() attaches rows/bytes for throughput"""
+
+    __slots__ = ("name", "category", "attrs", "rows", "bytes", "start")
+
+    def __init__(self, name, category, attrs):
+        self.name = name
+        self.category = category
+        self.attrs = attrs
+        self.rows = 0
+        self.bytes = 0
+
+    def add(self, rows=0, bytes=0):
+        self.rows += rows
+        self.bytes += bytes
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        seconds = end - self.start
+        with _lock:
+            stage = _stages[self.name]
+            stage["category"] = self.category
+            stage["calls"] += 1
+            stage["seconds"] += seconds
+            stage["rows"] += self.rows
+            stage["bytes"] += self.bytes
+            if exc_type is not None:
+                stage["errors"] += 1
+        if _state["trace"]:
+            args = dict(self.attrs)
+            if self.rows:
+                args["rows"] = self.rows
+            if self.bytes:
+                args["bytes"] = self.bytes
+            _events.append({
+                "name": self.name, "cat": self.category, "ph": "X",
+                "ts": (self.start - _state["started"]) * 1e6, "dur": seconds * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(), "args": args,
+            })
+        return False
+
+
+def enabled():
+    return _state["enabled"]
+
+
+def span(name, category, **attrs):
+    """Context manager timing one stage (no-op while instrumentation is off)"""
+    if not _state["enabled"]:
+        return _NULL_SPAN
+    return Span(name, category, attrs)
+
+
+def count(name, n=1):
+    """Increment a named counter"""
+    if _state["enabled"]:
+        with _lock:
+            _counters[name] += n
+
+
+def summary():
+    """Per-stage and per-category totals as a dict"""
+    wall = time.perf_counter() - _state["started"]
+    with _lock:
+        stages = {name: dict(stage) for name, stage in _stages.items()}
+        counters = dict(_counters)
+
+    categories = {}
+    for stage in stages.values():
+        totals = categories.setdefault(stage["category"], {"seconds": 0.0, "calls": 0, "bytes": 0})
+        totals["seconds"] += stage["seconds"]
+        totals["calls"] += stage["calls"]
+        totals["bytes"] += stage["bytes"]
+
+    result = {"wall_seconds": wall, "stages": stages, "categories": categories, "counters": counters}
+
+    if _state["tracemalloc"]:
+        import tracemalloc
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot()
+            result["memory"] = {
+                "current_mb": current / 1e6,
+                "peak_mb": peak / 1e6,
+                "top": [
+                    {"site": str(stat.traceback[0]), "mb": stat.size / 1e6, "blocks": stat.count}
+                    for stat in snapshot.statistics("lineno")[:TRACEMALLOC_TOP]
+                ],
+            }
+    return result
+
+
+def print_summary(data=None, file=None):
+    """Per-stage timing/throughput table"""
+    data = data or summary()
+    file = file or sys.stderr
+    wall = data["wall_seconds"] or 1e-9
+
+    print("\n" + "=" * 88, file=file)
+    print(f"STAGE TIMINGS (wall {data['wall_seconds']:.2f}s)", file=file)
+    print("=" * 88, file=file)
+    print(f"{'Stage':<30} {'Cat':<8} {'Calls':>7} {'Total s':>9} {'Mean ms':>9} {'%Wall':>6} {'Rows/s':>10} {'MB/s':>7}", file=file)
+    print("-" * 88, file=file)
+    for name, stage in sorted(data["stages"].items(), key=lambda item: -item[1]["seconds"]):
+        seconds = stage["seconds"]
+        mean_ms = seconds / stage["calls"] * 1000 if stage["calls"] else 0
+        rate = f"{stage['rows'] / seconds:,.0f}" if stage["rows"] and seconds else "-"
+        mbps = f"{stage['bytes'] / 1e6 / seconds:.1f}" if stage["bytes"] and seconds else "-"
+        errors = f"  ({stage['errors']} failed)" if stage["errors"] else ""
+        print(f"{name[:30]:<30} {stage['category'] or '-':<8} {stage['calls']:>7,} {seconds:>9.2f} "
+              f"{mean_ms:>9.1f} {seconds / wall * 100:>5.0f}% {rate:>10} {mbps:>7}{errors}", file=file)
+
+    # Spans can nest or overlap (threads), so category time may exceed wall time
+    print("-" * 88, file=file)
+    ordered = [c for c in CATEGORIES if c in data["categories"]] + \
+              [c for c in data["categories"] if c not in CATEGORIES]
+    for category in ordered:
+        totals = data["categories"][category]
+        print(f"{'[' + str(category) + ']':<30} {'':<8} {totals['calls']:>7,} {totals['seconds']:>9.2f} "
+              f"{'':>9} {totals['seconds'] / wall * 100:>5.0f}%", file=file)
+
+    if data["counters"]:
+        print("-" * 88, file=file)
+        for name, value in sorted(data["counters"].items()):
+            print(f"{name:<30} {value:>17,}", file=file)
+
+    memory = data.get("memory")
+    if memory:
+        print("-" * 88, file=file)
+        print(f"Traced memory: peak {memory['peak_mb']:.1f} MB, current {memory['current_mb']:.1f} MB", file=file)
+        for site in memory["top"]:
+            print(f"  {site['mb']:>8.2f} MB  {site['site']}", file=file)
+    print("=" * 88, file=file)
+
+
+def write_trace(path):
+    """Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev)"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": list(_events), "displayTimeUnit": "ms"}, f)
+
+
+def configure(summary=False, summary_json=None, trace=None, cprofile=None, tracemalloc=False):
+    """Turn instrumentation on for this process; outputs are written at exit"""
+    _state.update({
+        "enabled": bool(summary or summary_json or trace or cprofile or tracemalloc),
+        "summary": summary,
+        "summary_json": summary_json,
+        "trace": trace,
+        "cprofile": cprofile,
+        "tracemalloc": tracemalloc,
+        "pid": os.getpid(),
+    })
+    if not _state["enabled"]:
+        return
+
+    if tracemalloc:
+        import tracemalloc as _tracemalloc
+        _tracemalloc.start()
+    if cprofile and _state["profiler"] is None:
+        import cProfile
+        _state["profiler"] = cProfile.Profile()
+        _state["profiler"].enable()
+    atexit.register(finish)
+
+
+def finish():
+    """Write the configured outputs (runs once, at exit, in the configuring process)"""
+    if not _state["enabled"] or _state["pid"] != os.getpid():
+        return
+    _state["enabled"] = False
+
+    profiler = _state["profiler"]
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(_state["cprofile"])
+        print(f"cProfile written to {_state['cprofile']}", file=sys.stderr)
+
+    data = summary()
+    if _state["summary"]:
+        print_summary(data)
+    if _state["summary_json"]:
+        with open(_state["summary_json"], "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+    if _state["trace"]:
+        write_trace(_state["trace"])
+        print(f"Trace written to {_state['trace']} ({len(_events):,} spans)", file=sys.stderr)
+
+
+def configure_from_env():
+    # A spawned worker re-imports this module before parent_process() is set,
+    # but after it has been given its worker name
+    if multiprocessing.parent_process() is not None or multiprocessing.current_process().name != "MainProcess":
+        return
+    flag = os.getenv("PIPELINE_METRICS", "").lower()
+    configure(
+        summary=flag in ("1", "true", "yes"),
+        summary_json=os.getenv("PIPELINE_METRICS_JSON") or None,
+        trace=os.getenv("PIPELINE_TRACE") or None,
+        cprofile=os.getenv("PIPELINE_CPROFILE") or None,
+        tracemalloc=os.getenv("PIPELINE_TRACEMALLOC", "").lower() in ("1", "true", "yes"),
+    )
+
+
+configure_from_env()
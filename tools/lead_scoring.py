@@ -0,0 +1,552 @@
+"""
+Batch lead scoring (same rules as update_lead_score)
+
+database/lead_scoring_migration.sql scores one property per call of
+update_lead_score(p_property_id), so rescoring every lead meant one RPC per
+property. This tool reads the activities once, from the API or a backup
+snapshot, and scores every property with pandas group-bys. The lead_scores
+rows are written with bulk upserts.
+
+The rules are the SQL function's, unchanged:
+
+- window      only activities with created_at > now - 30 days count
+- counts      click, email_open, sms_response + call_response, page_view
+- recency     days since the newest activity of any type in the window,
+              rounded to whole days like the INTEGER variable (999 when none)
+- score       min(100, 20*clicks + 10*opens + 30*responses + 5*views + bonus);
+              the bonus is 20 (< 1 day), 15 (< 3), 10 (< 7) or 0
+- level       >= 80 very_hot, >= 60 hot, >= 40 warm, else cold
+
+Properties that already have a lead_scores row but no recent activity are
+rescored too (down to 0/cold), as calling the function for them would.
+last_activity is set to the run time, like the function's NOW().
+
+campaign_clicks is not read by the function. With --campaign-clicks, each
+clicked_at inside the window counts as one more click.
+
+Incremental runs
+----------------
+Against the API the job keeps a state file (--state, default
+lead_scores.state.json) so it can run every few minutes:
+
+- running per-property aggregates (the four counts and the newest activity)
+  plus the counted activities still inside the window, so they can be
+  subtracted again when they age out
+- a watermark per source table: each run only reads rows created since the
+  last one (minus a few minutes of overlap for rows committed late; ids
+  already folded in are skipped)
+- the score last written for each property
+
+Only properties whose aggregates changed, or whose recency bonus can have
+moved since (last activity within a week), are rescored. Only scores that
+differ from what was last written are upserted. The first run, or --full,
+rebuilds the state from the whole window.
+
+Usage:
+    python lead_scoring.py                          # incremental rescore from the API, upsert lead_scores
+    python lead_scoring.py --full                   # rebuild the state from the whole window, write every score
+    python lead_scoring.py --dry-run                # score and print the summary, write nothing
+    python lead_scoring.py --snapshot backup_data_20251219_120000.json --dry-run   # score a backup (no state)
+    python lead_scoring.py --output scores.csv      # also save the scores as CSV
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from instrumentation import span
+
+load_dotenv()
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+
+WINDOW_DAYS = 30
+NO_ACTIVITY_DAYS = 999
+MAX_SCORE = 100
+UPSERT_BATCH_SIZE = 500
+
+STATE_PATH = "lead_scores.state.json"
+STATE_VERSION = 1
+# Re-read this much before the watermark: rows can commit after newer ones
+OVERLAP = timedelta(minutes=5)
+
+# lead_scores count column -> activity types it counts, and points per activity
+COUNTS = {
+    "click_count": (("click",), 20),
+    "email_opens": (("email_open",), 10),
+    "sms_responses": (("sms_response", "call_response"), 30),
+    "page_views": (("page_view",), 5),
+}
+COUNTED_TYPES = [t for types, _ in COUNTS.values() for t in types]
+
+# (days since last activity below, bonus)
+RECENCY_BONUS = ((1, 20), (3, 15), (7, 10))
+
+# (minimum score, engagement level), highest first
+LEVELS = ((80, "very_hot"), (60, "hot"), (40, "warm"))
+
+ACTIVITY_COLUMNS = ["id", "property_id", "activity_type", "created_at"]
+
+# source table -> its timestamp column (the watermark) and the columns read
+SOURCES = {
+    "lead_activities": ("created_at", "id,property_id,activity_type,created_at"),
+    "campaign_clicks": ("clicked_at", "id,property_id,clicked_at"),
+}
+
+EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def window_start(now):
+    return now - timedelta(days=WINDOW_DAYS)
+
+
+def activity_frame(activities, clicks=None):
+    """
+    lead_activities rows (and optionally campaign_clicks rows) as one frame
+
+    Columns: id, property_id, activity_type, created_at (UTC). campaign_clicks
+    rows become "click" activities at clicked_at (ids prefixed with the
+    table name); rows without a property or a timestamp are dropped.
+    """
+    frame = pd.DataFrame(list(activities), columns=ACTIVITY_COLUMNS)
+    if clicks is not None:
+        extra = pd.DataFrame(list(clicks), columns=["id", "property_id", "clicked_at"])
+        extra = extra.rename(columns={"clicked_at": "created_at"}).assign(activity_type="click")
+        extra["id"] = "campaign_clicks:" + extra["id"].astype("string")
+        frame = pd.concat([frame, extra[ACTIVITY_COLUMNS]], ignore_index=True)
+
+    frame["created_at"] = pd.to_datetime(frame["created_at"], utc=True, errors="coerce", format="ISO8601")
+    frame["property_id"] = frame["property_id"].astype("string")
+    return frame.dropna(subset=["property_id", "created_at"])
+
+
+def tally(frame):
+    """
+    Per-property counts and newest activity of every row in `frame`
+
+    Returns a frame indexed by property_id with the COUNTS columns and
+    last_activity_at (newest created_at of any type).
+    """
+    grouped = frame.groupby("property_id", sort=False)
+    result = pd.DataFrame({"last_activity_at": grouped["created_at"].max()})
+    for column, (types, _) in COUNTS.items():
+        result[column] = frame["activity_type"].isin(types).groupby(frame["property_id"], sort=False).sum()
+    result[list(COUNTS)] = result[list(COUNTS)].astype("int64")
+    result.index = result.index.astype("string")
+    return result
+
+
+def aggregate(frame, now):
+    """tally() of the activities inside the window"""
+    return tally(frame[frame["created_at"] > window_start(now)])
+
+
+def score_aggregates(aggregates, now, property_ids=()):
+    """
+    Score and engagement level for every aggregated property
+
+    `property_ids` adds properties with no activity in the window (scored
+    as the function scores them: all counts 0, recency 999).
+    """
+    extra = pd.Index(property_ids, dtype="string").difference(aggregates.index)
+    if len(extra):
+        aggregates = pd.concat([aggregates, pd.DataFrame(index=extra)])
+    scores = aggregates.copy()
+    scores[list(COUNTS)] = scores[list(COUNTS)].fillna(0).astype("int64")
+    scores["last_activity_at"] = pd.to_datetime(scores["last_activity_at"], utc=True)
+
+    # EXTRACT(EPOCH ...) / 86400 assigned to an INTEGER rounds half away from zero
+    elapsed = (pd.Timestamp(now) - scores["last_activity_at"]).dt.total_seconds().to_numpy(dtype=float) / 86400
+    days = np.trunc(elapsed + np.copysign(0.5, elapsed))
+    days = np.where(np.isnan(days), NO_ACTIVITY_DAYS, days)
+
+    bonus = np.select([days < limit for limit, _ in RECENCY_BONUS], [points for _, points in RECENCY_BONUS], 0)
+    points = sum(scores[column].to_numpy() * weight for column, (_, weight) in COUNTS.items())
+    score = np.minimum(MAX_SCORE, points + bonus)
+
+    scores["days_since_last_activity"] = days.astype("int64")
+    scores["score"] = score.astype("int64")
+    scores["engagement_level"] = np.select(
+        [score >= minimum for minimum, _ in LEVELS], [level for _, level in LEVELS], "cold"
+    )
+    scores.index.name = "property_id"
+    return scores
+
+
+def score_activities(frame, now, property_ids=()):
+    """activity_frame -> scores (see score_aggregates)"""
+    with span("scoring.aggregate", "merge") as s:
+        scores = score_aggregates(aggregate(frame, now), now, property_ids)
+        s.add(rows=len(frame))
+    return scores
+
+
+def score_records(scores, now):
+    """lead_scores rows for an upsert on property_id, as update_lead_score writes them"""
+    stamp = now.isoformat()
+    frame = scores.reset_index()[["property_id", "score", "engagement_level"] + list(COUNTS)]
+    records = frame.to_dict("records")
+    for record in records:
+        for column in ["score"] + list(COUNTS):
+            record[column] = int(record[column])
+        record["last_activity"] = stamp
+        record["updated_at"] = stamp
+    return records
+
+
+def score_key(record):
+    """The written values that matter for change detection (not the timestamps)"""
+    return [record["score"], record["engagement_level"]] + [record[column] for column in COUNTS]
+
+
+def level_counts(scores):
+    counts = scores["engagement_level"].value_counts()
+    return {level: int(counts.get(level, 0)) for level in ("very_hot", "hot", "warm", "cold")}
+
+
+# Incremental state -------------------------------------------------------------
+
+def to_micros(timestamps):
+    return ((timestamps - EPOCH) // pd.Timedelta(microseconds=1)).astype("int64")
+
+
+def from_micros(values):
+    return pd.to_datetime(pd.Series(values, dtype="int64"), unit="us", utc=True)
+
+
+class ScoreState:
+    """Running per-property aggregates, source watermarks and last written scores"""
+
+    def __init__(self, path, with_clicks=False, load=True):
+        self.path = Path(path)
+        self.with_clicks = with_clicks
+        self.scored_at = None   # previous run (ISO)
+        self.watermarks = {}    # table -> newest timestamp read (ISO)
+        self.seen = {}          # table -> {id: timestamp} of rows inside the overlap
+        self.events = pd.DataFrame({
+            "property_id": pd.Series(dtype="string"),
+            "activity_type": pd.Series(dtype="string"),
+            "created_at": pd.Series(dtype="datetime64[us, UTC]"),
+        })
+        self.aggregates = tally(self.events)
+        self.written = {}       # property_id -> score_key of the last successful write
+        self.pending = set()    # property_ids whose last upsert failed (rescored until written)
+
+        if not load or not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if (data.get("version") != STATE_VERSION or data.get("window_days") != WINDOW_DAYS
+                or data.get("with_clicks") != with_clicks):
+            print(f"   State {self.path.name} was made with other settings - rebuilding")
+            return
+
+        self.scored_at = data["scored_at"]
+        self.watermarks = data["watermarks"]
+        self.seen = data["seen"]
+        self.written = data["written"]
+        self.pending = set(data.get("pending", []))
+        events = data["events"]
+        self.events = pd.DataFrame({
+            "property_id": pd.Series(events["property_id"], dtype="string"),
+            "activity_type": pd.Series(events["activity_type"], dtype="string"),
+            "created_at": from_micros(events["created_at"]),
+        })
+        aggregates = data["aggregates"]
+        self.aggregates = pd.DataFrame(
+            {"last_activity_at": from_micros(aggregates["last_activity_at"]).array,
+             **{column: np.asarray(aggregates[column], dtype="int64") for column in COUNTS}},
+            index=pd.Index(aggregates["property_id"], dtype="string", name="property_id"),
+        )
+
+    @property
+    def ready(self):
+        """True once a full rebuild has set the watermarks"""
+        return bool(self.watermarks)
+
+    def since(self, table, now):
+        """Timestamp to read `table` from: the watermark minus the overlap, or the window start"""
+        watermark = self.watermarks.get(table)
+        if watermark is None:
+            return window_start(now)
+        return max(datetime.fromisoformat(watermark) - OVERLAP, window_start(now))
+
+    def unseen(self, table, rows, now):
+        """
+        Rows of `table` not folded in before; advances its watermark
+
+        Remembers the ids of rows inside the overlap so the next run,
+        which reads the overlap again, skips them. A row that offset paging
+        returned twice (an insert shifted it onto the next page) counts once.
+        """
+        column = SOURCES[table][0]
+        seen = self.seen.get(table, {})
+        unique = {}
+        for row in rows:
+            unique.setdefault(str(row.get("id")), row)
+        rows = list(unique.values())
+        fresh = [row for row in rows if str(row.get("id")) not in seen]
+
+        stamps = {str(row.get("id")): row.get(column) for row in rows if row.get(column)}
+        stamps.update(seen)
+        if stamps:
+            parsed = pd.to_datetime(pd.Series(stamps), utc=True, errors="coerce", format="ISO8601").dropna()
+            if len(parsed):
+                newest = parsed.max()
+                old = self.watermarks.get(table)
+                if old is None or newest > pd.Timestamp(old):
+                    self.watermarks[table] = newest.isoformat()
+                keep = parsed[parsed >= pd.Timestamp(self.watermarks[table]) - OVERLAP]
+                self.seen[table] = {key: stamps[key] for key in keep.index}
+        self.watermarks.setdefault(table, window_start(now).isoformat())
+        return fresh
+
+    def fold(self, frame, now):
+        """
+        Add new activities, drop the ones that left the window
+
+        Returns the property ids whose aggregates changed.
+        """
+        cutoff = window_start(now)
+        with span("scoring.fold", "merge") as s:
+            expired_mask = self.events["created_at"] <= cutoff
+            expired = self.events[expired_mask]
+            fresh = frame[frame["created_at"] > cutoff]
+
+            removed, added = tally(expired), tally(fresh)
+            index = self.aggregates.index.union(added.index)
+            aggregates = self.aggregates.reindex(index)
+            counts = list(COUNTS)
+            aggregates[counts] = (aggregates[counts].fillna(0)
+                                  - removed[counts].reindex(index, fill_value=0)
+                                  + added[counts].reindex(index, fill_value=0)).astype("int64")
+            last = pd.concat([aggregates["last_activity_at"], added["last_activity_at"]], axis=1).max(axis=1)
+            aggregates["last_activity_at"] = pd.to_datetime(last, utc=True)
+
+            # Nothing left inside the window: the property scores 0 from now on
+            inactive = (aggregates[counts].sum(axis=1) == 0) & (aggregates["last_activity_at"] <= cutoff)
+            self.aggregates = aggregates[~inactive]
+
+            kept = fresh[fresh["activity_type"].isin(COUNTED_TYPES)][["property_id", "activity_type", "created_at"]]
+            self.events = pd.concat([self.events[~expired_mask], kept], ignore_index=True)
+            s.add(rows=len(fresh) + len(expired))
+
+        return set(removed.index) | set(added.index)
+
+    def candidates(self, touched, now):
+        """
+        Properties to rescore: changed aggregates, those whose recency
+        bonus can have moved since the previous run, and those whose last
+        write failed
+        """
+        previous = pd.Timestamp(self.scored_at) if self.scored_at else pd.Timestamp(now)
+        horizon = min(previous, pd.Timestamp(now)) - timedelta(days=RECENCY_BONUS[-1][0] + 1)
+        recent = self.aggregates.index[self.aggregates["last_activity_at"] > horizon]
+        return set(touched) | set(recent) | self.pending
+
+    def changes(self, scores, now):
+        """lead_scores records whose values differ from the last write"""
+        return [record for record in score_records(scores, now)
+                if self.written.get(record["property_id"]) != score_key(record)]
+
+    def mark_written(self, records):
+        for record in records:
+            self.written[record["property_id"]] = score_key(record)
+            self.pending.discard(record["property_id"])
+
+    def mark_failed(self, records):
+        """Keep rescoring these properties on later runs until their upsert succeeds"""
+        self.pending.update(record["property_id"] for record in records)
+
+    def save(self):
+        """Write the state file atomically"""
+        aggregates = self.aggregates
+        data = {
+            "version": STATE_VERSION,
+            "window_days": WINDOW_DAYS,
+            "with_clicks": self.with_clicks,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "scored_at": self.scored_at,
+            "watermarks": self.watermarks,
+            "seen": self.seen,
+            "aggregates": {
+                "property_id": aggregates.index.tolist(),
+                "last_activity_at": to_micros(aggregates["last_activity_at"]).tolist(),
+                **{column: aggregates[column].tolist() for column in COUNTS},
+            },
+            "events": {
+                "property_id": self.events["property_id"].tolist(),
+                "activity_type": self.events["activity_type"].tolist(),
+                "created_at": to_micros(self.events["created_at"]).tolist(),
+            },
+            "written": self.written,
+            "pending": sorted(self.pending),
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with span("scoring.save_state", "disk") as s:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+            s.add(rows=len(self.events))
+
+
+# Sources -----------------------------------------------------------------------
+
+def load_snapshot(path):
+    """{table: rows} from a backup_data_*.json file (or a plain {table: rows} dict)"""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return data.get("data", data)
+
+
+def fetch_source(table, since):
+    """Rows of a SOURCES table with their timestamp after `since`"""
+    from supabase_async import fetch_all
+
+    column, select = SOURCES[table]
+    return fetch_all(SUPABASE_URL, SUPABASE_SERVICE_KEY, table, select=select,
+                     params={column: f"gte.{since.isoformat()}"})
+
+
+def fetch_scored_ids():
+    """property_id of every existing lead_scores row"""
+    from supabase_async import fetch_all
+
+    rows = fetch_all(SUPABASE_URL, SUPABASE_SERVICE_KEY, "lead_scores", select="id,property_id")
+    return [row["property_id"] for row in rows]
+
+
+def write_scores(records):
+    """Bulk upsert into lead_scores; returns (records written, failed batches)"""
+    from supabase_async import bulk_upsert
+
+    with span("scoring.upsert", "commit") as s:
+        results = bulk_upsert(SUPABASE_URL, SUPABASE_SERVICE_KEY, "lead_scores", records,
+                              on_conflict="property_id", batch_size=UPSERT_BATCH_SIZE)
+        s.add(rows=len(records))
+    written = []
+    failed = []
+    for result in results:
+        if result.error is None and result.status_code in (200, 201, 204):
+            written.extend(result.item)
+        else:
+            failed.append(result)
+    return written, failed
+
+
+def print_levels(scores):
+    for level, n in level_counts(scores).items():
+        print(f"   {level:<9} {n:>7}")
+
+
+def save_scores(scores, output):
+    scores.reset_index().drop(columns=["last_activity_at"]).to_csv(output, index=False)
+    print(f"📝 Scores saved: {output}")
+
+
+def report_failures(failed):
+    print(f"❌ {len(failed)} batches failed (retried on the next run):")
+    for result in failed[:5]:
+        print(f"   {result.status_code or result.error}: {(result.text or '')[:200]}")
+
+
+def run_snapshot(snapshot, with_clicks, dry_run, output):
+    """Score a backup snapshot in one pass and upsert every score (no state involved)"""
+    now = datetime.now(timezone.utc)
+    tables = load_snapshot(snapshot)
+    clicks = tables.get("campaign_clicks", []) if with_clicks else None
+    frame = activity_frame(tables.get("lead_activities", []), clicks)
+    scores = score_activities(frame, now, [row["property_id"] for row in tables.get("lead_scores", [])])
+
+    print(f"📦 Snapshot: {snapshot}")
+    print(f"📊 {len(frame)} activities"
+          f"{f' (incl. {len(clicks)} campaign clicks)' if clicks is not None else ''}, "
+          f"{len(scores)} properties scored")
+    print_levels(scores)
+    if output:
+        save_scores(scores, output)
+
+    if dry_run:
+        print("🔍 Dry run - lead_scores not written")
+        return
+    written, failed = write_scores(score_records(scores, now))
+    print(f"✅ {len(written)} lead_scores rows upserted")
+    if failed:
+        report_failures(failed)
+        sys.exit(1)
+
+
+def run_incremental(state, full, dry_run, output):
+    """Fold new activities into the state, rescore what changed and upsert the differences"""
+    now = datetime.now(timezone.utc)
+    rebuild = full or not state.ready
+    if rebuild:
+        state = ScoreState(state.path, state.with_clicks, load=False)
+
+    tables = ["lead_activities"] + (["campaign_clicks"] if state.with_clicks else [])
+    fresh = {}
+    for table in tables:
+        rows = fetch_source(table, state.since(table, now))
+        fresh[table] = state.unseen(table, rows, now)
+
+    frame = activity_frame(fresh["lead_activities"], fresh.get("campaign_clicks"))
+    touched = state.fold(frame, now)
+    extra = fetch_scored_ids() if rebuild else []
+    candidates = state.candidates(touched | set(extra), now)
+
+    with span("scoring.rescore", "merge") as s:
+        aggregates = state.aggregates[state.aggregates.index.isin(candidates)]
+        scores = score_aggregates(aggregates, now, sorted(candidates))
+        records = state.changes(scores, now)
+        s.add(rows=len(scores))
+
+    print(f"{'🔄 Full rebuild' if rebuild else '⏩ Incremental run'}: {len(frame)} new activities, "
+          f"{len(state.aggregates)} properties active in the window")
+    print(f"📊 {len(scores)} properties rescored, {len(records)} scores changed")
+    print_levels(scores)
+    if output:
+        save_scores(scores, output)
+
+    if dry_run:
+        print("🔍 Dry run - lead_scores and state not written")
+        return
+
+    written, failed = write_scores(records) if records else ([], [])
+    state.mark_written(written)
+    state.mark_failed(record for result in failed for record in result.item)
+    state.scored_at = now.isoformat()
+    state.save()
+    print(f"✅ {len(written)} lead_scores rows upserted")
+    print(f"💾 State: {state.path} (watermark {state.watermarks['lead_activities']})")
+    if failed:
+        report_failures(failed)
+        sys.exit(1)
+
+
+def main():
+    dry_run = "--dry-run" in sys.argv
+    full = "--full" in sys.argv
+    with_clicks = "--campaign-clicks" in sys.argv
+    snapshot = sys.argv[sys.argv.index("--snapshot") + 1] if "--snapshot" in sys.argv else None
+    output = sys.argv[sys.argv.index("--output") + 1] if "--output" in sys.argv else None
+    state_file = sys.argv[sys.argv.index("--state") + 1] if "--state" in sys.argv else STATE_PATH
+
+    if (not snapshot or not dry_run) and (not SUPABASE_URL or not SUPABASE_SERVICE_KEY):
+        print("❌ Error: SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in .env")
+        sys.exit(1)
+
+    if snapshot:
+        run_snapshot(snapshot, with_clicks, dry_run, output)
+        return
+    run_incremental(ScoreState(state_file, with_clicks), full, dry_run, output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Cluster parcels by owner: fuzzy owner names and mailing addresses
+
+Dedup by account_number keeps one row per parcel, but one owner with several
+parcels gets several letters, and so does a household whose name is spelled
+"SMITH JOHN A" on one parcel and "JOHN A SMYTH" on another. This stage links
+records into owner clusters so campaigns can target owners:
+
+- same owner    owner names equal (word order ignored, LLC/TR/ESTATE/ETAL...
+                dropped) at the same mailing ZIP, or similar (trigram Dice >=
+                --threshold) at the same ZIP and house/box number
+- same address  mailing addresses similar (>= --address-threshold) with the
+                same ZIP and house/box number
+
+Numbers in a name or address (unit, box, numbered street) must match exactly,
+and so must a name's initials and generation (JR/SR/II/III/IV). "RODRIGUEZ
+JOSE L" and "RODRIGUEZ JOSE M" are different people, and so are father and
+son. A fuzzy name match alone is not enough, since "GARCIA MARIA" and
+"GARCIA MARIO" score 0.88: it must also share the mailing house/box number.
+
+Records are never compared all-against-all. They are grouped into blocks,
+and only records that share a block are compared:
+
+- owners: ZIP + house/box number + one of the record's two rarest name
+  tokens (a typo in one word still leaves the other to meet on)
+- addresses: ZIP + house/box number
+
+Blocks bigger than --max-block are skipped as too common to tell owners
+apart. Exact normalized matches are linked without comparing. So the work
+grows with the number of records times the block size, not records
+squared. Linked records are merged with union-find.
+
+Each record gets owner_cluster (the first account of its cluster) and
+owner_cluster_size. The owner list (one row per cluster) is written next to
+the input:
+    01_DADOS_COMPLETO_TODAS_COLUNAS.parquet -> 01_DADOS_COMPLETO_TODAS_COLUNAS.owners.csv
+
+Usage:
+    python owner_dedup.py                      # cluster the Step 5 import artifact (adds the columns)
+    python owner_dedup.py leads.csv            # cluster a CSV (writes only the owner list)
+    python owner_dedup.py --threshold 0.85 --address-threshold 0.9 --max-block 300
+"""
+
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline_schema import read_pipeline_csv, read_artifact, write_artifact, artifact_path, IMPORT_ARTIFACT
+from instrumentation import span
+
+DEFAULT_THRESHOLD = 0.75
+DEFAULT_ADDRESS_THRESHOLD = 0.85
+DEFAULT_MAX_BLOCK = 200
+# Name tokens per record used as block keys (the rarest ones in its ZIP)
+BLOCK_TOKENS = 2
+
+# Entity/role words that don't identify an owner
+OWNER_NOISE = {
+    "LLC", "INC", "CORP", "CORPORATION", "CO", "COMPANY", "LTD", "LP", "LLP", "PA", "PLLC",
+    "TR", "TRS", "TRUST", "TRUSTEE", "TRUSTEES", "TRUSTS", "ESTATE", "EST", "ETAL", "ET", "AL", "ETUX",
+    "THE", "OF", "AND", "LIVING", "REVOCABLE", "REV", "FAMILY", "HE", "LE",
+}
+
+STREET_WORDS = {
+    "STREET": "ST", "AVENUE": "AVE", "AV": "AVE", "DRIVE": "DR", "ROAD": "RD", "COURT": "CT",
+    "LANE": "LN", "BOULEVARD": "BLVD", "CIRCLE": "CIR", "PLACE": "PL", "TERRACE": "TER",
+    "PARKWAY": "PKWY", "HIGHWAY": "HWY", "TRAIL": "TRL", "COVE": "CV", "POINT": "PT", "WAY": "WY",
+    "NORTH": "N", "SOUTH": "S", "EAST": "E", "WEST": "W", "NORTHEAST": "NE", "NORTHWEST": "NW",
+    "SOUTHEAST": "SE", "SOUTHWEST": "SW", "APARTMENT": "#", "APT": "#", "UNIT": "#", "STE": "#",
+    "SUITE": "#", "LOT": "#",
+}
+
+# Generation suffixes: kept in the name and, like initials, compared exactly
+GENERATIONS = {"JR", "SR", "II", "III", "IV"}
+
+NON_WORD = re.compile(r"[^A-Z0-9# ]+")
+DIGITS = re.compile(r"\d+")
+ZIP = re.compile(r"\b(\d{5})(?:-\d{4})?\b")
+PO_BOX = re.compile(r"\bP\s*O\s*BOX\b|\bPOST OFFICE BOX\b|\bBOX\b")
+
+# Column choices, most specific first
+OWNER_COLUMNS = ("owner_name", "Owner Name", "Owner_Name", "Owner")
+ADDRESS_COLUMNS = ("mailing_address", "Mailing_Address", "owner_address", "Owner Address")
+ZIP_COLUMNS = ("mailing_zip",)
+
+
+def owner_tokens(name):
+    """Identifying words of an owner name: 'SMITH JOHN A & MARY B TR' -> ['A', 'B', 'JOHN', 'MARY', 'SMITH']"""
+    if not isinstance(name, str):
+        return []
+    words = NON_WORD.sub(" ", name.upper().replace("&", " ").replace(".", "")).split()
+    return sorted(set(word for word in words if word not in OWNER_NOISE))
+
+
+def parse_address(address, zip_code=None):
+    """
+    (normalized street, ZIP, house or box number) of a mailing address
+
+    Accepts a bare street plus `zip_code`, or the one-line county form
+    "211 LONGLEAF CT ORLANDO, FL 32835-1051" (the ZIP is taken from it).
+    """
+    if not isinstance(address, str) or not address.strip():
+        return None, None, None
+    text = address.upper()
+    if not isinstance(zip_code, str) or not zip_code.strip():
+        zips = ZIP.findall(text)
+        zip_code = zips[-1] if zips else None
+        if zips:
+            text = text[:text.rfind(zips[-1])]
+    else:
+        zip_code = zip_code.strip()[:5]
+
+    street = NON_WORD.sub(" ", text.split(",")[0].replace("#", " # "))
+    words = [STREET_WORDS.get(word, word) for word in PO_BOX.sub(" POBOX ", street).split()]
+    if not words:
+        return None, zip_code, None
+    if words[0] == "POBOX" and len(words) > 1:
+        number = "BOX" + words[1]
+    else:
+        number = words[0] if words[0][0].isdigit() else None
+    return " ".join(words), zip_code, number
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a, b):
+    """Dice coefficient of two trigram sets (1.0 = identical)"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def numbers(text):
+    return tuple(DIGITS.findall(text))
+
+
+def name_marks(text):
+    """Parts of an owner name that must match exactly: numbers, initials, generations"""
+    words = text.split()
+    return (numbers(text), tuple(word for word in words if len(word) == 1 and word.isalpha()),
+            tuple(word for word in words if word in GENERATIONS))
+
+
+class Features:
+    """
+    (trigrams, exact marks) of texts[i], computed on first comparison and
+    shared by identical texts
+
+    The marks must match exactly for two texts to be similar: "7182 ELM ST # 4"
+    and "7182 ELM ST # 5" are different units however close the letters are.
+    `marks` is numbers() for addresses and name_marks() for owner names.
+    """
+
+    def __init__(self, texts, marks=numbers):
+        self.texts = texts
+        self.marks = marks
+        self.cache = {}
+
+    def __getitem__(self, i):
+        text = self.texts[i]
+        found = self.cache.get(text)
+        if found is None:
+            found = self.cache[text] = (trigrams(text), self.marks(text)) if text else (set(), ())
+        return found
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri == rj:
+            return False
+        # Lower index wins so cluster ids follow input order
+        if ri < rj:
+            self.parent[rj] = ri
+        else:
+            self.parent[ri] = rj
+        return True
+
+
+def first_column(df, names):
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype="object")
+
+
+def link_blocks(blocks, features, threshold, links, max_block, reason, stats):
+    """Compare records sharing a block; union those at or above `threshold` (see Features)"""
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block:
+            stats["skipped_blocks"] += 1
+            continue
+        for x in range(len(members)):
+            i = members[x]
+            for j in members[x + 1:]:
+                if links.find(i) == links.find(j):
+                    continue
+                stats["comparisons"] += 1
+                (grams_i, marks_i), (grams_j, marks_j) = features[i], features[j]
+                if marks_i == marks_j and dice(grams_i, grams_j) >= threshold:
+                    links.union(i, j)
+                    stats[reason] += 1
+
+
+def link_exact(keys, links, reason, stats):
+    """Union records whose normalized key is identical (no comparisons needed)"""
+    first = {}
+    for i, key in enumerate(keys):
+        if key is None:
+            continue
+        if key in first:
+            if links.union(first[key], i):
+                stats[reason] += 1
+        else:
+            first[key] = i
+
+
+def owner_clusters(df, threshold=DEFAULT_THRESHOLD, address_threshold=DEFAULT_ADDRESS_THRESHOLD,
+                   max_block=DEFAULT_MAX_BLOCK, key="account_number"):
+    """
+    Cluster the records of `df` by owner
+
+    Returns (cluster_ids, stats): a Series aligned with df holding the
+    `key` of each cluster's first record, and counters of comparisons and
+    links made.
+    """
+    stats = {"comparisons": 0, "skipped_blocks": 0, "exact_owner": 0, "exact_address": 0,
+             "fuzzy_owner": 0, "fuzzy_address": 0}
+    size = len(df)
+    links = UnionFind(size)
+
+    with span("owners.normalize", "parse") as s:
+        names = first_column(df, OWNER_COLUMNS).tolist()
+        addresses = first_column(df, ADDRESS_COLUMNS).tolist()
+        zip_column = first_column(df, ZIP_COLUMNS).astype("string").tolist()
+        tokens = [owner_tokens(name) for name in names]
+        parsed = [parse_address(address, None if z is pd.NA else z) for address, z in zip(addresses, zip_column)]
+        s.add(rows=size)
+
+    with span("owners.link", "merge") as s:
+        zips = [zip_code for _, zip_code, _ in parsed]
+        name_keys = [(zips[i], " ".join(t)) if t and zips[i] else None for i, t in enumerate(tokens)]
+        address_keys = [(zip_code, street) if street and zip_code else None for street, zip_code, _ in parsed]
+        link_exact(name_keys, links, "exact_owner", stats)
+        link_exact(address_keys, links, "exact_address", stats)
+
+        # Owners: block on ZIP + house/box number + each of the record's rarest name tokens
+        name_features = Features([" ".join(t) for t in tokens], name_marks)
+        frequency = Counter((zips[i], token) for i, t in enumerate(tokens) if zips[i] for token in t)
+        blocks = {}
+        for i, t in enumerate(tokens):
+            number = parsed[i][2]
+            if zips[i] is None or not number:
+                continue
+            words = sorted((token for token in t if len(token) > 1 and token not in GENERATIONS),
+                           key=lambda token: frequency[zips[i], token])
+            for token in words[:BLOCK_TOKENS]:
+                blocks.setdefault((zips[i], number, token), []).append(i)
+        link_blocks(blocks, name_features, threshold, links, max_block, "fuzzy_owner", stats)
+
+        # Addresses: block on ZIP + house/box number
+        address_features = Features([street for street, _, _ in parsed])
+        blocks = {}
+        for i, (street, zip_code, number) in enumerate(parsed):
+            if street and zip_code and number:
+                blocks.setdefault((zip_code, number), []).append(i)
+        link_blocks(blocks, address_features, address_threshold, links, max_block, "fuzzy_address", stats)
+        s.add(rows=size)
+
+    roots = np.fromiter((links.find(i) for i in range(size)), dtype=np.int64, count=size)
+    keys = df[key].to_numpy() if key in df.columns else np.arange(size)
+    return pd.Series(keys[roots], index=df.index, name="owner_cluster"), stats
+
+
+def add_owner_clusters(df, **options):
+    """Add owner_cluster and owner_cluster_size to `df` (in place); returns the stats"""
+    clusters, stats = owner_clusters(df, **options)
+    df["owner_cluster"] = clusters
+    df["owner_cluster_size"] = clusters.map(clusters.value_counts()).astype("Int64")
+    return stats
+
+
+def owner_targets(df):
+    """One row per owner cluster: representative owner/address, parcel count and accounts"""
+    ordered = df
+    if "priority_score" in df.columns:
+        ordered = df.sort_values("priority_score", ascending=False, kind="stable")
+    grouped = ordered.groupby("owner_cluster", sort=False)
+    targets = grouped.first()[[col for col in ("owner_name",) + ADDRESS_COLUMNS + ZIP_COLUMNS + ("priority_score",)
+                               if col in df.columns]]
+    targets.insert(0, "parcels", grouped.size())
+    if "account_number" in df.columns:
+        targets["accounts"] = grouped["account_number"].agg(lambda accounts: ";".join(map(str, accounts)))
+    return targets.sort_values("parcels", ascending=False, kind="stable").reset_index()
+
+
+def print_summary(df, stats):
+    owners = df["owner_cluster"].nunique()
+    multi = int((df.drop_duplicates("owner_cluster")["owner_cluster_size"] > 1).sum())
+    print(f"Records: {len(df)} -> {owners} owners ({multi} with more than one parcel)")
+    print(f"Links: {stats['exact_owner']} same name, {stats['fuzzy_owner']} similar name, "
+          f"{stats['exact_address']} same address, {stats['fuzzy_address']} similar address")
+    print(f"Comparisons: {stats['comparisons']} ({stats['skipped_blocks']} oversized blocks skipped)")
+
+
+def main():
+    options = ("--threshold", "--address-threshold", "--max-block")
+    args = [arg for i, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith("--") and sys.argv[i - 1] not in options]
+    threshold = float(sys.argv[sys.argv.index("--threshold") + 1]) if "--threshold" in sys.argv else DEFAULT_THRESHOLD
+    address_threshold = (float(sys.argv[sys.argv.index("--address-threshold") + 1])
+                         if "--address-threshold" in sys.argv else DEFAULT_ADDRESS_THRESHOLD)
+    max_block = int(sys.argv[sys.argv.index("--max-block") + 1]) if "--max-block" in sys.argv else DEFAULT_MAX_BLOCK
+
+    if args:
+        input_path = Path(args[0])
+        df = read_pipeline_csv(input_path)
+    else:
+        input_path = artifact_path(IMPORT_ARTIFACT)
+        df = read_artifact(IMPORT_ARTIFACT)
+    print(f"Loaded: {input_path} ({len(df)} rows)")
+
+    stats = add_owner_clusters(df, threshold=threshold, address_threshold=address_threshold, max_block=max_block)
+    print_summary(df, stats)
+
+    owners_path = input_path.with_name(f"{input_path.stem}.owners.csv")
+    owner_targets(df).to_csv(owners_path, index=False)
+    print(f"[OK] Owner list: {owners_path}")
+    if not args:
+        output_path = write_artifact(df, IMPORT_ARTIFACT)
+        print(f"[OK] {output_path} updated with owner_cluster / owner_cluster_size")
+
+
+if __name__ == "__main__":
+    main()
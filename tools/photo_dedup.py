@@ -0,0 +1,296 @@
+"""
+Find duplicate property photos by perceptual hash
+
+The photo folders hold the same picture several times: hyphen and underscore
+copies of one account (28-22-29-5600-81200.jpg / 28_22_29_5600_81200.jpg),
+re-downloads ("... (1).jpg") and recompressed copies. Byte comparison misses
+most of them, so every image gets two 64-bit perceptual hashes (aHash and
+dHash, via Pillow, in a process pool). Images whose hashes are both within
+--threshold bits of each other count as visually identical.
+
+Per account, one canonical file is kept: the canonical (underscore)
+spelling, then the most pixels, then the largest file. Visual duplicates of it
+go on the exclusion list, which the uploaders skip. They are
+never deleted here.
+
+Also reported, never excluded:
+- conflicts  other files of an account that look different (check by hand)
+- shared     one picture used by several accounts (usually a "no imagery" placeholder)
+
+The report sits next to the folder and also caches the hashes (by size and
+mtime), so a re-run only hashes new or changed files:
+    property_photos/ -> property_photos.dedup.json
+
+Usage:
+    python photo_dedup.py [PHOTOS_DIR] [--threshold BITS] [--workers N]
+"""
+
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from account_keys import canonical_account, match_key
+from instrumentation import span
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+PHOTOS_DIR = "../../Step 3 - Download Images/property_photos"
+REPORT_VERSION = 1
+DEFAULT_THRESHOLD = 4   # differing bits (of 64) still counted as the same picture
+HASH_SIZE = 8
+
+# "28_22_29_5600_81200 (1)", "28_22_29_5600_81200_copy", "... - Copy (2)"
+COPY_SUFFIX = re.compile(r"(\s*\(\d+\)|[\s_-]+copy(\s*\(?\d+\)?)?)+$", re.IGNORECASE)
+
+
+def report_path(directory):
+    """Dedup report/hash cache for a photo folder"""
+    directory = Path(directory)
+    return directory.with_name(f"{directory.name}.dedup.json")
+
+
+def load_exclusions(directory):
+    """File names the last dedup run excluded (empty when it never ran)"""
+    path = report_path(directory)
+    if not path.exists():
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return set(json.load(f).get("exclude", []))
+
+
+def photo_account(name):
+    """Account a photo file belongs to: stem without copy suffixes, canonical spelling"""
+    return canonical_account(COPY_SUFFIX.sub("", Path(name).stem))
+
+
+def perceptual_hashes(path):
+    """(ahash, dhash, width, height) of one image; None when it can't be read"""
+    try:
+        with Image.open(path) as img:
+            width, height = img.size
+            # JPEG: let the decoder scale down (much faster than a full decode)
+            img.draft("L", (HASH_SIZE * 8, HASH_SIZE * 8))
+            gray = img.convert("L")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    small = gray.resize((HASH_SIZE, HASH_SIZE), Image.Resampling.BOX).tobytes()
+    mean = sum(small) / len(small)
+    ahash = 0
+    for value in small:
+        ahash = (ahash << 1) | (value > mean)
+
+    wide = gray.resize((HASH_SIZE + 1, HASH_SIZE), Image.Resampling.BOX).tobytes()
+    dhash = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            dhash = (dhash << 1) | (wide[offset + col] > wide[offset + col + 1])
+
+    return ahash, dhash, width, height
+
+
+def _hash_job(path):
+    return path, perceptual_hashes(path)
+
+
+def distance(a, b):
+    """Differing bits between two hashes"""
+    return bin(a ^ b).count("1")
+
+
+def hash_directory(directory, cached=None, workers=None, pattern="*.jpg"):
+    """
+    Perceptual hashes for every image in `directory`
+
+    `cached` is the "hashes" dict of a previous report; files with the same
+    size and mtime reuse it. Returns {name: {size, mtime_ns, ahash, dhash, width, height}}.
+    """
+    cached = cached or {}
+    hashes = {}
+    todo = []
+    for path in sorted(Path(directory).glob(pattern)):
+        stat = path.stat()
+        entry = cached.get(path.name)
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            hashes[path.name] = entry
+        else:
+            hashes[path.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            todo.append(str(path))
+
+    if todo:
+        with span("photos.phash", "parse") as s:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for path, result in pool.map(_hash_job, todo, chunksize=32):
+                    entry = hashes[Path(path).name]
+                    if result is None:
+                        entry["error"] = "unreadable"
+                        continue
+                    ahash, dhash, width, height = result
+                    entry.update({"ahash": f"{ahash:016x}", "dhash": f"{dhash:016x}",
+                                  "width": width, "height": height})
+            s.add(rows=len(todo), bytes=sum(hashes[Path(path).name]["size"] for path in todo))
+    return hashes, len(todo)
+
+
+def find_groups(hashes, threshold=DEFAULT_THRESHOLD):
+    """
+    Clusters of visually identical images (lists of names, 2+ each)
+
+    Candidates come from splitting the dHash into threshold+1 bands: two
+    hashes within `threshold` bits agree exactly on at least one band, so only
+    images sharing a band are compared (no all-pairs scan).
+    """
+    names = [name for name, entry in hashes.items() if "dhash" in entry]
+    ahashes = [int(hashes[name]["ahash"], 16) for name in names]
+    dhashes = [int(hashes[name]["dhash"], 16) for name in names]
+
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    bits = HASH_SIZE * HASH_SIZE
+    bands = threshold + 1
+    edges = [bits * b // bands for b in range(bands + 1)]
+    for band in range(bands):
+        low, width = edges[band], edges[band + 1] - edges[band]
+        mask = (1 << width) - 1
+        buckets = {}
+        for i, dhash in enumerate(dhashes):
+            buckets.setdefault((dhash >> low) & mask, []).append(i)
+        for members in buckets.values():
+            for x in range(len(members)):
+                i = members[x]
+                for j in members[x + 1:]:
+                    if find(i) == find(j):
+                        continue
+                    if distance(dhashes[i], dhashes[j]) <= threshold and distance(ahashes[i], ahashes[j]) <= threshold:
+                        parent[find(j)] = find(i)
+
+    clusters = {}
+    for i, name in enumerate(names):
+        clusters.setdefault(find(i), []).append(name)
+    return [sorted(members) for members in clusters.values() if len(members) > 1]
+
+
+def choose_canonical(names, hashes):
+    """Preferred file among one account's photos"""
+    def rank(name):
+        entry = hashes[name]
+        stem = COPY_SUFFIX.sub("", Path(name).stem)
+        is_canonical_name = stem == Path(name).stem and stem == canonical_account(stem)
+        return (is_canonical_name, entry.get("width", 0) * entry.get("height", 0), entry["size"], name)
+    return max(names, key=rank)
+
+
+def build_report(directory, threshold=DEFAULT_THRESHOLD, workers=None):
+    """Hash, group and pick canonical photos; returns the report dict"""
+    path = report_path(directory)
+    cached = {}
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            cached = json.load(f).get("hashes", {})
+
+    hashes, hashed = hash_directory(directory, cached, workers)
+    groups = find_groups(hashes, threshold)
+    group_of = {name: i for i, members in enumerate(groups) for name in members}
+
+    by_account = {}
+    for name in hashes:
+        account = photo_account(name)
+        if account is not None:
+            by_account.setdefault(match_key(account), []).append(name)
+
+    canonical = {}
+    exclude = []
+    conflicts = {}
+    for names in by_account.values():
+        keep = choose_canonical(names, hashes)
+        canonical[photo_account(keep)] = keep
+        for name in names:
+            if name == keep:
+                continue
+            if keep in group_of and group_of.get(name) == group_of[keep]:
+                exclude.append(name)
+            else:
+                conflicts.setdefault(photo_account(keep), []).append(name)
+
+    shared = [
+        members for members in groups
+        if len({match_key(photo_account(name)) for name in members}) > 1
+    ]
+
+    return {
+        "version": REPORT_VERSION,
+        "directory": str(directory),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "threshold": threshold,
+        "hashed": hashed,
+        "canonical": canonical,
+        "exclude": sorted(exclude),
+        "excluded_bytes": sum(hashes[name]["size"] for name in exclude),
+        "groups": groups,
+        "conflicts": conflicts,
+        "shared": shared,
+        "unreadable": sorted(name for name, entry in hashes.items() if "error" in entry),
+        "hashes": hashes,
+    }
+
+
+def save_report(directory, report):
+    path = report_path(directory)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    args = [arg for i, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith("--") and sys.argv[i - 1] not in ("--threshold", "--workers")]
+    directory = Path(args[0] if args else PHOTOS_DIR)
+    threshold = int(sys.argv[sys.argv.index("--threshold") + 1]) if "--threshold" in sys.argv else DEFAULT_THRESHOLD
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+
+    if not PIL_AVAILABLE:
+        print("❌ Pillow is required: pip install Pillow")
+        sys.exit(1)
+    if not directory.is_dir():
+        print(f"❌ Photos directory not found: {directory}")
+        sys.exit(1)
+
+    report = build_report(directory, threshold, workers)
+    path = save_report(directory, report)
+
+    print(f"📸 {len(report['hashes'])} photos ({report['hashed']} hashed, the rest cached)")
+    print(f"🧩 {len(report['groups'])} groups of visually identical photos")
+    print(f"✅ {len(report['canonical'])} accounts, one canonical photo each")
+    print(f"⏭️  {len(report['exclude'])} duplicates excluded from upload ({report['excluded_bytes'] / 1e6:.1f} MB)")
+    if report["conflicts"]:
+        print(f"⚠️  {len(report['conflicts'])} accounts have photos that differ - check by hand:")
+        for account, names in list(report["conflicts"].items())[:10]:
+            print(f"     {account}: keeps {report['canonical'][account]}, also {', '.join(names)}")
+    if report["shared"]:
+        print(f"⚠️  {len(report['shared'])} pictures are shared by several accounts (placeholders?):")
+        for members in report["shared"][:10]:
+            print(f"     {', '.join(members[:5])}{' ...' if len(members) > 5 else ''}")
+    if report["unreadable"]:
+        print(f"❌ {len(report['unreadable'])} unreadable files: {', '.join(report['unreadable'][:10])}")
+    print(f"📝 Report: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""
+Normalize property photos before upload
+
+Photos were uploaded byte for byte from Step 3, including oversized originals
+and EXIF blocks (camera data, GPS, thumbnails). Each photo goes through these
+steps in a process pool:
+
+1. apply the EXIF orientation to the pixels, then drop EXIF/XMP/IPTC (the ICC
+   colour profile is kept)
+2. scale down to at most --max-dim pixels on the long side (never up)
+3. re-encode as optimized, progressive JPEG at --quality
+
+When nothing had to change (upright, small enough) and the re-encode isn't
+smaller, the original JPEG data is kept as-is with only the metadata
+segments removed, which is lossless.
+
+Results go to a cache folder next to the photos, named by a hash of the source
+bytes and the settings. An unchanged photo (same size and mtime) is never
+processed twice, and identical files share one output:
+    property_photos/ -> property_photos.normalized/
+
+The uploaders read through the cache (NormalizedPhotos.get) and fall back to
+the original when a photo has no up-to-date cached version.
+
+Usage:
+    python photo_normalize.py [PHOTOS_DIR] [--max-dim PX] [--quality Q] [--workers N]
+"""
+
+import hashlib
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from instrumentation import span
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+PHOTOS_DIR = "../../Step 3 - Download Images/property_photos"
+INDEX_VERSION = 1
+DEFAULT_MAX_DIM = 1600
+DEFAULT_QUALITY = 82
+
+# JPEG segments kept when stripping metadata: APP0 (JFIF), APP2 (ICC), APP14 (Adobe colour transform)
+KEEP_APP_MARKERS = {0xE0, 0xE2, 0xEE}
+
+
+def cache_dir(directory):
+    """Normalized-photo cache for a photo folder"""
+    directory = Path(directory)
+    return directory.with_name(f"{directory.name}.normalized")
+
+
+def strip_jpeg_metadata(data):
+    """JPEG bytes without EXIF/XMP/IPTC/comment segments (image data untouched); None if not a JPEG"""
+    if data[:2] != b"\xff\xd8":
+        return None
+    out = bytearray(data[:2])
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            return None
+        marker = data[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:  # start of scan: the rest is image data
+            out += data[pos:]
+            return bytes(out)
+        length = int.from_bytes(data[pos + 2:pos + 4], "big")
+        segment = data[pos:pos + 2 + length]
+        is_metadata = (0xE1 <= marker <= 0xEF and marker not in KEEP_APP_MARKERS) or marker == 0xFE
+        if not is_metadata:
+            out += segment
+        pos += 2 + length
+    return None
+
+
+def normalize_photo(source, out_dir, max_dim, quality):
+    """
+    Normalize one photo into `out_dir` (runs in a worker process)
+
+    Returns a dict with the source hash, output file name, sizes and the
+    method used ("reencoded", "stripped" or "cached"), or an "error".
+    """
+    data = Path(source).read_bytes()
+    settings = f"max_dim={max_dim};quality={quality};v={INDEX_VERSION}"
+    source_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+    key = hashlib.blake2b(data + settings.encode("utf-8"), digest_size=16).hexdigest()
+    output = f"{key}.jpg"
+    result = {"source_hash": source_hash, "output": output, "bytes_in": len(data)}
+
+    out_path = Path(out_dir) / output
+    if out_path.exists():
+        result.update(bytes_out=out_path.stat().st_size, method="cached")
+        return result
+
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            is_jpeg = img.format == "JPEG"
+            icc_profile = img.info.get("icc_profile")
+            rotated = img.getexif().get(0x0112, 1) not in (1, None)
+            oversized = max(img.size) > max_dim
+
+            img = ImageOps.exif_transpose(img)
+            if img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            if oversized:
+                img.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+
+            buffer = io.BytesIO()
+            img.save(buffer, "JPEG", quality=quality, optimize=True, progressive=True, icc_profile=icc_profile)
+            encoded = buffer.getvalue()
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        result["error"] = str(e)
+        return result
+
+    method = "reencoded"
+    if is_jpeg and not rotated and not oversized:
+        stripped = strip_jpeg_metadata(data)
+        if stripped is not None and len(stripped) <= len(encoded):
+            encoded, method = stripped, "stripped"
+
+    tmp_path = out_path.with_name(f"{output}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(encoded)
+    os.replace(tmp_path, out_path)
+    result.update(bytes_out=len(encoded), method=method)
+    return result
+
+
+def _normalize_job(job):
+    source, out_dir, max_dim, quality = job
+    return source, normalize_photo(source, out_dir, max_dim, quality)
+
+
+def load_index(directory):
+    path = cache_dir(directory) / "index.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("version") == INDEX_VERSION else {}
+
+
+def normalize_directory(directory, max_dim=DEFAULT_MAX_DIM, quality=DEFAULT_QUALITY, workers=None, pattern="*.jpg"):
+    """Bring the cache up to date for every photo in `directory`; returns the index"""
+    directory = Path(directory)
+    out_dir = cache_dir(directory)
+    out_dir.mkdir(exist_ok=True)
+
+    settings = {"max_dim": max_dim, "quality": quality}
+    previous = load_index(directory)
+    known = previous.get("photos", {}) if previous.get("settings") == settings else {}
+
+    photos = {}
+    todo = []
+    for path in sorted(directory.glob(pattern)):
+        stat = path.stat()
+        entry = known.get(path.name)
+        if (entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns
+                and "error" not in entry and (out_dir / entry["output"]).exists()):
+            photos[path.name] = dict(entry, method="unchanged")
+        else:
+            photos[path.name] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            todo.append((str(path), str(out_dir), max_dim, quality))
+
+    if todo:
+        with span("photos.normalize", "disk") as s:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for source, result in pool.map(_normalize_job, todo, chunksize=8):
+                    photos[Path(source).name].update(result)
+            s.add(rows=len(todo), bytes=sum(photos[Path(job[0]).name]["size"] for job in todo))
+
+    # Drop cached files no photo points at any more
+    used = {entry.get("output") for entry in photos.values() if "error" not in entry}
+    for path in out_dir.glob("*.jpg"):
+        if path.name not in used:
+            path.unlink()
+
+    index = {
+        "version": INDEX_VERSION,
+        "settings": settings,
+        "updated_at": datetime.now().isoformat(timespec="seconds"),
+        "photos": photos,
+    }
+    tmp_path = out_dir / "index.json.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, out_dir / "index.json")
+    return index
+
+
+class NormalizedPhotos:
+    """Source photo path -> cached normalized file (or the original when not cached)"""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.out_dir = cache_dir(directory)
+        self.photos = load_index(directory).get("photos", {})
+
+    def get(self, path):
+        """Cached version of `path` when it is up to date, else `path` itself"""
+        path = Path(path)
+        entry = self.photos.get(path.name)
+        if not entry or "output" not in entry or "error" in entry:
+            return path
+        try:
+            stat = path.stat()
+        except OSError:
+            return path
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return path
+        cached = self.out_dir / entry["output"]
+        return cached if cached.exists() else path
+
+    def __len__(self):
+        return len(self.photos)
+
+
+def main():
+    options = ("--max-dim", "--quality", "--workers")
+    args = [arg for i, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith("--") and sys.argv[i - 1] not in options]
+    directory = Path(args[0] if args else PHOTOS_DIR)
+    max_dim = int(sys.argv[sys.argv.index("--max-dim") + 1]) if "--max-dim" in sys.argv else DEFAULT_MAX_DIM
+    quality = int(sys.argv[sys.argv.index("--quality") + 1]) if "--quality" in sys.argv else DEFAULT_QUALITY
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else None
+
+    if not PIL_AVAILABLE:
+        print("❌ Pillow is required: pip install Pillow")
+        sys.exit(1)
+    if not directory.is_dir():
+        print(f"❌ Photos directory not found: {directory}")
+        sys.exit(1)
+
+    index = normalize_directory(directory, max_dim, quality, workers)
+    photos = index["photos"].values()
+    methods = {}
+    for entry in photos:
+        method = "error" if "error" in entry else entry["method"]
+        methods[method] = methods.get(method, 0) + 1
+    ok = [entry for entry in photos if "error" not in entry]
+    bytes_in = sum(entry["bytes_in"] for entry in ok)
+    bytes_out = sum(entry["bytes_out"] for entry in ok)
+
+    print(f"📸 {len(index['photos'])} photos (max {max_dim}px, quality {quality})")
+    for method, n in sorted(methods.items()):
+        print(f"   {method:<10} {n:>6}")
+    if bytes_in:
+        print(f"💾 {bytes_in / 1e6:.1f} MB -> {bytes_out / 1e6:.1f} MB ({(1 - bytes_out / bytes_in) * 100:.0f}% smaller)")
+    for name, entry in list(index["photos"].items()):
+        if "error" in entry:
+            print(f"❌ {name}: {entry['error']}")
+    print(f"📁 Cache: {cache_dir(directory)}")
+
+
+if __name__ == "__main__":
+    main()
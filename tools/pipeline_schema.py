@@ -0,0 +1,501 @@
+"""
+Central schema registry for the pipeline CSVs (Steps 2, 4 and 5)
+
+Every tool reads its CSVs through read_pipeline_csv() so that:
+- Low-cardinality columns (condition_category, tier, priority_tier...) load as categoricals
+- Flags (is_estate, Out of State...) load as nullable booleans
+- Counts/years load as nullable ints instead of float64
+- Account numbers and zips stay text (no lost leading zeros)
+- Only the columns a tool actually touches are parsed (usecols)
+
+The canonical account key is the underscore form: 28-22-29-5600-81200 -> 28_22_29_5600_81200
+
+Intermediate artifacts (Step 2 -> Step 5 merge output and the stages that
+enrich it) are kept in Parquet via write_artifact()/read_artifact(); CSV is
+only produced by export_lovable_csv.py, as LOVABLE_EXPORT_CSV. Without
+pyarrow the artifacts fall back to CSV (IMPORT_ARTIFACT.csv), which is why
+the export has a name of its own.
+"""
+
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from instrumentation import span
+
+# Parquet is optional - fall back to CSV intermediates without pyarrow
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Column kinds
+KEY = "key"
+TEXT = "text"
+CATEGORY = "category"
+BOOL = "bool"
+INT = "int"
+FLOAT = "float"
+
+# Canonical account key column used by every merge/dedup
+ACCOUNT_KEY = "account_number"
+
+# Canonical Step 5 intermediate (extension chosen by write_artifact)
+IMPORT_ARTIFACT = "Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_TODAS_COLUNAS"
+LOVABLE_EXPORT_CSV = "Step 5 - Outreach & Campaigns/FINAL_PARA_IMPORT/01_DADOS_COMPLETO_LOVABLE.csv"
+
+# Raw account-number columns found in the different step exports
+ACCOUNT_KEY_SOURCES = ["account_number", "Account Number", "Account_Number"]
+
+# Registry: column name -> kind. Covers the raw Step 2/Step 4 headers and
+# the snake_case names used from Step 5 onwards. Unknown columns are left to
+# the pandas parser.
+COLUMNS = {
+    # Keys / identifiers
+    "account_number": KEY,
+    "Account Number": KEY,
+    "Account_Number": KEY,
+    "Alternate Key": TEXT,
+    "alternate_key": TEXT,
+    "pid": TEXT,
+    "owner_cluster": KEY,
+    "slug": TEXT,
+    "Cert #": TEXT,
+    "cert_number": TEXT,
+    "Bidder #": TEXT,
+    "bidder_number": TEXT,
+
+    # Owner / address text
+    "Owner Name": TEXT,
+    "owner_name": TEXT,
+    "Owner": TEXT,
+    "Owner Address": TEXT,
+    "owner_address": TEXT,
+    "Property Address": TEXT,
+    "property_address": TEXT,
+    "Property_Address": TEXT,
+    "Mailing_Address": TEXT,
+    "mailing_address": TEXT,
+    "mailing_city": TEXT,
+    "Billing Address": TEXT,
+    "billing_address": TEXT,
+    "Legal Desc": TEXT,
+    "legal_description": TEXT,
+    "zip_code": TEXT,
+    "mailing_zip": TEXT,
+    "photo_url": TEXT,
+    "image_url": TEXT,
+    "property_image_url": TEXT,
+    "Cert Buyer": TEXT,
+    "cert_buyer": TEXT,
+
+    # Visual analysis free text (Step 4)
+    "Lawn_Condition": TEXT,
+    "lawn_condition": TEXT,
+    "Exterior_Condition": TEXT,
+    "exterior_condition": TEXT,
+    "Roof_Condition": TEXT,
+    "roof_condition": TEXT,
+    "Driveway_Condition": TEXT,
+    "driveway_condition": TEXT,
+    "Pool_Condition": TEXT,
+    "pool_condition": TEXT,
+    "Visible_Issues": TEXT,
+    "visible_issues": TEXT,
+    "Appears_Vacant": TEXT,
+    "appears_vacant": TEXT,
+    "Vehicles_Present": TEXT,
+    "vehicles_present": TEXT,
+    "Distress_Indicators": TEXT,
+    "distress_indicators": TEXT,
+    "Neighbor_Comparison": TEXT,
+    "neighbor_comparison": TEXT,
+    "Visual_Summary": TEXT,
+    "visual_summary": TEXT,
+    "Image_Appears_Current": TEXT,
+    "image_appears_current": TEXT,
+    "Image_Path": TEXT,
+    "image_path": TEXT,
+    "Analysis_Date": TEXT,
+    "analysis_date": TEXT,
+
+    # Low-cardinality categoricals
+    "Condition_Category": CATEGORY,
+    "condition_category": CATEGORY,
+    "Tier": CATEGORY,
+    "tier": CATEGORY,
+    "priority_tier": CATEGORY,
+    "Priority": CATEGORY,
+    "Priority_Class": CATEGORY,
+    "priority_class": CATEGORY,
+    "mailing_state": CATEGORY,
+    "state": CATEGORY,
+    "city": CATEGORY,
+    "property_type": CATEGORY,
+    "Account Status": CATEGORY,
+    "account_status": CATEGORY,
+    "Cert Status": CATEGORY,
+    "cert_status": CATEGORY,
+    "Deed Status": CATEGORY,
+    "deed_status": CATEGORY,
+    "Millage Code": CATEGORY,
+    "millage_code": CATEGORY,
+    "building_type": CATEGORY,
+    "exterior_wall": CATEGORY,
+    "interior_wall": CATEGORY,
+    "land_use_code": CATEGORY,
+    "land_use_description": CATEGORY,
+    "zoning": CATEGORY,
+    "land_qty_code": CATEGORY,
+    "DOR_UC": CATEGORY,
+    "lead_status": CATEGORY,
+    "approval_status": CATEGORY,
+    "contact_status": CATEGORY,
+
+    # Flags
+    "Estate/Trust": BOOL,
+    "is_estate_trust": BOOL,
+    "is_estate": BOOL,
+    "Out of State": BOOL,
+    "is_out_of_state": BOOL,
+    "Deed Certified": BOOL,
+    "is_deed_certified": BOOL,
+    "Cert Issued": BOOL,
+    "is_cert_issued": BOOL,
+    "Is LLC": BOOL,
+    "is_llc": BOOL,
+    "is_vacant_land": BOOL,
+
+    # Counts / years / small scores
+    "Roll Yr": INT,
+    "roll_year": INT,
+    "Tax Yr": INT,
+    "tax_year": INT,
+    "Years Old": INT,
+    "years_old": INT,
+    "Times Delinquent": INT,
+    "times_delinquent": INT,
+    "Years_Delinquent": INT,
+    "years_delinquent": INT,
+    "Certificate_Count": INT,
+    "certificate_count": INT,
+    "Condition_Score": INT,
+    "condition_score": INT,
+    "year_built": INT,
+    "bedrooms": INT,
+    "beds": INT,
+    "floors": INT,
+    "owner_cluster_size": INT,
+
+    # Money / measures
+    "Balance Amount": FLOAT,
+    "balance_amount": FLOAT,
+    "Assessed Value": FLOAT,
+    "assessed_value": FLOAT,
+    "market_value_2025": FLOAT,
+    "assessed_value_2025": FLOAT,
+    "land_value_2025": FLOAT,
+    "building_value_2025": FLOAT,
+    "Total_Market_Value": FLOAT,
+    "total_market_value": FLOAT,
+    "Total_Assessed_Value": FLOAT,
+    "total_assessed_value": FLOAT,
+    "Taxable_Value": FLOAT,
+    "taxable_value": FLOAT,
+    "just_value": FLOAT,
+    "estimated_value": FLOAT,
+    "cash_offer_amount": FLOAT,
+    "Total_Amount_Due": FLOAT,
+    "total_amount_due": FLOAT,
+    "total_tax_due": FLOAT,
+    "Face_Amount": FLOAT,
+    "face_amount": FLOAT,
+    "Equity": FLOAT,
+    "equity": FLOAT,
+    "equity_estimate": FLOAT,
+    "Equity Ratio": FLOAT,
+    "equity_ratio": FLOAT,
+    "Value Per Acre": FLOAT,
+    "value_per_acre": FLOAT,
+    "Score": FLOAT,
+    "priority_score": FLOAT,
+    "step2_score": FLOAT,
+    "lead_score": FLOAT,
+    "Tax_Score": FLOAT,
+    "tax_score": FLOAT,
+    "Visual_Score": FLOAT,
+    "visual_score": FLOAT,
+    "Final_Combined_Score": FLOAT,
+    "final_combined_score": FLOAT,
+    "Estimated_Repair_Cost": FLOAT,
+    "estimated_repair_cost": FLOAT,
+    "Estimated_Repair_Cost_Low": FLOAT,
+    "estimated_repair_cost_low": FLOAT,
+    "Estimated_Repair_Cost_High": FLOAT,
+    "estimated_repair_cost_high": FLOAT,
+    "living_area_sqft": FLOAT,
+    "gross_area_sqft": FLOAT,
+    "sqft": FLOAT,
+    "bathrooms": FLOAT,
+    "baths": FLOAT,
+    "land_qty": FLOAT,
+    "land_acres": FLOAT,
+    "land_sqft": FLOAT,
+    "lot_size": FLOAT,
+    "latitude": FLOAT,
+    "longitude": FLOAT,
+}
+
+_TRUE_VALUES = {"true", "t", "yes", "y", "1", "1.0"}
+_FALSE_VALUES = {"false", "f", "no", "n", "0", "0.0"}
+
+
+def kind_of(column):
+    """Return the registered kind for a column (None if unregistered)"""
+    return COLUMNS.get(column)
+
+
+def normalize_account_key(series):
+    """Canonical account key: stripped, hyphens -> underscores"""
+    return series.astype("string").str.strip().str.replace("-", "_", regex=False)
+
+
+def find_account_column(df):
+    """Return the first raw account-number column present in df"""
+    for col in ACCOUNT_KEY_SOURCES:
+        if col in df.columns:
+            return col
+    return None
+
+
+def to_boolean(series):
+    """Parse True/False/Yes/No/1/0 style flags into a nullable boolean column"""
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype("boolean")
+
+    text = series.astype("string").str.strip().str.lower()
+    result = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    result[text.isin(_TRUE_VALUES).fillna(False)] = True
+    result[text.isin(_FALSE_VALUES).fillna(False)] = False
+    return result
+
+
+def to_compact_int(series):
+    """Nullable Int32 (Int64 if needed); falls back to float if values are fractional"""
+    numeric = pd.to_numeric(series, errors="coerce")
+    values = numeric.dropna()
+    if len(values) and not (values % 1 == 0).all():
+        return numeric
+    if len(values) and values.abs().max() >= 2 ** 31:
+        return numeric.astype("Int64")
+    return numeric.astype("Int32")
+
+
+def apply_schema(df, canonical_key=False):
+    """Coerce registered columns of an already-loaded frame to their compact dtypes"""
+    for col in df.columns:
+        kind = COLUMNS.get(col)
+        if kind == BOOL:
+            df[col] = to_boolean(df[col])
+        elif kind == INT:
+            df[col] = to_compact_int(df[col])
+        elif kind == FLOAT and not pd.api.types.is_float_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+        elif kind == CATEGORY and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")
+
+    if canonical_key:
+        source = find_account_column(df)
+        if source is not None:
+            df[ACCOUNT_KEY] = normalize_account_key(df[source])
+
+    return df
+
+
+def parse_options(columns=None):
+    """read_csv keyword arguments (usecols + dtype) for the registered columns"""
+    options = {"encoding": "utf-8-sig"}
+
+    if columns is not None:
+        wanted = set(columns)
+        options["usecols"] = lambda col: col in wanted
+
+    dtype = {}
+    for col, kind in COLUMNS.items():
+        if columns is not None and col not in columns:
+            continue
+        if kind in (KEY, TEXT):
+            dtype[col] = str
+        elif kind == CATEGORY:
+            dtype[col] = "category"
+    options["dtype"] = dtype
+
+    return options
+
+
+def read_pipeline_csv(path, columns=None, canonical_key=False, **kwargs):
+    """
+    Read a pipeline CSV with registry dtypes
+
+    columns: only parse these columns (missing ones are ignored)
+    canonical_key: add/overwrite 'account_number' with the normalized key
+    """
+    options = parse_options(columns)
+    options.update(kwargs)
+    with span("csv.read", "parse", path=str(path)) as s:
+        df = pd.read_csv(path, **options)
+        df = apply_schema(df, canonical_key=canonical_key)
+        s.add(rows=len(df), bytes=_file_size(path))
+    return df
+
+
+def iter_pipeline_csv(path, chunksize, columns=None, canonical_key=False, **kwargs):
+    """Stream a pipeline CSV in chunks of `chunksize` rows, each with registry dtypes"""
+    options = parse_options(columns)
+    options.update(kwargs)
+    with pd.read_csv(path, chunksize=chunksize, **options) as reader:
+        while True:
+            with span("csv.read_chunk", "parse", path=str(path)) as s:
+                chunk = next(reader, None)
+                if chunk is not None:
+                    chunk = apply_schema(chunk, canonical_key=canonical_key)
+                    s.add(rows=len(chunk))
+            if chunk is None:
+                return
+            yield chunk
+
+
+def read_csv_header(path):
+    """Column names of a CSV without parsing any rows"""
+    return list(pd.read_csv(path, nrows=0, encoding="utf-8-sig").columns)
+
+
+def _file_size(path):
+    """Size of a file on disk (0 for buffers and missing files)"""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+def frame_memory_mb(df):
+    """Deep memory usage of a frame in MB (for progress prints)"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def artifact_path(stem):
+    """Path of an intermediate artifact: stem.parquet if pyarrow is available, else stem.csv"""
+    stem = Path(stem)
+    return stem.with_suffix(".parquet") if PARQUET_AVAILABLE else stem.with_suffix(".csv")
+
+
+def write_artifact(df, stem):
+    """Write an intermediate artifact (Parquet, or CSV fallback) and return its path"""
+    path = artifact_path(stem)
+    with span("artifact.write", "disk", path=str(path)) as s:
+        if path.suffix == ".parquet":
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False, encoding="utf-8")
+        s.add(rows=len(df), bytes=_file_size(path))
+    return path
+
+
+def read_artifact(stem, columns=None, canonical_key=False):
+    """
+    Read an intermediate artifact, parsing only `columns` when given
+
+    Prefers stem.parquet; falls back to stem.csv (older runs / no pyarrow)
+    """
+    stem = Path(stem)
+    parquet_path = stem.with_suffix(".parquet")
+
+    if PARQUET_AVAILABLE and parquet_path.exists():
+        if columns is not None:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(parquet_path).names)
+            columns = [col for col in columns if col in available]
+        with span("artifact.read", "parse", path=str(parquet_path)) as s:
+            df = pd.read_parquet(parquet_path, columns=columns)
+            df = apply_schema(df, canonical_key=canonical_key)
+            s.add(rows=len(df), bytes=_file_size(parquet_path))
+        return df
+
+    return read_pipeline_csv(stem.with_suffix(".csv"), columns=columns, canonical_key=canonical_key)
+
+
+def _stable_chunk(df):
+    """Cast a chunk to chunk-independent dtypes so appended parts share one schema"""
+    out = pd.DataFrame(index=df.index)
+    for col in df.columns:
+        kind = COLUMNS.get(col)
+        if kind == BOOL:
+            out[col] = to_boolean(df[col])
+        elif kind in (INT, FLOAT):
+            # INT stays float64 on disk; read_artifact() re-compacts the whole column
+            out[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+        else:
+            out[col] = df[col].astype("string")
+    return out
+
+
+class ArtifactWriter:
+    """
+    Append chunks to an intermediate artifact with a fixed column list
+
+    Parquet parts are written as row groups of one file (pyarrow ParquetWriter);
+    the CSV fallback appends with a single header.
+    """
+
+    def __init__(self, stem, columns):
+        self.path = artifact_path(stem)
+        self.columns = list(columns)
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+
+        if self.path.exists():
+            self.path.unlink()
+
+    def write(self, df):
+        """Append one chunk (missing columns are written as nulls)"""
+        if df.empty:
+            return
+        with span("artifact.append", "disk", path=str(self.path)) as s:
+            chunk = _stable_chunk(df.reindex(columns=self.columns))
+
+            if self.path.suffix == ".parquet":
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if self._schema is None:
+                    self._schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                    self._writer = pq.ParquetWriter(self.path, self._schema)
+                table = pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+                self._writer.write_table(table)
+            else:
+                chunk.to_csv(self.path, mode="a", index=False, header=self.rows == 0, encoding="utf-8")
+            s.add(rows=len(chunk))
+
+        self.rows += len(chunk)
+
+    def close(self):
+        """Finish the file (writes an empty artifact if no rows were appended)"""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        elif self.rows == 0:
+            empty = _stable_chunk(pd.DataFrame(columns=self.columns))
+            if self.path.suffix == ".parquet":
+                empty.to_parquet(self.path, index=False)
+            else:
+                empty.to_csv(self.path, index=False, encoding="utf-8")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
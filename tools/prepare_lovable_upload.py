@@ -1,56 +1,56 @@
 """
 Prepara arquivo final para upload no Lovable
 - Remove duplicatas
+- Agrupa parcels do mesmo dono (nome/endereco parecidos) em owner_cluster
 - Adiciona URLs das imagens que existem
 - Filtra apenas properties com fotos
 """
 
-import pandas as pd
-import os
-from pathlib import Path
+from pipeline_schema import read_pipeline_csv
+from account_keys import AccountIndex, dedup_accounts
+from owner_dedup import add_owner_clusters, owner_targets
 
 # Paths
 CSV_INPUT = "../SUPABASE_UPLOAD_242_LEADS_CLEAN.csv"
 IMAGES_DIR = "../../Step 3 - Download Images/property_photos"
 OUTPUT_CSV = "../LOVABLE_UPLOAD_WITH_IMAGES.csv"
+OWNERS_CSV = "../LOVABLE_UPLOAD_WITH_IMAGES.owners.csv"
 
 # Supabase Storage URL (você vai substituir com o URL real depois do upload)
 STORAGE_BASE_URL = "https://atwdkhlyrffbaugkaker.supabase.co/storage/v1/object/public/property-photos"
 
 def main():
     print("Loading CSV...")
-    df = pd.read_csv(CSV_INPUT)
+    df = read_pipeline_csv(CSV_INPUT)
 
     print(f"Total de linhas: {len(df)}")
 
     # Remove duplicatas baseado em account_number
     print("\nRemovendo duplicatas...")
-    df_unique = df.drop_duplicates(subset=['account_number'], keep='first')
+    # 28-22-29... e 28_22_29... contam como a mesma conta
+    df_unique = dedup_accounts(df, 'account_number')
     print(f"Apos remover duplicatas: {len(df_unique)}")
 
     # Verifica quais imagens existem
     print("\nVerificando imagens disponiveis...")
-    images_path = Path(IMAGES_DIR)
-    available_images = {img.stem for img in images_path.glob("*.jpg")}
+    available_images = AccountIndex.from_directory(IMAGES_DIR)
     print(f"Total de imagens: {len(available_images)}")
 
-    # Adiciona coluna de URL da imagem
-    def get_image_url(account_number):
-        if pd.isna(account_number):
-            return None
-        # Converte - para _ para match com nomes dos arquivos
-        image_filename = str(account_number).replace('-', '_')
-        if image_filename in available_images:
-            return f"{STORAGE_BASE_URL}/{image_filename}.jpg"
-        return None
-
-    df_unique['photo_url'] = df_unique['account_number'].apply(get_image_url)
+    # Adiciona coluna de URL da imagem (nome do arquivo = conta com _, qualquer grafia no CSV)
+    image_names = available_images.resolve_series(df_unique['account_number'])
+    df_unique['photo_url'] = (STORAGE_BASE_URL + "/" + image_names + ".jpg").astype(object).where(image_names.notna(), None)
 
     # Filtra apenas properties com imagens
     df_with_images = df_unique[df_unique['photo_url'].notna()].copy()
 
     print(f"\nProperties com imagens: {len(df_with_images)}")
 
+    # Mesmo dono com grafias diferentes / mesmo endereco de correspondencia -> um alvo de campanha
+    add_owner_clusters(df_with_images)
+    owners = owner_targets(df_with_images)
+    owners.to_csv(OWNERS_CSV, index=False)
+    print(f"Donos distintos: {len(owners)} ({int((owners['parcels'] > 1).sum())} com mais de um parcel)")
+
     # Remove vacant land (opcional - descomente se quiser só properties)
     # df_with_images = df_with_images[df_with_images['is_vacant_land'] != True]
 
@@ -68,6 +68,7 @@ def main():
     print(f"   - Total original: {len(df)}")
     print(f"   - Apos remover duplicatas: {len(df_unique)}")
     print(f"   - Com imagens disponiveis: {len(df_with_images)}")
+    print(f"   - Donos distintos (alvos de campanha): {len(owners)} -> {OWNERS_CSV}")
 
     # Breakdown por condition
     print(f"\nBREAKDOWN POR CONDICAO:")
@@ -0,0 +1,215 @@
+"""
+Priority score, tier and cash offer for the Step 5 import artifact
+
+Step 2's Score was carried through unchanged and add_required_columns.py
+priced every lead at a flat 70% of just_value. This stage scores each
+property from four signals, each scaled to 0-1 with NumPy over the whole
+frame:
+
+- equity       equity / value (or equity_ratio), clipped to 0-1
+- delinquency  the stronger of times_delinquent / 5 years and
+               balance_amount / value / 10%
+- condition    Step 4 condition_score / 10 (higher = worse shape)
+- vacancy      appears_vacant: yes 1, possibly 0.5, no 0; vacant land 1
+
+priority_score = 100 * weighted mean of the four. Missing inputs count as 0.
+The weights are configurable and are normalized to sum to 1:
+    --weights equity=0.4,delinquency=0.3,condition=0.2,vacancy=0.1
+
+priority_tier comes from the score (P1-CRITICAL >= 75, P2-HIGH >= 60,
+P3-GOOD >= 45, else P4-MODERATE). cash_offer_amount is value * (70% minus
+up to 15% for condition) minus the estimated repairs, never below 30% of
+the value. With no condition data and no repairs, that is the old 70%.
+value is market_value_2025, else just_value, else assessed_value, else
+100000. Step 2's original Score is kept as step2_score.
+
+create_complete_import_csv.py runs this stage on every build. Run it alone
+to re-tier the existing artifact after changing the weights:
+    python priority_scoring.py --weights condition=0.5,equity=0.5
+Columns that create_lovable_compatible_csv.py copied from the score
+(lead_score) are updated with it. The Lovable CSV and the database are not:
+re-run export_lovable_csv.py and the import afterwards.
+"""
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+from pipeline_schema import read_artifact, write_artifact, IMPORT_ARTIFACT
+from instrumentation import span
+
+DEFAULT_WEIGHTS = {"equity": 0.35, "delinquency": 0.30, "condition": 0.25, "vacancy": 0.10}
+
+DELINQUENCY_YEARS_CAP = 5       # years delinquent that count as fully delinquent
+BALANCE_RATIO_CAP = 0.10        # tax balance / value that counts as fully delinquent
+CONDITION_SCALE = 10            # Step 4 condition_score range
+
+# (minimum score, tier), highest first
+TIERS = ((75, "P1-CRITICAL"), (60, "P2-HIGH"), (45, "P3-GOOD"))
+DEFAULT_TIER = "P4-MODERATE"
+
+OFFER_RATIO = 0.70              # of value, before the condition discount
+CONDITION_DISCOUNT = 0.15       # taken off OFFER_RATIO at the worst condition
+MIN_OFFER_RATIO = 0.30
+DEFAULT_VALUE = 100000
+
+# Lovable columns create_lovable_compatible_csv.py copies from a scoring column
+DERIVED_COLUMNS = {"lead_score": "priority_score"}
+
+VALUE_COLUMNS = ("market_value_2025", "just_value", "assessed_value")
+REPAIR_COLUMNS = ("estimated_repair_cost_low", "estimated_repair_cost_high")
+
+VACANT_YES = ("true", "yes", "1", "vacant")
+VACANT_MAYBE = ("possibly vacant", "possibly", "maybe")
+
+
+def parse_weights(spec):
+    """'equity=0.4,condition=0.6' -> weights dict (unlisted signals weigh 0); ValueError on bad input"""
+    weights = dict.fromkeys(DEFAULT_WEIGHTS, 0.0)
+    for item in spec.split(","):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise ValueError(f"unknown weight '{name}' (choose from {', '.join(DEFAULT_WEIGHTS)})")
+        weights[name] = float(value)
+        if weights[name] < 0:
+            raise ValueError(f"weight '{name}' must not be negative")
+    if not sum(weights.values()):
+        raise ValueError("at least one weight must be positive")
+    return weights
+
+
+def numeric(df, *names):
+    """First of `names` present in df as a float array (NaN where missing)"""
+    for name in names:
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    return np.full(len(df), np.nan)
+
+
+def property_value(df):
+    """Per-row value: first non-missing of VALUE_COLUMNS (NaN when none)"""
+    value = np.full(len(df), np.nan)
+    for name in VALUE_COLUMNS:
+        value = np.where(np.isnan(value) | (value <= 0), numeric(df, name), value)
+    return np.where(value > 0, value, np.nan)
+
+
+def vacancy_flags(df):
+    """appears_vacant (bool or Step 4 free text) -> 1 / 0.5 / 0; vacant land -> 1"""
+    vacancy = np.zeros(len(df))
+    if "appears_vacant" in df.columns:
+        codes, uniques = pd.factorize(df["appears_vacant"].astype("string").str.strip().str.lower())
+        levels = np.array([
+            1.0 if text.startswith(VACANT_YES) else 0.5 if text.startswith(VACANT_MAYBE) and "occupied" not in text else 0.0
+            for text in uniques
+        ] + [0.0])
+        vacancy = levels[codes]   # code -1 (missing) takes the trailing 0
+    if "condition_category" in df.columns:
+        vacancy = np.where(df["condition_category"].astype("string").eq("VACANT LAND").fillna(False).to_numpy(), 1.0, vacancy)
+    return vacancy
+
+
+def components(df):
+    """The four 0-1 signals, one array each"""
+    value = property_value(df)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        equity = numeric(df, "equity", "equity_estimate") / value
+        equity = np.where(np.isnan(equity), numeric(df, "equity_ratio"), equity)
+
+        years = numeric(df, "times_delinquent", "years_delinquent") / DELINQUENCY_YEARS_CAP
+        balance = numeric(df, "balance_amount", "total_tax_due") / value / BALANCE_RATIO_CAP
+        delinquency = np.fmax(years, balance)
+
+        condition = numeric(df, "condition_score") / CONDITION_SCALE
+
+    return {
+        "equity": np.clip(np.nan_to_num(equity), 0, 1),
+        "delinquency": np.clip(np.nan_to_num(delinquency), 0, 1),
+        "condition": np.clip(np.nan_to_num(condition), 0, 1),
+        "vacancy": vacancy_flags(df),
+    }
+
+
+def priority_scores(signals, weights):
+    """Weighted 0-100 score from components()"""
+    total = sum(weights.values())
+    score = sum(signals[name] * (weight / total) for name, weight in weights.items())
+    return np.round(score * 100, 1)
+
+
+def assign_tiers(scores):
+    return np.select([scores >= minimum for minimum, _ in TIERS], [tier for _, tier in TIERS], DEFAULT_TIER)
+
+
+def offer_amounts(df, condition=None):
+    """Cash offer per row: value * (70% - condition discount) - repairs, floored at 30% of value"""
+    if condition is None:
+        condition = components(df)["condition"]
+    value = np.nan_to_num(property_value(df), nan=DEFAULT_VALUE)
+    repairs = numeric(df, "estimated_repair_cost")
+    low, high = (numeric(df, name) for name in REPAIR_COLUMNS)
+    repairs = np.where(np.isnan(repairs), np.where(np.isnan(high), low, np.where(np.isnan(low), high, (low + high) / 2)), repairs)
+    offer = value * (OFFER_RATIO - CONDITION_DISCOUNT * condition) - np.nan_to_num(repairs)
+    return np.maximum(offer, value * MIN_OFFER_RATIO).astype(np.int64)
+
+
+def score_frame(df, weights=None):
+    """
+    Add priority_score, priority_tier and cash_offer_amount to `df` (in place)
+
+    The first run keeps Step 2's priority_score as step2_score; later runs
+    (re-tiering) just overwrite the computed columns, and the DERIVED_COLUMNS
+    already in `df`.
+    """
+    weights = weights or DEFAULT_WEIGHTS
+    with span("scoring.priority", "merge") as s:
+        if "priority_score" in df.columns and "step2_score" not in df.columns:
+            df["step2_score"] = df["priority_score"]
+        signals = components(df)
+        scores = priority_scores(signals, weights)
+        df["priority_score"] = scores
+        df["priority_tier"] = pd.Categorical(assign_tiers(scores), categories=[tier for _, tier in TIERS] + [DEFAULT_TIER])
+        df["cash_offer_amount"] = offer_amounts(df, signals["condition"])
+        for derived, column in DERIVED_COLUMNS.items():
+            if derived in df.columns:
+                df[derived] = df[column]
+        s.add(rows=len(df))
+    return df
+
+
+def weights_from_args(argv):
+    """--weights SPEC from the command line (DEFAULT_WEIGHTS without it); exits on a bad spec"""
+    if "--weights" not in argv:
+        return DEFAULT_WEIGHTS
+    try:
+        return parse_weights(argv[argv.index("--weights") + 1])
+    except (IndexError, ValueError) as e:
+        print(f"[ERROR] Invalid --weights: {e}")
+        sys.exit(1)
+
+
+def print_tiers(df):
+    counts = df["priority_tier"].value_counts()
+    for _, tier in TIERS + ((None, DEFAULT_TIER),):
+        print(f"  {tier}: {int(counts.get(tier, 0))}")
+
+
+def main():
+    weights = weights_from_args(sys.argv)
+    df = read_artifact(IMPORT_ARTIFACT)
+    print(f"Loaded: {len(df)} rows")
+    print("Weights: " + ", ".join(f"{name}={weight:g}" for name, weight in weights.items()))
+
+    score_frame(df, weights)
+    print_tiers(df)
+    print(f"Median offer: {int(df['cash_offer_amount'].median()) if len(df) else 0}")
+
+    output_path = write_artifact(df, IMPORT_ARTIFACT)
+    print(f"\n[OK] {output_path} re-tiered")
+    print("[OK] Run export_lovable_csv.py (and the import) to publish the new scores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+"""
+Streaming data-quality profiler for pipeline CSV/Parquet files
+
+One pass over the file computes, per column: null rate, distinct count
+(exact up to a threshold, then HyperLogLog), min/max (value for numeric
+columns, length for text), values that don't parse as the registered
+number/flag kind (counted apart from nulls), plus duplicate account keys,
+BOM/encoding and header anomalies. Writes a JSON report and exits non-zero
+when the file fails the gate, so it can run after every pipeline stage.
+
+Duplicate keys are found from a 64-bit hash per row (8 bytes, sorted at the
+end), not a set of key strings. Only when there are duplicates is the key
+column read again to name a sample of them.
+
+Replaces check_csv_quality.py and verify_csv_columns.py.
+
+Usage:
+    python profile_csv.py                            # Profile the Step 5 artifact
+    python profile_csv.py path/to/file.csv           # Profile any CSV/Parquet file
+    python profile_csv.py --csv                      # Profile the exported Lovable CSV
+    python profile_csv.py --output report.json       # Report path (default: <file>.profile.json)
+    python profile_csv.py --max-null 50              # Warn above this null % (default 50)
+    python profile_csv.py --strict                   # Fail on warnings too
+    python profile_csv.py --chunksize 100000
+"""
+
+import csv
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import span
+from pipeline_schema import (
+    parse_options, artifact_path, normalize_account_key, to_boolean,
+    kind_of, ACCOUNT_KEY, ACCOUNT_KEY_SOURCES, IMPORT_ARTIFACT, LOVABLE_EXPORT_CSV, INT, FLOAT, BOOL,
+)
+
+DEFAULT_CHUNKSIZE = 50000
+DEFAULT_MAX_NULL_PCT = 50.0
+
+# Distinct values are counted exactly up to this many, then by HyperLogLog
+EXACT_DISTINCT_LIMIT = 10000
+HLL_PRECISION = 14  # 2**14 registers, ~0.8% standard error
+
+REQUIRED_COLUMNS = [ACCOUNT_KEY]
+DUPLICATE_SAMPLE_SIZE = 10
+
+UTF8_BOM = b'\xef\xbb\xbf'
+UTF16_BOMS = (b'\xff\xfe', b'\xfe\xff')
+
+
+class HyperLogLog:
+    """HyperLogLog sketch over 64-bit hashes (vectorized register updates)"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        self.registers = np.zeros(self.size, dtype=np.uint8)
+
+    def add_hashes(self, hashes):
+        """Add an array of uint64 hashes"""
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        rest = hashes & np.uint64((1 << width) - 1)
+
+        # Rank = position of the leftmost 1-bit in the remaining `width` bits
+        rank = np.full(len(rest), width + 1, dtype=np.uint8)
+        nonzero = rest > 0
+        _, exponent = np.frexp(rest[nonzero].astype(np.float64))
+        rank[nonzero] = (width - exponent + 1).astype(np.uint8)
+
+        np.maximum.at(self.registers, index, rank)
+
+    def count(self):
+        """Estimated number of distinct hashes"""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class DistinctCounter:
+    """Exact distinct count that degrades to HyperLogLog past EXACT_DISTINCT_LIMIT"""
+
+    def __init__(self):
+        self.exact = set()
+        self.sketch = None
+
+    def add(self, series):
+        values = series.dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values.astype(str), index=False).to_numpy()
+
+        if self.sketch is None:
+            self.exact.update(np.unique(hashes).tolist())
+            if len(self.exact) <= EXACT_DISTINCT_LIMIT:
+                return
+            self.sketch = HyperLogLog()
+            self.sketch.add_hashes(np.fromiter(self.exact, dtype=np.uint64, count=len(self.exact)))
+            self.exact = None
+        else:
+            self.sketch.add_hashes(hashes)
+
+    @property
+    def approximate(self):
+        return self.sketch is not None
+
+    def count(self):
+        return self.sketch.count() if self.sketch is not None else len(self.exact)
+
+
+class ColumnProfile:
+    """Running statistics for one column"""
+
+    def __init__(self, name):
+        self.name = name
+        self.kind = kind_of(name)
+        self.nulls = 0
+        self.invalid = 0
+        self.blanks = 0
+        self.distinct = DistinctCounter()
+        self.minimum = None
+        self.maximum = None
+
+    @property
+    def numeric(self):
+        return self.kind in (INT, FLOAT)
+
+    def update(self, series):
+        """Add a chunk of raw (not yet coerced) values"""
+        self.nulls += int(series.isna().sum())
+        self.distinct.add(series)
+
+        values = series.dropna()
+        if values.empty:
+            return
+
+        if self.numeric:
+            parsed = pd.to_numeric(values, errors='coerce')
+            self.invalid += int(parsed.isna().sum())
+            values = parsed.dropna()
+        elif self.kind == BOOL:
+            self.invalid += int(to_boolean(values).isna().sum())
+            return
+        else:
+            values = values.astype(str)
+            self.blanks += int((values.str.strip() == '').sum())
+            values = values.str.len()
+        if values.empty:
+            return
+
+        low, high = values.min(), values.max()
+        self.minimum = low if self.minimum is None else min(self.minimum, low)
+        self.maximum = high if self.maximum is None else max(self.maximum, high)
+
+    def report(self, rows):
+        result = {
+            'kind': self.kind,
+            'nulls': self.nulls,
+            'null_pct': round(self.nulls / rows * 100, 2) if rows else 0.0,
+            'invalid': self.invalid,
+            'distinct': self.distinct.count(),
+            'distinct_approximate': self.distinct.approximate,
+        }
+        if not self.numeric and self.kind != BOOL:
+            result['blanks'] = self.blanks
+        if self.minimum is not None:
+            prefix = '' if self.numeric else 'length_'
+            result[f'{prefix}min'] = self.minimum.item() if hasattr(self.minimum, 'item') else self.minimum
+            result[f'{prefix}max'] = self.maximum.item() if hasattr(self.maximum, 'item') else self.maximum
+        return result
+
+
+def sniff_csv(path):
+    """BOM/encoding and raw header (before pandas de-duplicates names)"""
+    with open(path, 'rb') as f:
+        first_line = f.readline()
+
+    if first_line.startswith(UTF8_BOM):
+        bom = 'utf-8-sig'
+        first_line = first_line[len(UTF8_BOM):]
+    elif first_line.startswith(UTF16_BOMS):
+        bom = 'utf-16'
+    else:
+        bom = None
+
+    try:
+        text = first_line.decode('utf-8')
+    except UnicodeDecodeError:
+        return {'bom': bom, 'encoding_ok': False}, None
+
+    header = next(csv.reader([text]), [])
+    return {'bom': bom, 'encoding_ok': True}, header
+
+
+def header_anomalies(header):
+    """Blank, duplicate, padded and unregistered column names"""
+    seen = set()
+    duplicates = []
+    for name in header:
+        if name in seen and name not in duplicates:
+            duplicates.append(name)
+        seen.add(name)
+
+    return {
+        'blank': [i for i, name in enumerate(header) if not name.strip() or name.startswith('Unnamed:')],
+        'duplicate': duplicates,
+        'whitespace': [name for name in header if name != name.strip()],
+        'unregistered': [name for name in header if name.strip() and kind_of(name) is None],
+    }
+
+
+def iter_chunks(path, chunksize, columns=None):
+    """
+    Yield raw frames from a CSV or Parquet file
+
+    Registered number and flag columns are not coerced, so ColumnProfile
+    can tell unparseable values from nulls.
+    """
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+        return
+
+    with pd.read_csv(path, chunksize=chunksize, **parse_options(columns)) as reader:
+        while True:
+            with span("csv.read_chunk", "parse", path=str(path)) as s:
+                chunk = next(reader, None)
+                if chunk is not None:
+                    s.add(rows=len(chunk))
+            if chunk is None:
+                return
+            yield chunk
+
+
+def hash_keys(keys):
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+
+def duplicate_sample(path, key_source, chunksize, duplicates):
+    """Up to DUPLICATE_SAMPLE_SIZE keys whose hash is in the sorted array `duplicates`"""
+    sample = []
+    try:
+        for chunk in iter_chunks(path, chunksize, columns=[key_source]):
+            keys = normalize_account_key(chunk[key_source]).dropna()
+            for key in keys[np.isin(hash_keys(keys), duplicates)].unique().tolist():
+                if key not in sample:
+                    sample.append(key)
+            if len(sample) >= DUPLICATE_SAMPLE_SIZE:
+                break
+    except UnicodeDecodeError:
+        pass
+    return sample[:DUPLICATE_SAMPLE_SIZE]
+
+
+def profile(path, chunksize=DEFAULT_CHUNKSIZE, max_null_pct=DEFAULT_MAX_NULL_PCT):
+    """Profile a file in one streaming pass and return the report dict"""
+    path = Path(path)
+    errors = []
+    warnings = []
+
+    if path.suffix == '.parquet':
+        import pyarrow.parquet as pq
+        encoding = {'bom': None, 'encoding_ok': True}
+        header = pq.read_schema(path).names
+    else:
+        encoding, header = sniff_csv(path)
+        if encoding['bom'] == 'utf-16':
+            errors.append('File is UTF-16 encoded (expected UTF-8)')
+            header = None
+        elif not encoding['encoding_ok']:
+            errors.append('Header is not valid UTF-8')
+
+    report = {'file': str(path), 'encoding': encoding}
+    if header is None:
+        report.update({'rows': 0, 'errors': errors, 'warnings': warnings, 'passed': False})
+        return report
+
+    anomalies = header_anomalies(header)
+    if anomalies['blank']:
+        errors.append(f"Blank column names at positions {anomalies['blank']}")
+    if anomalies['duplicate']:
+        errors.append(f"Duplicate column names: {anomalies['duplicate']}")
+    if anomalies['whitespace']:
+        warnings.append(f"Column names with surrounding whitespace: {anomalies['whitespace']}")
+    for col in REQUIRED_COLUMNS:
+        if col not in header:
+            errors.append(f"Missing required column: {col}")
+
+    key_source = next((col for col in ACCOUNT_KEY_SOURCES if col in header), None)
+    profiles = {}
+    rows = 0
+    key_hashes = []
+
+    try:
+        for chunk in iter_chunks(path, chunksize):
+            rows += len(chunk)
+            for col in chunk.columns:
+                if col not in profiles:
+                    profiles[col] = ColumnProfile(col)
+                profiles[col].update(chunk[col])
+
+            if key_source is not None:
+                key_hashes.append(hash_keys(normalize_account_key(chunk[key_source]).dropna()))
+    except UnicodeDecodeError as e:
+        encoding['encoding_ok'] = False
+        errors.append(f"Invalid UTF-8 after row {rows}: {e}")
+
+    columns = {col: p.report(rows) for col, p in profiles.items()}
+
+    hashes = np.sort(np.concatenate(key_hashes)) if key_hashes else np.empty(0, dtype=np.uint64)
+    repeated = hashes[1:] == hashes[:-1]
+    duplicate_keys = int(repeated.sum())
+    sample = []
+    if duplicate_keys:
+        sample = duplicate_sample(path, key_source, chunksize, np.unique(hashes[1:][repeated]))
+        errors.append(f"{duplicate_keys} duplicate account keys (e.g. {sample})")
+    for col, stats in columns.items():
+        if stats['null_pct'] > max_null_pct:
+            warnings.append(f"{col}: {stats['null_pct']:.1f}% null")
+        if stats['invalid']:
+            warnings.append(f"{col}: {stats['invalid']} values are not a valid {stats['kind']}")
+    if rows == 0:
+        warnings.append('File has no data rows')
+
+    report.update({
+        'rows': rows,
+        'column_count': len(header),
+        'header': header,
+        'header_anomalies': anomalies,
+        'account_key': {
+            'column': key_source,
+            'distinct': len(hashes) - duplicate_keys,
+            'duplicates': duplicate_keys,
+            'duplicate_sample': sample,
+        },
+        'columns': columns,
+        'errors': errors,
+        'warnings': warnings,
+        'passed': not errors,
+    })
+    return report
+
+
+def print_summary(report):
+    print(f"File: {report['file']}")
+    print(f"Rows: {report['rows']}")
+    if 'column_count' in report:
+        print(f"Columns: {report['column_count']}")
+    print(f"BOM: {report['encoding']['bom'] or 'none'}")
+
+    key = report.get('account_key')
+    if key and key['column']:
+        print(f"Unique account numbers: {key['distinct']} (duplicates: {key['duplicates']})")
+
+    for message in report['errors']:
+        print(f"  [ERROR] {message}")
+    for message in report['warnings']:
+        print(f"  [WARN] {message}")
+
+
+def main():
+    args = sys.argv[1:]
+
+    def option(flag, default, cast):
+        if flag not in args:
+            return default
+        try:
+            value = args[args.index(flag) + 1]
+            return cast(value)
+        except (IndexError, ValueError):
+            print(f"[ERROR] Invalid {flag} value")
+            sys.exit(2)
+
+    chunksize = option('--chunksize', DEFAULT_CHUNKSIZE, int)
+    max_null_pct = option('--max-null', DEFAULT_MAX_NULL_PCT, float)
+    output = option('--output', None, str)
+    strict = '--strict' in args
+
+    option_values = {args[args.index(flag) + 1] for flag in ('--chunksize', '--max-null', '--output') if flag in args}
+    positional = [a for a in args if not a.startswith('--') and a not in option_values]
+
+    if positional:
+        path = Path(positional[0])
+    elif '--csv' in args:
+        path = Path(LOVABLE_EXPORT_CSV)
+    else:
+        path = artifact_path(IMPORT_ARTIFACT)
+        if not path.exists():
+            path = Path(f"{IMPORT_ARTIFACT}.csv")
+
+    if not path.exists():
+        print(f"[ERROR] File not found: {path}")
+        sys.exit(2)
+
+    report = profile(path, chunksize=chunksize, max_null_pct=max_null_pct)
+    if strict and report['warnings']:
+        report['passed'] = False
+
+    output = Path(output) if output else path.with_name(f"{path.name}.profile.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    print_summary(report)
+    print(f"\nReport saved to: {output}")
+
+    if report['passed']:
+        print("[OK] Quality gate passed")
+    else:
+        print("[FAIL] Quality gate failed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+"""
+Comparable properties by distance: grid index + vectorized haversine
+
+The comps distance checks live in one-off JS scripts
+(validate-comps-distance.js, test-distance-fix.js) that take one subject
+at a time. Checking a whole export that way means one fetch-comps call
+per property. This module loads every geocoded property once, from a
+backup snapshot or the import CSV/artifact, and answers locally:
+
+    the k nearest comparable properties within R miles of a lead
+
+Properties are bucketed into a grid of cells about --cell miles wide
+(NumPy only, no scipy). A query looks at just the cells its circle
+touches, one sorted-key range per grid row, and measures the candidates
+with a single vectorized haversine. The formula and Earth radius are the
+same as compsDataService.ts and fetch-comps.
+
+A comparable has:
+- the same property type
+- bedrooms within --beds
+- living area within --sqft (as a fraction)
+
+A value missing on either side doesn't exclude a property; the exports
+are too sparse for that.
+
+For every lead with coordinates, the report lists its comps, the farthest
+one and a grade. The grade uses the validate-comps-distance.js bands:
+EXCELLENT <= 1 mi, GOOD <= 2, ACCEPTABLE <= 3, else PROBLEM. When the
+snapshot also holds cached comps (comparables_cache / comparables), each
+cached comp is re-measured from its coordinates. It is flagged when it is
+outside its search radius, or when its stored distance is off (e.g. the
+old 0.0 bug).
+
+The report goes next to the input:
+    backup_data_20260206_120000.json -> backup_data_20260206_120000.comps.csv
+
+Usage:
+    python spatial_index.py                                  # Step 5 import artifact
+    python spatial_index.py backup_data_20260206_120000.json # backup snapshot (properties + cached comps)
+    python spatial_index.py leads.csv --radius 3 --k 6 --any-type --beds 2 --sqft 0.3
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline_schema import read_pipeline_csv, read_artifact, artifact_path, IMPORT_ARTIFACT
+from priority_scoring import numeric
+from instrumentation import span
+
+EARTH_RADIUS_MILES = 3958.8      # same as compsDataService.ts / fetch-comps
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * np.pi / 180
+
+DEFAULT_RADIUS = 1.0             # fetch-comps default search radius (miles)
+DEFAULT_K = 6                    # comps shown per property
+DEFAULT_CELL_MILES = 0.5
+DEFAULT_BEDS_TOLERANCE = 1
+DEFAULT_SQFT_TOLERANCE = 0.25
+# Stored distances are rounded to 0.1 mi
+DISTANCE_TOLERANCE = 0.1
+# Subjects per distance matrix in batch queries
+BATCH_ROWS = 256
+
+# (max distance of the farthest comp, grade), best first
+GRADES = ((1.0, "EXCELLENT"), (2.0, "GOOD"), (3.0, "ACCEPTABLE"))
+WORST_GRADE = "PROBLEM"
+
+# Column choices, most specific first
+KEY_COLUMNS = ("id", "account_number", "Account_Number")
+LAT_COLUMNS = ("latitude", "lat")
+LON_COLUMNS = ("longitude", "lng", "lon")
+TYPE_COLUMNS = ("property_type", "building_type", "property_use")
+BEDS_COLUMNS = ("bedrooms", "beds")
+SQFT_COLUMNS = ("square_feet", "sqft", "living_area_sqft")
+SOURCE_COLUMNS = [*KEY_COLUMNS, *LAT_COLUMNS, *LON_COLUMNS, *TYPE_COLUMNS, *BEDS_COLUMNS, *SQFT_COLUMNS]
+
+PROPERTIES_TABLE = "properties"
+# Cached comps in a snapshot: table -> stored distance column
+COMPS_TABLES = {"comparables_cache": "distance", "comparables": "distance_miles"}
+
+
+def haversine_miles(lat1, lon1, lat2, lon2):
+    """Great-circle distance in miles; any argument may be an array (broadcast)"""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_MILES * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def first_column(df, names):
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(pd.NA, index=df.index, dtype="object")
+
+
+def coordinates(df):
+    """(lat, lon) float arrays; NaN where missing, out of range or the 0,0 placeholder"""
+    lat = numeric(df, *LAT_COLUMNS)
+    lon = numeric(df, *LON_COLUMNS)
+    with np.errstate(invalid="ignore"):
+        bad = (np.abs(lat) > 90) | (np.abs(lon) > 180) | ((lat == 0) & (lon == 0))
+    return np.where(bad, np.nan, lat), np.where(bad, np.nan, lon)
+
+
+def grade(max_distance):
+    """Grade of a comp set from its farthest comp (NaN -> no comps -> PROBLEM)"""
+    return np.select([max_distance <= limit for limit, _ in GRADES], [name for _, name in GRADES], WORST_GRADE)
+
+
+class GridIndex:
+    """
+    Points bucketed into cells about `cell_miles` on a side
+
+    Cell keys are row * width + column, sorted once. The cells of one grid
+    row that a query circle touches form one contiguous key range, so a
+    query is a searchsorted per row plus one haversine over the points found.
+    Cells are sized at the highest latitude in the data, so they are never
+    narrower than `cell_miles`. (No wrap-around at the antimeridian.)
+    """
+
+    def __init__(self, lat, lon, cell_miles=DEFAULT_CELL_MILES):
+        lat = np.asarray(lat, dtype=float)
+        lon = np.asarray(lon, dtype=float)
+        self.positions = np.flatnonzero(~(np.isnan(lat) | np.isnan(lon)))
+        self.lat = lat[self.positions]
+        self.lon = lon[self.positions]
+
+        self.lat_step = cell_miles / MILES_PER_DEGREE
+        widest = min(float(np.abs(self.lat).max()), 89.0) if len(self.lat) else 0.0
+        self.lon_step = self.lat_step / np.cos(np.radians(widest))
+
+        rows = np.floor(self.lat / self.lat_step).astype(np.int64)
+        cols = np.floor(self.lon / self.lon_step).astype(np.int64)
+        self.row0 = int(rows.min()) if len(rows) else 0
+        self.col0 = int(cols.min()) if len(cols) else 0
+        self.rows = int(rows.max()) - self.row0 + 1 if len(rows) else 0
+        self.width = int(cols.max()) - self.col0 + 1 if len(cols) else 0
+
+        keys = (rows - self.row0) * self.width + (cols - self.col0)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def candidates(self, lat_min, lat_max, lon_min, lon_max, radius):
+        """Entries (into self.lat/lon) of every cell within `radius` miles of the box"""
+        dlat = radius / MILES_PER_DEGREE
+        dlon = dlat / np.cos(np.radians(min(max(abs(lat_min), abs(lat_max)) + dlat, 89.0)))
+        row_lo = max(int(np.floor((lat_min - dlat) / self.lat_step)) - self.row0, 0)
+        row_hi = min(int(np.floor((lat_max + dlat) / self.lat_step)) - self.row0, self.rows - 1)
+        col_lo = max(int(np.floor((lon_min - dlon) / self.lon_step)) - self.col0, 0)
+        col_hi = min(int(np.floor((lon_max + dlon) / self.lon_step)) - self.col0, self.width - 1)
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.empty(0, dtype=np.int64)
+        base = np.arange(row_lo, row_hi + 1, dtype=np.int64) * self.width
+        starts = np.searchsorted(self.keys, base + col_lo, side="left")
+        ends = np.searchsorted(self.keys, base + col_hi, side="right")
+        return np.concatenate([self.order[start:end] for start, end in zip(starts, ends)])
+
+    def cells(self):
+        """Entries of each occupied cell (for batch queries: neighbours share candidates)"""
+        return np.split(self.order, np.flatnonzero(np.diff(self.keys)) + 1)
+
+    def within(self, lat, lon, radius):
+        """(positions, distances) of the points within `radius` miles, nearest first"""
+        entries = self.candidates(lat, lat, lon, lon, radius)
+        distances = haversine_miles(lat, lon, self.lat[entries], self.lon[entries])
+        inside = distances <= radius
+        entries, distances = entries[inside], distances[inside]
+        nearest = np.argsort(distances, kind="stable")
+        return self.positions[entries[nearest]], distances[nearest]
+
+    def nearest(self, lat, lon, k=DEFAULT_K, radius=DEFAULT_RADIUS, keep=None):
+        """
+        Up to k (positions, distances) within `radius` miles, nearest first
+
+        `keep(positions)` may return a boolean mask to filter the candidates.
+        """
+        positions, distances = self.within(lat, lon, radius)
+        if keep is not None and len(positions):
+            mask = keep(positions)
+            positions, distances = positions[mask], distances[mask]
+        return positions[:k], distances[:k]
+
+
+class Comparables:
+    """Properties of a frame, indexed for comparable lookups by row position"""
+
+    def __init__(self, df, cell_miles=DEFAULT_CELL_MILES):
+        self.df = df
+        self.keys = first_column(df, KEY_COLUMNS).astype("string").to_numpy(dtype=object, na_value=None)
+        self.lat, self.lon = coordinates(df)
+        self.types, _ = pd.factorize(first_column(df, TYPE_COLUMNS).astype("string").str.strip().str.upper())
+        self.beds = numeric(df, *BEDS_COLUMNS)
+        sqft = numeric(df, *SQFT_COLUMNS)
+        self.sqft = np.where(sqft > 0, sqft, np.nan)
+        with span("comps.index", "parse") as s:
+            self.index = GridIndex(self.lat, self.lon, cell_miles)
+            s.add(rows=len(self.index))
+
+    def located(self):
+        """Row positions that have coordinates"""
+        return self.index.positions
+
+    def comparable(self, subjects, candidates, same_type=True,
+                   beds=DEFAULT_BEDS_TOLERANCE, sqft=DEFAULT_SQFT_TOLERANCE):
+        """Boolean matrix: candidates (columns) comparable to each subject (rows); NaN never excludes"""
+        subjects = subjects[:, None]
+        mask = subjects != candidates
+        if same_type:
+            types = self.types[candidates]
+            mask &= (self.types[subjects] == types) | (self.types[subjects] < 0) | (types < 0)
+        if beds is not None:
+            mask &= ~(np.abs(self.beds[candidates] - self.beds[subjects]) > beds)
+        if sqft is not None:
+            mask &= ~(np.abs(self.sqft[candidates] - self.sqft[subjects]) > sqft * self.sqft[subjects])
+        return mask
+
+    def comps(self, position, k=DEFAULT_K, radius=DEFAULT_RADIUS, **filters):
+        """(positions, distances) of the k nearest comparables of row `position`"""
+        subject = np.array([position])
+        return self.index.nearest(self.lat[position], self.lon[position], k, radius,
+                                  lambda candidates: self.comparable(subject, candidates, **filters)[0])
+
+    def all_comps(self, k=DEFAULT_K, radius=DEFAULT_RADIUS, batch=BATCH_ROWS, **filters):
+        """
+        Yield (position, comp positions, distances) for every located property
+
+        Same result as comps() per property, but one grid cell at a time:
+        the cell's properties share one candidate list, so distances and
+        filters are computed as one (subjects x candidates) matrix. The search
+        starts one cell wide and doubles up to `radius` only for properties
+        still short of k comps, so dense areas never scan the full circle.
+        """
+        index = self.index
+        start = min(radius, index.lat_step * MILES_PER_DEGREE)
+        for cell in index.cells():
+            pending = cell
+            reach = start
+            while len(pending):
+                final = reach >= radius
+                lat, lon = index.lat[pending], index.lon[pending]
+                entries = index.candidates(lat.min(), lat.max(), lon.min(), lon.max(), reach)
+                short = []
+                for chunk in range(0, len(pending), batch):
+                    rows = slice(chunk, chunk + batch)
+                    for entry, found, distances in self._nearest(pending[rows], entries, k, reach, filters):
+                        if final or len(found) == k:
+                            yield index.positions[entry], found, distances
+                        else:
+                            short.append(entry)
+                pending = np.array(short, dtype=np.int64)
+                reach = min(reach * 2, radius)
+
+    def _nearest(self, subject_entries, entries, k, radius, filters):
+        """(subject entry, comp positions, distances) for each subject, from one distance matrix"""
+        index = self.index
+        subjects = index.positions[subject_entries]
+        candidates = index.positions[entries]
+        distances = haversine_miles(index.lat[subject_entries, None], index.lon[subject_entries, None],
+                                    index.lat[entries], index.lon[entries])
+        distances[~((distances <= radius) & self.comparable(subjects, candidates, **filters))] = np.inf
+        if distances.shape[1] > k:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            nearest = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+        picked = np.take_along_axis(distances, nearest, axis=1)
+        ordered = np.argsort(picked, axis=1, kind="stable")
+        nearest = np.take_along_axis(nearest, ordered, axis=1)
+        picked = np.take_along_axis(picked, ordered, axis=1)
+        for entry, columns, found in zip(subject_entries, nearest, picked):
+            inside = np.isfinite(found)
+            yield entry, candidates[columns[inside]], found[inside]
+
+
+def nearest_comps(comparables, k=DEFAULT_K, radius=DEFAULT_RADIUS, **filters):
+    """One row per located property: its comps (keys and distances), farthest comp and grade"""
+    rows = []
+    keys = comparables.keys
+    with span("comps.nearest", "merge") as s:
+        for position, found, distances in comparables.all_comps(k, radius, **filters):
+            rows.append((
+                position,
+                keys[position],
+                len(found),
+                round(float(distances[0]), 3) if len(found) else np.nan,
+                round(float(distances[-1]), 3) if len(found) else np.nan,
+                ";".join(str(keys[p]) for p in found),
+                ";".join(f"{d:.2f}" for d in distances),
+            ))
+        s.add(rows=len(rows))
+    report = pd.DataFrame(rows, columns=["position", "key", "comps", "nearest_miles", "farthest_miles",
+                                         "comp_keys", "comp_miles"])
+    report = report.sort_values("position", kind="stable").drop(columns="position").reset_index(drop=True)
+    report["grade"] = grade(report["farthest_miles"].to_numpy())
+    report.loc[report["comps"] == 0, "grade"] = "NO COMPS"
+    return report
+
+
+def validate_cached(properties, comps, distance_column, radius=DEFAULT_RADIUS):
+    """
+    Re-measure cached comps against their subject property (vectorized)
+
+    Returns one row per subject: cached comps, farthest real distance,
+    comps outside the search radius, comps whose stored distance is off,
+    comps without coordinates, and the grade.
+    """
+    with span("comps.validate", "merge") as s:
+        subject_lat, subject_lon = coordinates(properties)
+        subjects = pd.DataFrame({"lat": subject_lat, "lon": subject_lon},
+                                index=first_column(properties, KEY_COLUMNS).astype("string"))
+        subjects = subjects[~subjects.index.duplicated()]
+
+        property_ids = comps["property_id"].astype("string")
+        subject = subjects.reindex(property_ids)
+        comp_lat, comp_lon = coordinates(comps)
+        actual = haversine_miles(subject["lat"].to_numpy(), subject["lon"].to_numpy(), comp_lat, comp_lon)
+        stored = numeric(comps, distance_column)
+        limit = np.nan_to_num(numeric(comps, "search_radius"), nan=radius)
+
+        checks = pd.DataFrame({
+            "key": property_ids.to_numpy(),
+            "actual": actual,
+            "missing_coords": np.isnan(actual),
+            "outside_radius": actual > limit + DISTANCE_TOLERANCE,
+            "distance_off": np.abs(stored - actual) > DISTANCE_TOLERANCE,
+        })
+        grouped = checks.groupby("key", sort=False)
+        report = pd.DataFrame({
+            "cached_comps": grouped.size(),
+            "cached_farthest_miles": grouped["actual"].max().round(3),
+            "cached_outside_radius": grouped["outside_radius"].sum(),
+            "cached_distance_off": grouped["distance_off"].sum(),
+            "cached_missing_coords": grouped["missing_coords"].sum(),
+        })
+        report["cached_grade"] = grade(report["cached_farthest_miles"].to_numpy())
+        s.add(rows=len(checks))
+    return report.reset_index()
+
+
+def load_source(path):
+    """(properties frame, {comps table: rows frame}) from a snapshot, CSV or the import artifact"""
+    if path is None:
+        return read_artifact(IMPORT_ARTIFACT, columns=SOURCE_COLUMNS), {}
+    if path.suffix.lower() == ".json":
+        from lead_scoring import load_snapshot
+
+        tables = load_snapshot(path)
+        comps = {table: pd.DataFrame(tables[table]) for table in COMPS_TABLES if tables.get(table)}
+        return pd.DataFrame(tables.get(PROPERTIES_TABLE, [])), comps
+    return read_pipeline_csv(path), {}
+
+
+def print_summary(report, located, total, k, radius):
+    print(f"📍 {located} of {total} properties have coordinates")
+    full = int((report["comps"] >= k).sum())
+    print(f"📊 {full} have {k} comps within {radius:g} mi, {int((report['comps'] == 0).sum())} have none")
+    for name in [name for _, name in GRADES] + [WORST_GRADE, "NO COMPS"]:
+        print(f"   {name:<11} {int((report['grade'] == name).sum()):>7}")
+
+
+def main():
+    options = ("--radius", "--k", "--beds", "--sqft", "--cell")
+    args = [arg for i, arg in enumerate(sys.argv[1:], 1)
+            if not arg.startswith("--") and sys.argv[i - 1] not in options]
+    radius = float(sys.argv[sys.argv.index("--radius") + 1]) if "--radius" in sys.argv else DEFAULT_RADIUS
+    k = int(sys.argv[sys.argv.index("--k") + 1]) if "--k" in sys.argv else DEFAULT_K
+    beds = float(sys.argv[sys.argv.index("--beds") + 1]) if "--beds" in sys.argv else DEFAULT_BEDS_TOLERANCE
+    sqft = float(sys.argv[sys.argv.index("--sqft") + 1]) if "--sqft" in sys.argv else DEFAULT_SQFT_TOLERANCE
+    cell_miles = float(sys.argv[sys.argv.index("--cell") + 1]) if "--cell" in sys.argv else DEFAULT_CELL_MILES
+    same_type = "--any-type" not in sys.argv
+
+    input_path = Path(args[0]) if args else None
+    if input_path is not None and not input_path.exists():
+        print(f"❌ Input not found: {input_path}")
+        sys.exit(1)
+    properties, cached = load_source(input_path)
+    input_path = input_path or artifact_path(IMPORT_ARTIFACT)
+    print(f"Loaded: {input_path} ({len(properties)} properties)")
+
+    started = time.perf_counter()
+    comparables = Comparables(properties, cell_miles)
+    report = nearest_comps(comparables, k, radius, same_type=same_type, beds=beds, sqft=sqft)
+    print_summary(report, len(comparables.located()), len(properties), k, radius)
+
+    for table, rows in cached.items():
+        checked = validate_cached(properties, rows, COMPS_TABLES[table], radius)
+        print(f"🔍 {table}: {int(checked['cached_comps'].sum())} cached comps for {len(checked)} properties")
+        print(f"   {int(checked['cached_outside_radius'].sum())} outside their search radius, "
+              f"{int(checked['cached_distance_off'].sum())} with a wrong stored distance, "
+              f"{int(checked['cached_missing_coords'].sum())} without coordinates")
+        report = report.merge(checked.add_prefix(f"{table}.").rename(columns={f"{table}.key": "key"}),
+                              on="key", how="outer")
+    print(f"⏱️  {time.perf_counter() - started:.2f}s")
+
+    report_path = input_path.with_name(f"{input_path.stem}.comps.csv")
+    report.to_csv(report_path, index=False)
+    print(f"📝 Report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
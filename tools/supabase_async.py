@@ -0,0 +1,222 @@
+"""
+Asyncio transport for bulk PostgREST and Storage I/O (httpx.AsyncClient)
+
+Keeps hundreds of requests in flight from one process instead of one at a
+time. Retries, backoff and rate limiting follow supabase_client.py; on top of
+that there is a global concurrency semaphore and a per-host connection
+limit on the httpx pool.
+
+Async API:
+
+    async with AsyncSupabaseClient(SUPABASE_URL, SUPABASE_KEY) as client:
+        async for page in client.paginate("properties", select="id,origem"):
+            ...
+        results = await client.upsert_batches("priority_leads", rows, on_conflict="account_number")
+
+Sync facade (keeps the existing CLI entry points blocking):
+
+    results = bulk_upsert(SUPABASE_URL, SUPABASE_KEY, "priority_leads", rows, on_conflict="account_number")
+    results = bulk_upload(SUPABASE_URL, SUPABASE_KEY, "property-images", [(name, path), ...])
+    rows = fetch_all(SUPABASE_URL, SUPABASE_KEY, "properties", select="id,origem")
+
+Results are BulkResult(item, status_code, text, error) in input order, so
+callers keep their own status-code handling.
+"""
+
+import asyncio
+import os
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import httpx
+
+from instrumentation import span, count
+from supabase_client import (
+    RETRY_STATUSES, DEFAULT_RATE_LIMIT, DEFAULT_MAX_RETRIES, backoff_delay, retry_after, is_idempotent,
+)
+
+DEFAULT_CONCURRENCY = int(os.getenv("SUPABASE_CONCURRENCY", "32"))
+DEFAULT_PER_HOST = int(os.getenv("SUPABASE_PER_HOST", "16"))
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_BATCH_SIZE = 500
+
+BulkResult = namedtuple("BulkResult", ["item", "status_code", "text", "error"])
+
+
+class AsyncTokenBucket:
+    """Token bucket for coroutines: `rate` tokens/second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self, tokens=1):
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AsyncSupabaseClient:
+    """Concurrent, rate-limited, retrying client for one Supabase project"""
+
+    def __init__(self, url, key, concurrency=DEFAULT_CONCURRENCY, per_host=DEFAULT_PER_HOST,
+                 rate_limit=DEFAULT_RATE_LIMIT, max_retries=DEFAULT_MAX_RETRIES, timeout=60.0):
+        self.url = url.rstrip("/")
+        self.max_retries = max_retries
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = AsyncTokenBucket(rate_limit)
+        self.stats = {"requests": 0, "retries": 0}
+        self.http = httpx.AsyncClient(
+            base_url=self.url,
+            headers={"apikey": key, "Authorization": f"Bearer {key}"},
+            limits=httpx.Limits(max_connections=per_host, max_keepalive_connections=per_host),
+            timeout=httpx.Timeout(timeout, connect=5.0),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await self.http.aclose()
+
+    async def request(self, method, path, retry=None, **kwargs):
+        """Send one request (path relative to the project URL); retry rules as SupabaseClient.request"""
+        if retry is None:
+            retry = is_idempotent(method, kwargs.get("headers"))
+        async with self.semaphore:
+            with span(f"http.{method}", "network", path=path) as s:
+                for attempt in range(self.max_retries + 1):
+                    await self.bucket.acquire()
+                    self.stats["requests"] += 1
+                    try:
+                        response = await self.http.request(method, path, **kwargs)
+                    except (httpx.TransportError, httpx.TimeoutException) as e:
+                        sent = not isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                        if attempt == self.max_retries or (sent and not retry):
+                            raise
+                        delay = backoff_delay(attempt)
+                    else:
+                        retryable = response.status_code == 429 or (retry and response.status_code in RETRY_STATUSES)
+                        if not retryable or attempt == self.max_retries:
+                            s.add(bytes=len(response.request.content) + len(response.content))
+                            return response
+                        delay = retry_after(response)
+                        if delay is None:
+                            delay = backoff_delay(attempt)
+
+                    self.stats["retries"] += 1
+                    count("http.retries")
+                    await asyncio.sleep(delay)
+
+    async def paginate(self, table, select="*", params=None, page_size=DEFAULT_PAGE_SIZE, order="id"):
+        """Yield pages (lists of rows) of a table; `order` keeps offsets stable"""
+        offset = 0
+        while True:
+            query = [("select", select), ("order", order), ("offset", str(offset)), ("limit", str(page_size))]
+            query.extend(params.items() if isinstance(params, dict) else params or [])
+            response = await self.request("GET", f"/rest/v1/{table}", params=query)
+            response.raise_for_status()
+            rows = response.json()
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            offset += page_size
+
+    async def _send(self, item, method, path, **kwargs):
+        """Run one request and capture its outcome as a BulkResult"""
+        try:
+            response = await self.request(method, path, **kwargs)
+            return BulkResult(item, response.status_code, response.text, None)
+        except Exception as e:
+            return BulkResult(item, None, None, e)
+
+    async def upsert_batches(self, table, rows, on_conflict=None, batch_size=DEFAULT_BATCH_SIZE,
+                             ignore_duplicates=False):
+        """Upsert rows in concurrent batches; one BulkResult per batch (item = the batch)"""
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        headers = {"Prefer": f"return=minimal,resolution={resolution}"}
+        params = {"on_conflict": on_conflict} if on_conflict else None
+        batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+        return await asyncio.gather(*(
+            self._send(batch, "POST", f"/rest/v1/{table}", json=batch, headers=headers, params=params)
+            for batch in batches
+        ))
+
+    async def upload_files(self, bucket, items, content_type="image/jpeg", upsert=False):
+        """
+        Upload (object_name, local_path) pairs concurrently; one BulkResult per item
+
+        A 409 status means the object already exists (when upsert=False).
+        """
+        headers = {"Content-Type": content_type}
+        if upsert:
+            headers["x-upsert"] = "true"
+        # Bounds how many files are held in memory, not just how many are on the wire
+        files_in_flight = asyncio.Semaphore(self.concurrency)
+
+        async def upload(item):
+            name, path = item
+            async with files_in_flight:
+                try:
+                    with span("file.read", "disk") as s:
+                        data = await asyncio.to_thread(Path(path).read_bytes)
+                        s.add(bytes=len(data))
+                except OSError as e:
+                    return BulkResult(item, None, None, e)
+                # Resending can only turn a lost success into a 409 for an object that exists
+                return await self._send(item, "POST", f"/storage/v1/object/{bucket}/{name}",
+                                        content=data, headers=headers, retry=True)
+
+        return await asyncio.gather(*(upload(item) for item in items))
+
+
+# Sync facade ---------------------------------------------------------------
+
+def _run(url, key, work, **options):
+    """Run `work(client)` on a fresh event loop and close the client afterwards"""
+    async def main():
+        async with AsyncSupabaseClient(url, key, **options) as client:
+            return await work(client)
+    return asyncio.run(main())
+
+
+def bulk_upsert(url, key, table, rows, on_conflict=None, batch_size=DEFAULT_BATCH_SIZE,
+                ignore_duplicates=False, **options):
+    """Blocking wrapper around AsyncSupabaseClient.upsert_batches"""
+    return _run(url, key, lambda client: client.upsert_batches(
+        table, rows, on_conflict=on_conflict, batch_size=batch_size, ignore_duplicates=ignore_duplicates
+    ), **options)
+
+
+def bulk_upload(url, key, bucket, items, content_type="image/jpeg", upsert=False, **options):
+    """Blocking wrapper around AsyncSupabaseClient.upload_files"""
+    return _run(url, key, lambda client: client.upload_files(
+        bucket, items, content_type=content_type, upsert=upsert
+    ), **options)
+
+
+def fetch_all(url, key, table, select="*", params=None, page_size=DEFAULT_PAGE_SIZE, order="id", **options):
+    """Blocking wrapper: every row of `table` via paginated reads"""
+    async def work(client):
+        rows = []
+        async for page in client.paginate(table, select=select, params=params, page_size=page_size, order=order):
+            rows.extend(page)
+        return rows
+    return _run(url, key, work, **options)
@@ -0,0 +1,393 @@
+"""
+Shared Supabase client for the Python tools (PostgREST + Storage over HTTP)
+
+One pooled keep-alive requests.Session per (project URL, key), with:
+- Connect/read timeouts on every request
+- Retry with exponential backoff + full jitter on 429/5xx and connection
+  errors (Retry-After is honoured when the server sends it), for requests
+  that are safe to resend: GET/HEAD/PUT/DELETE and PostgREST upserts. Other
+  POSTs and PATCHes (plain inserts, function calls) are only retried on 429
+  and connect timeouts, where the server never acted; pass retry=True/False
+  to override
+- A token bucket shared by all threads so bursty imports stay under the
+  project's rate limit
+
+Two ways to use it:
+
+    client = get_client(SUPABASE_URL, SUPABASE_KEY)
+
+    # Raw HTTP (returns requests.Response; status handling stays with the caller)
+    response = client.post("rest/v1/priority_leads", json=rows, params={"on_conflict": "account_number"})
+
+    # supabase-py style subset (returns APIResponse, raises SupabaseError on 4xx/5xx)
+    client.table("properties").select("id").eq("account_number", account).execute()
+    client.storage.from_("property-images").upload(path, data, {"content-type": "image/jpeg"})
+
+Tuning via environment: SUPABASE_RATE_LIMIT (requests/second, default 20),
+SUPABASE_MAX_RETRIES (default 5), SUPABASE_POOL_SIZE (default 16).
+"""
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from instrumentation import span, count
+
+DEFAULT_TIMEOUT = (5, 60)  # (connect, read) seconds
+DEFAULT_RATE_LIMIT = float(os.getenv("SUPABASE_RATE_LIMIT", "20"))
+DEFAULT_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "5"))
+DEFAULT_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "16"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 30.0
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class SupabaseError(Exception):
+    """HTTP error from PostgREST or Storage"""
+
+    def __init__(self, response):
+        self.status_code = response.status_code
+        self.response = response
+        super().__init__(f"{response.status_code}: {response.text[:300]}")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens/second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """Block until `tokens` are available (no-op when rate <= 0)"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_idempotent(method, headers=None):
+    """Safe to resend after the server may already have acted: idempotent methods and upserts"""
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    prefer = (headers or {}).get("Prefer", "")
+    return "resolution=merge-duplicates" in prefer or "resolution=ignore-duplicates" in prefer
+
+
+def backoff_delay(attempt):
+    """Exponential backoff with full jitter for retry number `attempt` (0-based)"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+
+def retry_after(response):
+    """Seconds from a Retry-After header (delta or HTTP date), or None"""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(BACKOFF_CAP, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        return min(BACKOFF_CAP, max(0.0, parsedate_to_datetime(value).timestamp() - time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class APIResponse:
+    """Result of a PostgREST query (mirrors supabase-py's .data / .count)"""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class SupabaseClient:
+    """Pooled, rate-limited, retrying HTTP client for one Supabase project"""
+
+    def __init__(self, url, key, timeout=DEFAULT_TIMEOUT, rate_limit=DEFAULT_RATE_LIMIT,
+                 max_retries=DEFAULT_MAX_RETRIES, pool_size=DEFAULT_POOL_SIZE):
+        self.url = url.rstrip("/")
+        self.key = key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.bucket = TokenBucket(rate_limit)
+        self.stats = {"requests": 0, "retries": 0}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept-Encoding": "gzip, deflate",
+            "Connection": "keep-alive",
+        })
+
+        self.storage = StorageClient(self)
+
+    def request(self, method, path, retry=None, **kwargs):
+        """
+        Send a request relative to the project URL (or to an absolute URL)
+
+        Retries 429/5xx responses and connection errors when `retry` (default:
+        is_idempotent); otherwise only 429 and connect timeouts. The last
+        response is returned as-is so callers keep their own status handling.
+        """
+        if retry is None:
+            retry = is_idempotent(method, kwargs.get("headers"))
+        url = path if path.startswith("http") else f"{self.url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", self.timeout)
+
+        # A file object can only be read once - buffer it so retries resend the body
+        if hasattr(kwargs.get("data"), "read"):
+            kwargs["data"] = kwargs["data"].read()
+
+        with span(f"http.{method}", "network", path=path.split("?", 1)[0]) as s:
+            for attempt in range(self.max_retries + 1):
+                self.bucket.acquire()
+                self.stats["requests"] += 1
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    if attempt == self.max_retries or not (retry or isinstance(e, requests.ConnectTimeout)):
+                        raise
+                    delay = backoff_delay(attempt)
+                else:
+                    retryable = response.status_code == 429 or (retry and response.status_code in RETRY_STATUSES)
+                    if not retryable or attempt == self.max_retries:
+                        s.add(bytes=len(response.request.body or b"") + len(response.content))
+                        return response
+                    delay = retry_after(response)
+                    if delay is None:
+                        delay = backoff_delay(attempt)
+
+                self.stats["retries"] += 1
+                count("http.retries")
+                time.sleep(delay)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.request("POST", path, **kwargs)
+
+    def patch(self, path, **kwargs):
+        return self.request("PATCH", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.request("DELETE", path, **kwargs)
+
+    def table(self, name):
+        """PostgREST query builder for `name`"""
+        return QueryBuilder(self, name)
+
+    def rpc(self, function, params=None):
+        """Call a Postgres function via /rest/v1/rpc"""
+        response = self.post(f"rest/v1/rpc/{function}", json=params or {})
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return APIResponse(response.json() if response.content else None)
+
+
+def _quote(value):
+    """PostgREST filter literal (quoted when it contains reserved characters)"""
+    if value is None:
+        return "null"
+    text = str(value).lower() if isinstance(value, bool) else str(value)
+    if any(ch in text for ch in ',()".: '):
+        return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return text
+
+
+class QueryBuilder:
+    """Subset of supabase-py's fluent PostgREST API used by the tools"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.method = "GET"
+        self.params = []
+        self.headers = {}
+        self.body = None
+        self.retry = None
+
+    # Operations
+    def select(self, columns="*", count=None):
+        self.method = "GET"
+        self.params.append(("select", columns))
+        if count:
+            self.headers["Prefer"] = f"count={count}"
+        return self
+
+    def insert(self, rows, returning="minimal"):
+        self.method = "POST"
+        self.body = rows
+        self.retry = False   # a resent insert after a lost response duplicates the rows
+        self.headers["Prefer"] = f"return={returning}"
+        return self
+
+    def upsert(self, rows, on_conflict=None, ignore_duplicates=False, returning="minimal"):
+        self.method = "POST"
+        self.body = rows
+        resolution = "ignore-duplicates" if ignore_duplicates else "merge-duplicates"
+        self.headers["Prefer"] = f"return={returning},resolution={resolution}"
+        if on_conflict:
+            self.params.append(("on_conflict", on_conflict))
+        return self
+
+    def update(self, values, returning="minimal"):
+        self.method = "PATCH"
+        self.body = values
+        self.headers["Prefer"] = f"return={returning}"
+        return self
+
+    def delete(self, returning="minimal"):
+        self.method = "DELETE"
+        self.headers["Prefer"] = f"return={returning}"
+        return self
+
+    # Filters
+    def eq(self, column, value):
+        self.params.append((column, f"eq.{_quote(value)}"))
+        return self
+
+    def neq(self, column, value):
+        self.params.append((column, f"neq.{_quote(value)}"))
+        return self
+
+    def in_(self, column, values):
+        self.params.append((column, "in.(" + ",".join(_quote(v) for v in values) + ")"))
+        return self
+
+    def is_(self, column, value):
+        self.params.append((column, f"is.{_quote(value)}"))
+        return self
+
+    def order(self, column, desc=False):
+        self.params.append(("order", f"{column}.{'desc' if desc else 'asc'}"))
+        return self
+
+    def limit(self, count):
+        self.params.append(("limit", str(count)))
+        return self
+
+    def range(self, start, end):
+        self.params.append(("offset", str(start)))
+        self.params.append(("limit", str(end - start + 1)))
+        return self
+
+    def execute(self):
+        """Send the query; raises SupabaseError on 4xx/5xx"""
+        kwargs = {"params": self.params, "headers": self.headers}
+        if self.body is not None:
+            kwargs["json"] = self.body
+        response = self.client.request(self.method, f"rest/v1/{self.table}", retry=self.retry, **kwargs)
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+
+        data = response.json() if response.content else []
+        count = None
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("*"):
+            count = int(content_range.rsplit("/", 1)[1])
+        return APIResponse(data, count)
+
+
+class StorageClient:
+    """Storage API: buckets and per-bucket objects"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def from_(self, bucket):
+        return StorageBucket(self.client, bucket)
+
+    def list_buckets(self):
+        response = self.client.get("storage/v1/bucket")
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return response.json()
+
+    def create_bucket(self, bucket_id, options=None):
+        payload = {"id": bucket_id, "name": bucket_id}
+        payload.update(options or {})
+        response = self.client.post("storage/v1/bucket", json=payload)
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return response.json()
+
+
+class StorageBucket:
+    """Objects in one Storage bucket"""
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+
+    def upload(self, path, file, file_options=None):
+        """Upload bytes (or a file object); file_options: content-type, upsert"""
+        file_options = file_options or {}
+        headers = {"Content-Type": file_options.get("content-type", "application/octet-stream")}
+        if str(file_options.get("upsert", "")).lower() == "true":
+            headers["x-upsert"] = "true"
+        data = file.read() if hasattr(file, "read") else file
+
+        # Resending can only turn a lost success into a 409 for an object that exists
+        response = self.client.post(f"storage/v1/object/{self.bucket}/{path}", data=data, headers=headers, retry=True)
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return response.json()
+
+    def remove(self, paths):
+        response = self.client.delete(f"storage/v1/object/{self.bucket}", json={"prefixes": list(paths)})
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return response.json()
+
+    def list(self, prefix="", options=None):
+        payload = {"prefix": prefix, "limit": 100, "offset": 0}
+        payload.update(options or {})
+        response = self.client.post(f"storage/v1/object/list/{self.bucket}", json=payload, retry=True)
+        if response.status_code >= 400:
+            raise SupabaseError(response)
+        return response.json()
+
+    def get_public_url(self, path):
+        return f"{self.client.url}/storage/v1/object/public/{self.bucket}/{path}"
+
+
+def get_client(url, key, **options):
+    """Shared client for (url, key) - every caller in the process reuses one pool"""
+    with _clients_lock:
+        client = _clients.get((url, key))
+        if client is None:
+            client = SupabaseClient(url, key, **options)
+            _clients[(url, key)] = client
+        return client
+
+
+# Drop-in name for code written against supabase-py
+create_client = get_client
@@ -0,0 +1,138 @@
+"""
+Row-hash change detection for the Supabase importers
+
+Each importer hashes every normalized record, compares the hashes with the
+local state file from the last successful sync and only sends rows whose
+hash changed. Keys that vanished from the CSV can optionally be deleted.
+
+State files are JSON, one per (CSV, table) pair, stored next to the CSV:
+    SUPABASE_UPLOAD_242_LEADS.csv -> SUPABASE_UPLOAD_242_LEADS.priority_leads.sync.json
+
+Only rows whose upload succeeded are recorded, so a failed batch is simply
+retried on the next run.
+"""
+
+import hashlib
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline_schema import ACCOUNT_KEY
+from instrumentation import span
+
+STATE_VERSION = 1
+
+
+def normalize_value(value):
+    """JSON-stable form of a cell: NA -> None, integral floats -> int, text stripped"""
+    if value is None:
+        return None
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if hasattr(value, "item"):
+        # numpy scalars
+        return normalize_value(value.item())
+    if pd.isna(value):
+        return None
+    return value
+
+
+def record_hash(record):
+    """Stable hash of one record (dict); independent of key order and dtype noise"""
+    normalized = {key: normalize_value(value) for key, value in record.items()}
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def state_path(csv_path, table):
+    """Default state file for a CSV synced into `table`"""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}.{table}.sync.json")
+
+
+class SyncState:
+    """Last-synced record hashes per account_number"""
+
+    def __init__(self, path, key=ACCOUNT_KEY):
+        self.path = Path(path)
+        self.key = key
+        self.hashes = {}
+
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == STATE_VERSION and data.get("key") == key:
+                self.hashes = data.get("hashes", {})
+
+    def diff(self, records, full=False):
+        """
+        Compare records against the last sync
+
+        Returns (changed_records, current_hashes, removed_keys): records that are
+        new or whose hash changed (all of them with full=True), the hash of every
+        current record by key, and keys that were synced before but are no
+        longer in the CSV.
+        """
+        changed = []
+        current = {}
+        for record in records:
+            key = record.get(self.key)
+            if key is None:
+                continue
+            key = str(key)
+            digest = record_hash(record)
+            current[key] = digest
+            if full or self.hashes.get(key) != digest:
+                changed.append(record)
+
+        removed = [key for key in self.hashes if key not in current]
+        return changed, current, removed
+
+    def mark_synced(self, records, current_hashes):
+        """Record the hashes of records that were sent successfully"""
+        for record in records:
+            key = str(record[self.key])
+            self.hashes[key] = current_hashes[key]
+
+    def forget(self, keys):
+        """Drop keys that were deleted remotely"""
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    def save(self):
+        """Write the state file atomically"""
+        data = {
+            "version": STATE_VERSION,
+            "key": self.key,
+            "updated_at": datetime.now().isoformat(timespec="seconds"),
+            "hashes": self.hashes,
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with span("sync_state.save", "disk") as s:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=0, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            s.add(rows=len(self.hashes))
+
+
+def in_filter(keys):
+    """PostgREST in.() filter value with quoted keys"""
+    quoted = ",".join('"' + str(key).replace('"', '\\"') + '"' for key in keys)
+    return f"in.({quoted})"
+
+
+def print_delta(changed, current, removed, delete_missing):
+    """One-line summary of what this run will send"""
+    unchanged = len(current) - len(changed)
+    print(f"Change detection: {len(changed)} new/changed, {unchanged} unchanged, {len(removed)} vanished")
+    if removed and not delete_missing:
+        print("  (vanished keys are kept remotely - pass --delete-missing to remove them)")
@@ -21,17 +21,19 @@ from pathlib import Path
 from dotenv import load_dotenv
 import re
 
+from account_keys import slugify
+
 # Load environment variables
 load_dotenv()
 
-# Try to import Supabase
+# Try to import the shared Supabase client (needs requests)
 try:
-    from supabase import create_client, Client
+    from supabase_client import get_client, SupabaseClient
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    print("\n⚠️  ERROR: Supabase not installed")
-    print("Run: pip install supabase python-dotenv")
+    print("\n⚠️  ERROR: requests not installed")
+    print("Run: pip install requests python-dotenv")
     sys.exit(1)
 
 # Configuration
@@ -39,13 +41,6 @@ IMAGES_DIR = Path("../Step 3 - Download Images/property_photos")
 BUCKET_NAME = "property-images"
 
 
-def slugify(account_number):
-    """Convert account number to slug format"""
-    # Remove underscores, convert to lowercase with hyphens
-    slug = account_number.replace('_', '-').lower()
-    return slug
-
-
 def get_account_from_filename(filename):
     """Extract account number from image filename"""
     # Remove .jpg extension
@@ -55,7 +50,7 @@ def get_account_from_filename(filename):
     return account, slug
 
 
-def upload_image_to_supabase(supabase: Client, image_path: Path, slug: str):
+def upload_image_to_supabase(supabase: SupabaseClient, image_path: Path, slug: str):
     """
     Upload image to Supabase storage and return public URL
 
@@ -93,7 +88,7 @@ def upload_image_to_supabase(supabase: Client, image_path: Path, slug: str):
         return False, error_msg
 
 
-def update_property_image_url(supabase: Client, slug: str, image_url: str):
+def update_property_image_url(supabase: SupabaseClient, slug: str, image_url: str):
     """Update property record with image URL"""
     try:
         result = supabase.table('properties').update({
@@ -105,7 +100,7 @@ def update_property_image_url(supabase: Client, slug: str, image_url: str):
         return False, str(e)
 
 
-def ensure_bucket_exists(supabase: Client):
+def ensure_bucket_exists(supabase: SupabaseClient):
     """Create storage bucket if it doesn't exist"""
     try:
         # Try to list buckets
@@ -195,7 +190,7 @@ def main():
     # Connect to Supabase
     print(f"\n🔌 Connecting to Supabase...")
     try:
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = get_client(supabase_url, supabase_key)
         print("✅ Connected")
     except Exception as e:
         print(f"❌ Connection failed: {e}")
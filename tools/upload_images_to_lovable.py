@@ -4,11 +4,14 @@ Lê o CSV LOVABLE_UPLOAD_WITH_IMAGES.csv e faz upload das imagens correspondente
 """
 
 import os
-import requests
-import pandas as pd
-from pathlib import Path
 from dotenv import load_dotenv
 
+from pipeline_schema import read_pipeline_csv
+from account_keys import AccountIndex, canonical_account
+from supabase_async import bulk_upload
+from photo_dedup import load_exclusions
+from photo_normalize import NormalizedPhotos
+
 load_dotenv()
 
 # Configuration
@@ -19,34 +22,21 @@ BUCKET_NAME = "property-photos"
 CSV_FILE = "../LOVABLE_UPLOAD_WITH_IMAGES.csv"
 IMAGES_DIR = "../../Step 3 - Download Images/property_photos"
 
-def upload_image(account_number):
-    """Upload single image to Supabase Storage"""
-    # Convert account number format: 28-22-29-5600-81200 -> 28_22_29_5600_81200
-    image_filename = account_number.replace('-', '_') + '.jpg'
-    image_path = Path(IMAGES_DIR) / image_filename
+def report_upload(result):
+    """Print the outcome of one upload (a BulkResult); True when the image is in the bucket"""
+    filename = result.item[0]
 
-    if not image_path.exists():
-        print(f"  X File not found: {image_filename}")
+    if result.error is not None:
+        print(f"  X Failed: {filename} - {result.error}")
         return False
-
-    url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{image_filename}"
-
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-        "Content-Type": "image/jpeg"
-    }
-
-    with open(image_path, "rb") as f:
-        response = requests.post(url, headers=headers, data=f)
-
-    if response.status_code in [200, 201]:
-        print(f"  OK Uploaded: {image_filename}")
+    if result.status_code in [200, 201]:
+        print(f"  OK Uploaded: {filename}")
         return True
-    elif response.status_code == 409:
-        print(f"  >> Already exists: {image_filename}")
+    elif result.status_code == 409:
+        print(f"  >> Already exists: {filename}")
         return True
     else:
-        print(f"  X Failed: {image_filename} - {response.status_code} {response.text}")
+        print(f"  X Failed: {filename} - {result.status_code} {result.text}")
         return False
 
 def main():
@@ -63,7 +53,7 @@ def main():
         print(f"ERRO: Arquivo nao encontrado: {CSV_FILE}")
         return
 
-    df = pd.read_csv(CSV_FILE)
+    df = read_pipeline_csv(CSV_FILE, columns=['account_number'])
     print(f"\nCarregando {len(df)} properties do CSV...")
 
     print(f"\nIniciando upload de {len(df)} imagens para Supabase Storage...")
@@ -73,9 +63,25 @@ def main():
     success = 0
     failed = 0
 
-    for idx, row in df.iterrows():
-        account_number = row['account_number']
-        if upload_image(account_number):
+    # Images are matched to accounts in any spelling (28-22-29... or 28_22_29...)
+    images = AccountIndex.from_directory(IMAGES_DIR, exclude=load_exclusions(IMAGES_DIR))
+    # Normalized versions (photo_normalize.py) are uploaded where available
+    normalized = NormalizedPhotos(IMAGES_DIR)
+
+    items = []
+    for account_number in df['account_number']:
+        # Stored under the canonical name: 28-22-29-5600-81200 -> 28_22_29_5600_81200.jpg
+        filename = f"{canonical_account(account_number)}.jpg"
+        image_path = images.get(account_number)
+        if image_path is None:
+            print(f"  X File not found: {filename}")
+            failed += 1
+            continue
+        items.append((filename, normalized.get(image_path)))
+
+    # Uploads run concurrently (bounded by SUPABASE_CONCURRENCY)
+    for result in bulk_upload(SUPABASE_URL, SUPABASE_ANON_KEY, BUCKET_NAME, items):
+        if report_upload(result):
             success += 1
         else:
             failed += 1
@@ -6,10 +6,13 @@ Images will be accessible at: https://[project].supabase.co/storage/v1/object/pu
 """
 
 import os
-import requests
 from pathlib import Path
 from dotenv import load_dotenv
 
+from supabase_async import bulk_upload
+from photo_dedup import load_exclusions
+from photo_normalize import NormalizedPhotos
+
 load_dotenv()
 
 # Get from Supabase Dashboard → Settings → API
@@ -19,28 +22,21 @@ SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 BUCKET_NAME = "property-photos"
 PHOTOS_DIR = "../../Step 3 - Download Images/property_photos"
 
-def upload_image(file_path: Path):
-    """Upload single image to Supabase Storage"""
-    account_number = file_path.stem  # e.g., "23-22-28-7975-00330"
-
-    url = f"{SUPABASE_URL}/storage/v1/object/{BUCKET_NAME}/{account_number}.jpg"
-
-    headers = {
-        "Authorization": f"Bearer {SUPABASE_ANON_KEY}",
-        "Content-Type": "image/jpeg"
-    }
-
-    with open(file_path, "rb") as f:
-        response = requests.post(url, headers=headers, data=f)
+def report_upload(result):
+    """Print the outcome of one upload (a BulkResult); True when the image is in the bucket"""
+    name = result.item[0]
 
-    if response.status_code in [200, 201]:
-        print(f"✅ Uploaded: {account_number}.jpg")
+    if result.error is not None:
+        print(f"❌ Failed: {name} - {result.error}")
+        return False
+    if result.status_code in [200, 201]:
+        print(f"✅ Uploaded: {name}")
         return True
-    elif response.status_code == 409:
-        print(f"⏭️  Already exists: {account_number}.jpg")
+    elif result.status_code == 409:
+        print(f"⏭️  Already exists: {name}")
         return True
     else:
-        print(f"❌ Failed: {account_number}.jpg - {response.status_code} {response.text}")
+        print(f"❌ Failed: {name} - {result.status_code} {result.text}")
         return False
 
 def main():
@@ -58,7 +54,11 @@ def main():
         print(f"❌ Error: Photos directory not found: {PHOTOS_DIR}")
         return
 
-    images = list(photos_path.glob("*.jpg"))
+    # Visual duplicates found by photo_dedup.py are not uploaded again
+    excluded = load_exclusions(photos_path)
+    images = [path for path in photos_path.glob("*.jpg") if path.name not in excluded]
+    if excluded:
+        print(f"⏭️  Skipping {len(excluded)} duplicate photos (photo_dedup.py)")
 
     if not images:
         print(f"❌ Error: No .jpg images found in {PHOTOS_DIR}")
@@ -71,8 +71,15 @@ def main():
     success = 0
     failed = 0
 
-    for img_path in images:
-        if upload_image(img_path):
+    # Upload the normalized version where photo_normalize.py has one
+    normalized = NormalizedPhotos(photos_path)
+
+    # e.g. "23-22-28-7975-00330.jpg"; every upload is in flight at once (bounded by SUPABASE_CONCURRENCY)
+    results = bulk_upload(SUPABASE_URL, SUPABASE_ANON_KEY, BUCKET_NAME,
+                          [(f"{img_path.stem}.jpg", normalized.get(img_path)) for img_path in images])
+
+    for result in results:
+        if report_upload(result):
             success += 1
         else:
             failed += 1
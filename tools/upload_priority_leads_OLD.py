@@ -13,25 +13,39 @@ Usage:
     python upload_priority_leads.py --data-only   # S  dados, sem imagens
     python upload_priority_leads.py --images-only # S  imagens, sem dados
     python upload_priority_leads.py              # Upload completo
+    python upload_priority_leads.py --resume     # Continua um upload interrompido
+    python upload_priority_leads.py --plan       # Dry run contra o banco: insert/update/no-op/reject
+    python upload_priority_leads.py --plan --save-plan   # ...e salva o plano ao lado do CSV
+    python upload_priority_leads.py --apply-plan # Executa o plano salvo (so linhas novas/alteradas)
 """
 
+import math
 import sys
 import os
 import pandas as pd
 from pathlib import Path
 from dotenv import load_dotenv
 
+from pipeline_schema import read_pipeline_csv
+from account_keys import AccountIndex, slugify
+from checkpoint import Checkpoint, checkpoint_path, file_fingerprint
+from instrumentation import span
+from sync_state import normalize_value
+from write_plan import WritePlan, plan_path
+from photo_dedup import load_exclusions
+from photo_normalize import NormalizedPhotos
+
 # Load environment
 load_dotenv()
 
-# Try to import Supabase
+# Try to import the shared Supabase client (needs requests)
 try:
-    from supabase import create_client, Client
+    from supabase_client import get_client
     SUPABASE_AVAILABLE = True
 except ImportError:
     SUPABASE_AVAILABLE = False
-    print("\n   WARNING: Supabase not installed")
-    print("Run: pip install supabase python-dotenv")
+    print("\n   WARNING: requests not installed")
+    print("Run: pip install requests python-dotenv")
     print("\nContinuing in PREVIEW mode only...")
 
 # Paths
@@ -40,10 +54,100 @@ LAND_LIST = Path("../Step 4 - AI Review & Evaluate/CONTACT_LISTS/VACANT_LAND/VAC
 IMAGES_DIR = Path("../Step 3 - Download Images/property_photos")
 BUCKET_NAME = "property-images"
 
+UPLOAD_BATCH_SIZE = 50       # rows per upsert request (and per checkpoint)
+FETCH_BATCH_SIZE = 200       # account numbers per in.() filter when planning
+IMAGE_CHECKPOINT_EVERY = 25  # images between checkpoints
+
+
+def property_record(row):
+    """priority_leads row for a distressed property"""
+    return {
+        'account_number': str(row['Account Number']),
+        'slug': slugify(row['Account Number']),
+        'priority_class': str(row['Priority_Class']),
+        'lead_score': int(row['Score']) if pd.notna(row['Score']) else None,
+        'condition_score': int(row['Condition_Score']) if pd.notna(row['Condition_Score']) else None,
+        'condition_category': str(row['Condition_Category']) if pd.notna(row['Condition_Category']) else None,
+        'owner_name': str(row['Owner Name']) if pd.notna(row['Owner Name']) else None,
+        'property_address': str(row['Property Address']) if pd.notna(row['Property Address']) else None,
+        'visual_summary': str(row['Visual_Summary']) if pd.notna(row['Visual_Summary']) else None,
+        'equity': float(row['Equity']) if pd.notna(row['Equity']) else None,
+        'times_delinquent': int(row['Times Delinquent']) if pd.notna(row['Times Delinquent']) else 0,
+        'is_estate_trust': bool(row['Estate/Trust']) if pd.notna(row.get('Estate/Trust')) else False,
+        'is_out_of_state': bool(row['Out of State']) if pd.notna(row.get('Out of State')) else False,
+        'contact_status': 'not_contacted',
+        'is_vacant_land': False
+    }
+
+
+def land_record(row):
+    """priority_leads row for a high-score vacant land parcel"""
+    return {
+        'account_number': str(row['Account Number']),
+        'slug': slugify(row['Account Number']),
+        'priority_class': 'LAND-HIGH',
+        'lead_score': int(row['Score']) if pd.notna(row['Score']) else None,
+        'condition_category': 'VACANT LAND',
+        'owner_name': str(row['Owner Name']) if pd.notna(row['Owner Name']) else None,
+        'property_address': str(row['Property Address']) if pd.notna(row['Property Address']) else None,
+        'equity': float(row['Equity']) if pd.notna(row['Equity']) else None,
+        'times_delinquent': int(row['Times Delinquent']) if pd.notna(row['Times Delinquent']) else 0,
+        'contact_status': 'not_contacted',
+        'is_vacant_land': True
+    }
+
+
+def upsert_stage(supabase, checkpoint, stage, df, build_record, label, errors):
+    """
+    Upsert one stage in batches, checkpointing after each fully committed batch
+
+    A failed batch is retried row by row so one bad record doesn't lose the
+    rest; the checkpoint stops advancing at the first batch with a bad row.
+    Returns the number of rows uploaded.
+    """
+    start = checkpoint.offset(stage)
+    if start:
+        print(f"   Skipping {start} {label} already uploaded")
+
+    uploaded = 0
+    committed = True
+
+    for offset in range(start, len(df), UPLOAD_BATCH_SIZE):
+        rows = df.iloc[offset:offset + UPLOAD_BATCH_SIZE]
+        records = []
+        batch_ok = True
+        for _, row in rows.iterrows():
+            try:
+                records.append(build_record(row))
+            except Exception as e:
+                batch_ok = False
+                errors.append(f"{label} {row['Account Number']}: {str(e)}")
+                print(f"   Error: {row['Account Number']}: {str(e)[:50]}")
+
+        with span("upsert.batch", "commit", stage=stage) as s:
+            s.add(rows=len(records))
+            try:
+                supabase.table('priority_leads').upsert(records, on_conflict='account_number').execute()
+                uploaded += len(records)
+            except Exception:
+                for record in records:
+                    try:
+                        supabase.table('priority_leads').upsert(record, on_conflict='account_number').execute()
+                        uploaded += 1
+                    except Exception as e:
+                        batch_ok = False
+                        errors.append(f"{label} {record['account_number']}: {str(e)}")
+                        if len(errors) <= 5:
+                            print(f"   Error: {record['account_number']}: {str(e)[:50]}")
+
+        if not batch_ok:
+            committed = False
+        if committed:
+            checkpoint.commit(stage, offset + len(rows))
+
+        print(f"  Progress: {offset + len(rows)}/{len(df)}")
 
-def slugify(account_number):
-    """Convert account number to slug format"""
-    return str(account_number).replace('_', '-').lower()
+    return uploaded
 
 
 def load_priority_leads():
@@ -56,12 +160,12 @@ def load_priority_leads():
         print(f" Not found: {CONTACT_LIST}")
         return None, None
 
-    df_properties = pd.read_csv(CONTACT_LIST)
+    df_properties = read_pipeline_csv(CONTACT_LIST)
     print(f" Loaded {len(df_properties)} priority properties")
 
     # Load land (4)
     if LAND_LIST.exists():
-        df_land = pd.read_csv(LAND_LIST)
+        df_land = read_pipeline_csv(LAND_LIST)
         print(f" Loaded {len(df_land)} priority land parcels")
     else:
         print("   Land list not found, skipping")
@@ -114,16 +218,11 @@ def preview_upload(df_properties, df_land):
 
     images_found = 0
     images_missing = 0
+    # One directory scan; slug and underscore filenames resolve to the same account
+    images = AccountIndex.from_directory(IMAGES_DIR, exclude=load_exclusions(IMAGES_DIR))
 
     for account in all_accounts:
-        slug = slugify(account)
-        image_path = IMAGES_DIR / f"{slug}.jpg"
-
-        if not image_path.exists():
-            # Try with underscores
-            image_path = IMAGES_DIR / f"{account.replace('-', '_')}.jpg"
-
-        if image_path.exists():
+        if account in images:
             images_found += 1
         else:
             images_missing += 1
@@ -145,13 +244,13 @@ def preview_upload(df_properties, df_land):
     print("Run without --preview to upload.")
 
 
-def upload_to_supabase(df_properties, df_land, upload_images=True, upload_data=True):
-    """Upload priority leads to Supabase"""
+def connect():
+    """Supabase client from .env credentials; (client, url) or (None, None)"""
 
     if not SUPABASE_AVAILABLE:
-        print("\n Supabase not available. Install first:")
-        print("pip install supabase")
-        return
+        print("\n Supabase client not available. Install first:")
+        print("pip install requests")
+        return None, None
 
     # Get credentials
     supabase_url = os.getenv('SUPABASE_URL') or os.getenv('VITE_SUPABASE_URL')
@@ -162,176 +261,261 @@ def upload_to_supabase(df_properties, df_land, upload_images=True, upload_data=T
         print("\nCreate .env file with:")
         print("  SUPABASE_URL=https://your-project.supabase.co")
         print("  SUPABASE_KEY=your-key")
-        return
+        return None, None
 
     # Connect
     print(f"\n Connecting to Supabase...")
     try:
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = get_client(supabase_url, supabase_key)
         print(" Connected")
     except Exception as e:
         print(f" Connection failed: {e}")
-        return
-
-    # Upload data
-    if upload_data:
-        print("\n" + "=" * 80)
-        print("UPLOADING DATA TO DATABASE")
-        print("=" * 80)
-
-        uploaded_properties = 0
-        uploaded_land = 0
-        errors = []
-
-        # Upload properties
-        print(f"\n Uploading {len(df_properties)} properties...")
-        for i, row in df_properties.iterrows():
+        return None, None
+    return supabase, supabase_url
+
+
+def fetch_existing_leads(supabase, accounts):
+    """Existing priority_leads rows by account_number (one request per FETCH_BATCH_SIZE accounts)"""
+    existing = {}
+    for i in range(0, len(accounts), FETCH_BATCH_SIZE):
+        batch = accounts[i:i + FETCH_BATCH_SIZE]
+        with span("prefetch.priority_leads", "network") as s:
+            response = supabase.table('priority_leads').select('*').in_('account_number', batch).execute()
+            s.add(rows=len(batch))
+        for row in response.data or []:
+            existing[row['account_number']] = row
+    return existing
+
+
+def build_plan(supabase, df_properties, df_land):
+    """Dry run: compare the records we would upsert with the rows already in priority_leads"""
+    plan = WritePlan('priority_leads', 'account_number', file_fingerprint(CONTACT_LIST, LAND_LIST))
+
+    records = []
+    seen = set()
+    for df, build_record, label in ((df_properties, property_record, 'Property'), (df_land, land_record, 'Land')):
+        for _, row in df.iterrows():
             try:
-                data = {
-                    'account_number': str(row['Account Number']),
-                    'slug': slugify(row['Account Number']),
-                    'priority_class': str(row['Priority_Class']),
-                    'lead_score': int(row['Score']) if pd.notna(row['Score']) else None,
-                    'condition_score': int(row['Condition_Score']) if pd.notna(row['Condition_Score']) else None,
-                    'condition_category': str(row['Condition_Category']) if pd.notna(row['Condition_Category']) else None,
-                    'owner_name': str(row['Owner Name']) if pd.notna(row['Owner Name']) else None,
-                    'property_address': str(row['Property Address']) if pd.notna(row['Property Address']) else None,
-                    'visual_summary': str(row['Visual_Summary']) if pd.notna(row['Visual_Summary']) else None,
-                    'equity': float(row['Equity']) if pd.notna(row['Equity']) else None,
-                    'times_delinquent': int(row['Times Delinquent']) if pd.notna(row['Times Delinquent']) else 0,
-                    'is_estate_trust': bool(row['Estate/Trust']) if pd.notna(row.get('Estate/Trust')) else False,
-                    'is_out_of_state': bool(row['Out of State']) if pd.notna(row.get('Out of State')) else False,
-                    'contact_status': 'not_contacted',
-                    'is_vacant_land': False
-                }
-
-                # Upsert (insert or update)
-                supabase.table('priority_leads').upsert(data, on_conflict='account_number').execute()
-                uploaded_properties += 1
-
-                if (i + 1) % 50 == 0:
-                    print(f"  Progress: {i+1}/{len(df_properties)}")
-
+                record = build_record(row)
             except Exception as e:
-                errors.append(f"Property {row['Account Number']}: {str(e)}")
-                if len(errors) <= 5:
-                    print(f"   Error: {row['Account Number']}: {str(e)[:50]}")
+                plan.reject(str(row.get('Account Number')), f"{label}: {e}")
+                continue
+            # One upsert can't touch the same account twice
+            if record['account_number'] in seen:
+                plan.reject(record['account_number'], "duplicate account number (first row wins)")
+                continue
+            seen.add(record['account_number'])
+            records.append(record)
+
+    accounts = [record['account_number'] for record in records]
+    existing = fetch_existing_leads(supabase, accounts)
+    plan.prefetch_requests = math.ceil(len(accounts) / FETCH_BATCH_SIZE)
+
+    for record in records:
+        current = existing.get(record['account_number'])
+        if current is None:
+            plan.insert(record)
+            continue
+        fields = {
+            field: value for field, value in record.items()
+            if normalize_value(value) != normalize_value(current.get(field))
+        }
+        if fields:
+            plan.update(record['account_number'], fields, record=record)
+        else:
+            plan.noop(record['account_number'])
 
-        print(f" Uploaded {uploaded_properties} properties")
+    return plan
 
-        # Upload land
-        if len(df_land) > 0:
-            print(f"\n   Uploading {len(df_land)} land parcels...")
-            for i, row in df_land.iterrows():
-                try:
-                    data = {
-                        'account_number': str(row['Account Number']),
-                        'slug': slugify(row['Account Number']),
-                        'priority_class': 'LAND-HIGH',
-                        'lead_score': int(row['Score']) if pd.notna(row['Score']) else None,
-                        'condition_category': 'VACANT LAND',
-                        'owner_name': str(row['Owner Name']) if pd.notna(row['Owner Name']) else None,
-                        'property_address': str(row['Property Address']) if pd.notna(row['Property Address']) else None,
-                        'equity': float(row['Equity']) if pd.notna(row['Equity']) else None,
-                        'times_delinquent': int(row['Times Delinquent']) if pd.notna(row['Times Delinquent']) else 0,
-                        'contact_status': 'not_contacted',
-                        'is_vacant_land': True
-                    }
-
-                    supabase.table('priority_leads').upsert(data, on_conflict='account_number').execute()
-                    uploaded_land += 1
 
+def apply_plan(supabase, plan_file):
+    """Upsert only the new/changed records of a saved plan (no prefetch)"""
+    try:
+        plan = WritePlan.load(plan_file, 'priority_leads', file_fingerprint(CONTACT_LIST, LAND_LIST))
+    except (OSError, ValueError) as e:
+        print(f" Cannot apply plan: {e}")
+        sys.exit(2)
+
+    print(f"\n Applying plan from {plan.created_at}: {len(plan.inserts)} new, {len(plan.updates)} changed")
+    uploaded = 0
+    failed = 0
+    # Inserts and updates go in separate passes, matching the plan's request estimate
+    for records in (plan.inserts, [entry['record'] for entry in plan.updates]):
+        for i in range(0, len(records), UPLOAD_BATCH_SIZE):
+            batch = records[i:i + UPLOAD_BATCH_SIZE]
+            with span("upsert.batch", "commit", stage="plan") as s:
+                s.add(rows=len(batch))
+                try:
+                    supabase.table('priority_leads').upsert(batch, on_conflict='account_number').execute()
+                    uploaded += len(batch)
                 except Exception as e:
-                    errors.append(f"Land {row['Account Number']}: {str(e)}")
-                    print(f"   Error: {row['Account Number']}: {str(e)[:50]}")
-
-            print(f" Uploaded {uploaded_land} land parcels")
-
-        print(f"\n Data Upload Summary:")
-        print(f"   Properties: {uploaded_properties}/{len(df_properties)}")
-        print(f"   Land: {uploaded_land}/{len(df_land)}")
-        if errors:
-            print(f"   Errors: {len(errors)}")
-
-    # Upload images
-    if upload_images:
-        print("\n" + "=" * 80)
-        print("UPLOADING IMAGES TO STORAGE")
-        print("=" * 80)
-
-        # Ensure bucket exists
-        try:
-            buckets = supabase.storage.list_buckets()
-            bucket_names = [b['name'] for b in buckets]
-
-            if BUCKET_NAME not in bucket_names:
-                print(f"\n Creating bucket: {BUCKET_NAME}")
-                supabase.storage.create_bucket(BUCKET_NAME, options={"public": True})
-                print(" Bucket created")
-        except Exception as e:
-            print(f"   Could not verify bucket: {e}")
-
-        # Upload images
-        all_accounts = pd.concat([
-            df_properties['Account Number'],
-            df_land['Account Number'] if len(df_land) > 0 else pd.Series()
-        ])
+                    failed += len(batch)
+                    print(f"   Error upserting {len(batch)} leads: {str(e)[:80]}")
 
-        uploaded_images = 0
-        skipped_images = 0
+    print(f"\n Uploaded: {uploaded}")
+    if failed:
+        # Upserts are idempotent, so the same plan can be applied again
+        print(f"   Failed: {failed} - plan kept at {plan_file}, run --apply-plan again")
+    else:
+        os.remove(plan_file)
+        print(" Plan applied and removed")
 
-        for i, account in enumerate(all_accounts, 1):
-            slug = slugify(account)
 
-            # Find image file
-            image_path = IMAGES_DIR / f"{slug}.jpg"
-            if not image_path.exists():
-                image_path = IMAGES_DIR / f"{account.replace('-', '_')}.jpg"
+def upload_to_supabase(df_properties, df_land, upload_images=True, upload_data=True, resume=False):
+    """Upload priority leads to Supabase"""
 
-            if not image_path.exists():
-                skipped_images += 1
-                continue
+    supabase, supabase_url = connect()
+    if supabase is None:
+        return
 
-            try:
-                # Read image
-                with open(image_path, 'rb') as f:
-                    image_data = f.read()
+    checkpoint = Checkpoint(
+        checkpoint_path(CONTACT_LIST, "priority_leads"),
+        file_fingerprint(CONTACT_LIST, LAND_LIST),
+        resume=resume,
+    )
+    print(f" Checkpoint: {checkpoint.describe()}")
 
-                # Upload path
-                storage_path = f"properties/{slug}.jpg"
+    uploaded_properties = 0
+    uploaded_land = 0
+    uploaded_images = 0
+    errors = []
+    failed_images = 0
 
-                # Upload
-                try:
-                    supabase.storage.from_(BUCKET_NAME).upload(
-                        path=storage_path,
-                        file=image_data,
-                        file_options={"content-type": "image/jpeg"}
-                    )
-                except Exception as e:
-                    # If already exists, skip
-                    if 'already exists' not in str(e).lower():
-                        raise
+    try:
+        # Upload data
+        if upload_data:
+            print("\n" + "=" * 80)
+            print("UPLOADING DATA TO DATABASE")
+            print("=" * 80)
+
+            # Upload properties
+            print(f"\n Uploading {len(df_properties)} properties...")
+            uploaded_properties = upsert_stage(
+                supabase, checkpoint, 'properties', df_properties, property_record, 'Property', errors
+            )
+            print(f" Uploaded {uploaded_properties} properties")
+
+            # Upload land
+            if len(df_land) > 0:
+                print(f"\n   Uploading {len(df_land)} land parcels...")
+                uploaded_land = upsert_stage(
+                    supabase, checkpoint, 'land', df_land, land_record, 'Land', errors
+                )
+                print(f" Uploaded {uploaded_land} land parcels")
+
+            print(f"\n Data Upload Summary:")
+            print(f"   Properties: {uploaded_properties}/{len(df_properties)}")
+            print(f"   Land: {uploaded_land}/{len(df_land)}")
+            if errors:
+                print(f"   Errors: {len(errors)}")
 
-                # Get public URL
-                public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
+        # Upload images
+        if upload_images:
+            print("\n" + "=" * 80)
+            print("UPLOADING IMAGES TO STORAGE")
+            print("=" * 80)
 
-                # Update record with image URL
-                supabase.table('priority_leads').update({
-                    'property_image_url': public_url
-                }).eq('account_number', str(account)).execute()
+            # Ensure bucket exists
+            try:
+                buckets = supabase.storage.list_buckets()
+                bucket_names = [b['name'] for b in buckets]
 
-                uploaded_images += 1
+                if BUCKET_NAME not in bucket_names:
+                    print(f"\n Creating bucket: {BUCKET_NAME}")
+                    supabase.storage.create_bucket(BUCKET_NAME, options={"public": True})
+                    print(" Bucket created")
+            except Exception as e:
+                print(f"   Could not verify bucket: {e}")
+
+            # Upload images
+            all_accounts = pd.concat([
+                df_properties['Account Number'],
+                df_land['Account Number'] if len(df_land) > 0 else pd.Series()
+            ])
+
+            skipped_images = 0
+            images = AccountIndex.from_directory(IMAGES_DIR, exclude=load_exclusions(IMAGES_DIR))
+            normalized = NormalizedPhotos(IMAGES_DIR)
+            start = checkpoint.offset('images')
+            if start:
+                print(f"\n   Skipping {start} images already uploaded")
+            images_committed = True
+
+            for i, account in enumerate(all_accounts, 1):
+                if i <= start:
+                    continue
+
+                # Checkpoint the images before this one while none have failed
+                if images_committed and (i - 1) % IMAGE_CHECKPOINT_EVERY == 0:
+                    checkpoint.commit('images', i - 1)
+
+                slug = slugify(account)
+
+                # Find image file (slug or underscore filename)
+                image_path = images.get(account)
+                if image_path is None:
+                    skipped_images += 1
+                    continue
 
-                if i % 50 == 0:
-                    print(f"  Progress: {i}/{len(all_accounts)}")
+                try:
+                    # Read image
+                    with span("file.read", "disk") as s:
+                        # Normalized version (photo_normalize.py) when there is one
+                        with open(normalized.get(image_path), 'rb') as f:
+                            image_data = f.read()
+                        s.add(bytes=len(image_data))
+
+                    # Upload path
+                    storage_path = f"properties/{slug}.jpg"
+
+                    # Upload
+                    try:
+                        supabase.storage.from_(BUCKET_NAME).upload(
+                            path=storage_path,
+                            file=image_data,
+                            file_options={"content-type": "image/jpeg"}
+                        )
+                    except Exception as e:
+                        # If already exists, skip
+                        if 'already exists' not in str(e).lower():
+                            raise
+
+                    # Get public URL
+                    public_url = supabase.storage.from_(BUCKET_NAME).get_public_url(storage_path)
+
+                    # Update record with image URL
+                    supabase.table('priority_leads').update({
+                        'property_image_url': public_url
+                    }).eq('account_number', str(account)).execute()
+
+                    uploaded_images += 1
+
+                    if i % 50 == 0:
+                        print(f"  Progress: {i}/{len(all_accounts)}")
 
-            except Exception as e:
-                if i <= 5:
-                    print(f"   Error uploading {account}: {str(e)[:50]}")
+                except Exception as e:
+                    failed_images += 1
+                    images_committed = False
+                    if failed_images <= 5:
+                        print(f"   Error uploading {account}: {str(e)[:50]}")
+
+            if images_committed:
+                checkpoint.commit('images', len(all_accounts))
+
+            print(f"\n Image Upload Summary:")
+            print(f"   Uploaded: {uploaded_images}")
+            print(f"    Skipped (not found): {skipped_images}")
+            if failed_images:
+                print(f"   Failed: {failed_images}")
+
+    except KeyboardInterrupt:
+        print(f"\n   Interrupted - run again with --resume to continue ({checkpoint.describe()})")
+        return
 
-        print(f"\n Image Upload Summary:")
-        print(f"   Uploaded: {uploaded_images}")
-        print(f"    Skipped (not found): {skipped_images}")
+    if errors or failed_images:
+        print(f"\n   Some uploads failed - run again with --resume to retry from the last committed batch")
+    else:
+        checkpoint.clear()
 
     print("\n" + "=" * 80)
     print(" UPLOAD COMPLETE!")
@@ -351,6 +535,14 @@ def main():
     preview_only = '--preview' in sys.argv
     data_only = '--data-only' in sys.argv
     images_only = '--images-only' in sys.argv
+    resume = '--resume' in sys.argv
+    plan_file = plan_path(CONTACT_LIST, 'priority_leads')
+
+    if '--apply-plan' in sys.argv:
+        supabase, _ = connect()
+        if supabase is not None:
+            apply_plan(supabase, plan_file)
+        return
 
     # Load data
     df_properties, df_land = load_priority_leads()
@@ -363,6 +555,20 @@ def main():
         preview_upload(df_properties, df_land)
         return
 
+    # Dry run against the database
+    if '--plan' in sys.argv:
+        supabase, _ = connect()
+        if supabase is None:
+            return
+        plan = build_plan(supabase, df_properties, df_land)
+        estimate = plan.estimate(UPLOAD_BATCH_SIZE, upsert_batch=UPLOAD_BATCH_SIZE)
+        plan.print_summary(estimate)
+        if '--save-plan' in sys.argv:
+            plan.save(plan_file, estimate)
+            print(f"\n Plan saved to {plan_file}")
+            print("Run with --apply-plan to execute it")
+        return
+
     # Confirm
     total = len(df_properties) + (len(df_land) if df_land is not None else 0)
     print(f"\n   About to upload {total} priority leads to Supabase")
@@ -380,7 +586,7 @@ def main():
     upload_data = not images_only
     upload_images = not data_only
 
-    upload_to_supabase(df_properties, df_land, upload_images, upload_data)
+    upload_to_supabase(df_properties, df_land, upload_images, upload_data, resume)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,367 @@
+"""
+Planned, verified file moves with a rollback manifest
+
+The SAFE reorganizers moved files one shutil.move at a time and never checked
+the result. A VerifiedMover plans everything first and then moves:
+
+1. plan     add(source, dest) expands folders into files and records size and
+            blake2b hash (hashed in a thread pool)
+2. move     files move in a thread pool. A move within the same filesystem is
+            a rename. Across filesystems the data is copied while its hash is
+            computed, then the source is deleted.
+3. verify   every destination is hashed again (streaming) and compared with
+            the plan. A copy that doesn't match is deleted and its source kept.
+
+Existing destinations are never deleted; they are set aside in a backup
+folder. The manifest (JSON, written before anything is set aside, after each
+set-aside, before the first move and again at the end) records every move,
+the backups and the folders created or emptied, so rollback() can put the
+tree back exactly, even after a crash. A destination that can't be set aside
+fails its entries and leaves their sources in place:
+
+    mover = VerifiedMover(".reorg_manifest_20251219_120000.json")
+    mover.add("FINAL_242_LEADS", "data/processed/FINAL_242_LEADS", replace=True)
+    mover.run()
+    ...
+    rollback(".reorg_manifest_20251219_120000.json")
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from instrumentation import span
+
+MANIFEST_VERSION = 1
+DEFAULT_WORKERS = 8
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """Streaming blake2b of one file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def copy_hashed(source, dest):
+    """Copy source -> dest in chunks; returns the hash of the bytes copied"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        for block in iter(lambda: src.read(CHUNK_SIZE), b""):
+            digest.update(block)
+            dst.write(block)
+    shutil.copystat(source, dest)
+    return digest.hexdigest()
+
+
+def same_device(source, dest):
+    """True when a rename from source to dest's folder stays on one filesystem"""
+    return os.stat(source, follow_symlinks=False).st_dev == os.stat(Path(dest).parent).st_dev
+
+
+def move_file(source, dest, expected_hash):
+    """
+    Move one regular file and verify it against `expected_hash`
+
+    Returns "rename" or "copy"; raises OSError if the file changed since
+    planning or the copy doesn't verify (the source is left in place).
+    """
+    if same_device(source, dest):
+        os.rename(source, dest)
+        method = "rename"
+    else:
+        copied = copy_hashed(source, dest)
+        if copied != expected_hash:
+            os.unlink(dest)
+            raise OSError(f"{source} changed since planning")
+        method = "copy"
+
+    if file_hash(dest) != expected_hash:
+        if method == "rename":
+            os.rename(dest, source)
+        else:
+            os.unlink(dest)
+        raise OSError(f"{dest} failed verification")
+
+    if method == "copy":
+        os.unlink(source)
+    return method
+
+
+def move_symlink(source, dest):
+    """Move a symlink itself (not what it points to)"""
+    if same_device(source, dest):
+        os.rename(source, dest)
+        return "rename"
+    os.symlink(os.readlink(source), dest)
+    os.unlink(source)
+    return "copy"
+
+
+def write_json(path, data):
+    tmp_path = Path(str(path) + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class VerifiedMover:
+    """Collects moves, then runs and verifies them in a thread pool"""
+
+    def __init__(self, manifest_path, backup_dir=None, workers=DEFAULT_WORKERS):
+        self.manifest_path = Path(manifest_path)
+        self.backup_dir = Path(backup_dir or self.manifest_path.with_suffix(".backup"))
+        self.workers = workers
+        self.entries = []         # {"source", "dest", "kind", "size", "hash", "status", ...}
+        self.displaced = []       # {"path", "backup"}
+        self.dirs_created = []    # destination folders this run created
+        self.dirs_removed = []    # source folders emptied and removed
+        self._trees = []          # source folders to remove once emptied
+        self._pending = []        # (source, dest, kind) until plan()
+        self._empty_dirs = []     # (source, dest) folders with nothing in them
+        self._replaced = []       # destinations set aside whole (replace=True)
+        self.errors = []          # empty folders that couldn't be created
+
+    # Planning --------------------------------------------------------------------
+
+    def add(self, source, dest, replace=False):
+        """
+        Plan moving a file or folder to `dest`
+
+        Folders merge into an existing destination unless replace=True, in
+        which case the whole existing destination is set aside first.
+        Returns the number of files planned.
+        """
+        source, dest = Path(source), Path(dest)
+        if not os.path.lexists(source):
+            return 0
+        files = []
+        if source.is_dir() and not source.is_symlink():
+            self._trees.append(str(source))
+            for root, dirnames, filenames in os.walk(source):
+                rel = Path(root).relative_to(source)
+                # Keep empty folders
+                if not filenames and not dirnames:
+                    self._pending.append((Path(root), dest / rel, "dir"))
+                for name in filenames + [d for d in dirnames if (Path(root) / d).is_symlink()]:
+                    files.append((Path(root) / name, dest / rel / name))
+            if replace and os.path.lexists(dest):
+                self._pending.append((None, dest, "displace"))
+        else:
+            files.append((source, dest))
+        for file_source, file_dest in files:
+            self._pending.append((file_source, file_dest, "file"))
+        return len(files)
+
+    def plan(self):
+        """Hash every planned file (thread pool); returns (files, bytes)"""
+        jobs = [(s, d) for s, d, kind in self._pending if kind == "file"]
+
+        def describe(job):
+            source, dest = job
+            if source.is_symlink():
+                return {"source": str(source), "dest": str(dest), "kind": "symlink",
+                        "size": 0, "hash": None, "link": os.readlink(source), "status": "planned"}
+            return {"source": str(source), "dest": str(dest), "kind": "file",
+                    "size": source.stat().st_size, "hash": file_hash(source), "status": "planned"}
+
+        with span("move.plan_hash", "disk") as s:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                self.entries = list(pool.map(describe, jobs))
+            s.add(rows=len(self.entries), bytes=sum(entry["size"] for entry in self.entries))
+
+        self._empty_dirs = [(s, d) for s, d, kind in self._pending if kind == "dir"]
+        self._replaced = [d for _, d, kind in self._pending if kind == "displace"]
+        return len(self.entries), sum(entry["size"] for entry in self.entries)
+
+    # Execution -------------------------------------------------------------------
+
+    def _set_aside(self, path):
+        path = Path(path)
+        backup = self.backup_dir / (path.relative_to(path.anchor) if path.is_absolute() else path)
+        backup.parent.mkdir(parents=True, exist_ok=True)
+        os.rename(path, backup)
+        self.displaced.append({"path": str(path), "backup": str(backup)})
+        self.save("preparing")
+
+    def _make_dir(self, path):
+        missing = []
+        for parent in [path] + list(path.parents):
+            if parent == Path(".") or parent.exists():
+                break
+            missing.append(parent)
+        for folder in reversed(missing):
+            folder.mkdir()
+            self.dirs_created.append(str(folder))
+
+    def _prepare(self):
+        """Set existing destinations aside and create the destination folders"""
+        for dest in self._replaced:
+            try:
+                self._set_aside(dest)
+            except OSError as e:
+                for entry in self.entries:
+                    if Path(entry["dest"]).is_relative_to(dest):
+                        entry["status"] = "failed"
+                        entry["error"] = str(e)
+        for entry in self.entries:
+            if entry["status"] != "planned":
+                continue
+            dest = Path(entry["dest"])
+            try:
+                if os.path.lexists(dest):
+                    self._set_aside(dest)
+                self._make_dir(dest.parent)
+            except OSError as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+        empty_dirs = []
+        for source, dest in self._empty_dirs:
+            try:
+                self._make_dir(dest)
+                empty_dirs.append((source, dest))
+            except OSError as e:
+                self.errors.append(f"{dest}: {e}")
+        self._empty_dirs = empty_dirs
+
+    def _move(self, entry):
+        if entry["status"] != "planned":
+            return entry
+        try:
+            with span("move.file", "disk") as s:
+                if entry["kind"] == "symlink":
+                    entry["method"] = move_symlink(entry["source"], entry["dest"])
+                else:
+                    entry["method"] = move_file(entry["source"], entry["dest"], entry["hash"])
+                s.add(rows=1, bytes=entry["size"])
+            entry["status"] = "moved"
+        except OSError as e:
+            entry["status"] = "failed"
+            entry["error"] = str(e)
+        return entry
+
+    def run(self):
+        """Plan (if needed), move and verify; returns True when every file moved"""
+        if not self.entries:
+            self.plan()
+
+        # Set existing destinations aside instead of deleting them
+        self.save("preparing")
+        self._prepare()
+
+        self.save("running")
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            list(pool.map(self._move, self.entries))
+
+        failed = [entry for entry in self.entries if entry["status"] != "moved"] + self.errors
+        if not failed:
+            for source, _ in self._empty_dirs:
+                if source.exists() and not any(source.iterdir()):
+                    source.rmdir()
+                    self.dirs_removed.append(str(source))
+            for tree in self._trees:
+                self._remove_empty(Path(tree))
+        self.save("failed" if failed else "done")
+        return not failed
+
+    def _remove_empty(self, tree):
+        """Remove `tree` and its folders bottom-up where they are now empty"""
+        if not tree.exists():
+            return
+        for root, _, _ in sorted(os.walk(tree), key=lambda item: -len(Path(item[0]).parts)):
+            if not any(Path(root).iterdir()):
+                Path(root).rmdir()
+                self.dirs_removed.append(root)
+
+    def summary(self):
+        counts = {}
+        for entry in self.entries:
+            key = entry["status"] if entry["status"] != "moved" else entry.get("method", "moved")
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def failures(self):
+        return [entry for entry in self.entries if entry["status"] == "failed"]
+
+    def save(self, status):
+        write_json(self.manifest_path, {
+            "version": MANIFEST_VERSION,
+            "status": status,
+            "saved_at": datetime.now().isoformat(timespec="seconds"),
+            "cwd": os.getcwd(),
+            "backup_dir": str(self.backup_dir),
+            "entries": self.entries,
+            "displaced": self.displaced,
+            "dirs_created": self.dirs_created,
+            "dirs_removed": self.dirs_removed,
+            "errors": self.errors,
+        })
+
+
+def latest_manifest(directory=".", pattern=".reorg_manifest_*.json"):
+    """Most recent manifest in `directory`, or None"""
+    manifests = sorted(Path(directory).glob(pattern))
+    return manifests[-1] if manifests else None
+
+
+def rollback(manifest_path, workers=DEFAULT_WORKERS):
+    """
+    Undo the moves recorded in a manifest
+
+    Files go back (and are verified against their planned hash) wherever the
+    destination exists and the source doesn't, so a crashed run rolls back
+    too. Then the folders the run created are removed when empty and the
+    set-aside destinations are restored. Returns (restored, failed).
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"{manifest_path} is not a move manifest")
+
+    for folder in manifest["dirs_removed"]:
+        Path(folder).mkdir(parents=True, exist_ok=True)
+
+    def restore(entry):
+        source, dest = entry["source"], entry["dest"]
+        if not os.path.lexists(dest) or os.path.lexists(source):
+            return None
+        Path(source).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if entry["kind"] == "symlink":
+                move_symlink(dest, source)
+            else:
+                move_file(dest, source, entry["hash"])
+            entry["status"] = "rolled_back"
+            return True
+        except OSError as e:
+            entry["error"] = str(e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(restore, manifest["entries"]))
+    restored = results.count(True)
+    failed = results.count(False)
+
+    for folder in sorted(manifest["dirs_created"], key=lambda path: -len(Path(path).parts)):
+        path = Path(folder)
+        if path.is_dir() and not any(path.iterdir()):
+            path.rmdir()
+
+    for item in reversed(manifest["displaced"]):
+        if os.path.lexists(item["backup"]) and not os.path.lexists(item["path"]):
+            Path(item["path"]).parent.mkdir(parents=True, exist_ok=True)
+            os.rename(item["backup"], item["path"])
+    backup_dir = Path(manifest["backup_dir"])
+    if backup_dir.is_dir() and not any(p.is_file() or p.is_symlink() for p in backup_dir.rglob("*")):
+        shutil.rmtree(backup_dir)
+
+    manifest["status"] = "rolled_back" if not failed else "rollback_failed"
+    write_json(manifest_path, manifest)
+    return restored, failed
@@ -0,0 +1,208 @@
+"""
+Dry-run write plans for the Supabase importers
+
+A planning run prefetches the existing rows in bulk (in.() batches), works
+out locally what an import would do and writes nothing:
+
+- insert   rows that don't exist yet (full payload)
+- update   existing rows and the fields that would change
+- no-op    existing rows that would not change
+- reject   CSV rows that can't be sent (missing key, duplicate, bad value)
+
+It reports payload sizes and how many requests the execute step needs.
+The plan can be saved as JSON next to the input:
+    01_MASTER_Combined_Tax_Visual_Analysis.csv -> 01_MASTER_Combined_Tax_Visual_Analysis.properties.plan.json
+
+A saved plan can be replayed later without reading the database again.
+Replay refuses a plan whose input files changed since it was made. The plan
+is a snapshot, so review it and apply it soon after planning.
+"""
+
+import json
+import math
+import os
+from datetime import datetime
+from pathlib import Path
+
+PLAN_VERSION = 1
+EXAMPLES = 5
+
+
+def plan_path(input_path, table):
+    """Default plan file for `table` built from `input_path`"""
+    input_path = Path(input_path)
+    return input_path.with_name(f"{input_path.stem}.{table}.plan.json")
+
+
+def payload_bytes(payload):
+    """Size of a JSON request body"""
+    return len(json.dumps(payload, separators=(",", ":"), default=str).encode("utf-8"))
+
+
+class WritePlan:
+    """Planned writes for one table, keyed by `key`"""
+
+    def __init__(self, table, key, fingerprint=None):
+        self.table = table
+        self.key = key
+        self.fingerprint = fingerprint
+        self.created_at = datetime.now().isoformat(timespec="seconds")
+        self.inserts = []   # full records
+        self.updates = []   # {"id", key, "fields"} (PATCH by id) or {key, "record", "fields"} (upsert)
+        self.noops = []     # keys
+        self.rejects = []   # {key, "reason"}
+        self.prefetch_requests = 0
+
+    # Building ----------------------------------------------------------------
+
+    def insert(self, record):
+        self.inserts.append(record)
+
+    def update(self, key, fields, row_id=None, record=None):
+        entry = {self.key: key, "fields": fields}
+        if row_id is not None:
+            entry["id"] = row_id
+        if record is not None:
+            entry["record"] = record
+        self.updates.append(entry)
+
+    def noop(self, key):
+        self.noops.append(key)
+
+    def reject(self, key, reason):
+        self.rejects.append({self.key: key, "reason": reason})
+
+    # Execution shape ---------------------------------------------------------
+
+    def update_groups(self):
+        """PATCH-by-id updates grouped by identical payload: [(fields, [ids])]"""
+        groups = {}
+        for entry in self.updates:
+            group_key = json.dumps(entry["fields"], sort_keys=True, default=str)
+            groups.setdefault(group_key, (entry["fields"], []))[1].append(entry["id"])
+        return list(groups.values())
+
+    def estimate(self, insert_batch, update_batch=None, upsert_batch=None):
+        """
+        Requests and body bytes the execute step would send
+
+        update_batch: ids per PATCH (updates grouped by payload), or
+        upsert_batch: changed rows per upsert (updates sent as full records)
+        """
+        requests = {"prefetch": self.prefetch_requests, "insert": 0, "update": 0}
+        sizes = {"insert": 0, "update": 0}
+
+        for i in range(0, len(self.inserts), insert_batch):
+            requests["insert"] += 1
+            sizes["insert"] += payload_bytes(self.inserts[i:i + insert_batch])
+
+        if upsert_batch:
+            records = [entry["record"] for entry in self.updates]
+            for i in range(0, len(records), upsert_batch):
+                requests["update"] += 1
+                sizes["update"] += payload_bytes(records[i:i + upsert_batch])
+        else:
+            for fields, ids in self.update_groups():
+                patches = math.ceil(len(ids) / update_batch)
+                requests["update"] += patches
+                sizes["update"] += patches * payload_bytes(fields)
+
+        return {"requests": requests, "bytes": sizes}
+
+    # Reporting ---------------------------------------------------------------
+
+    def counts(self):
+        return {
+            "insert": len(self.inserts),
+            "update": len(self.updates),
+            "noop": len(self.noops),
+            "reject": len(self.rejects),
+        }
+
+    def print_summary(self, estimate):
+        counts = self.counts()
+        total = sum(counts.values())
+        requests = estimate["requests"]
+        sizes = estimate["bytes"]
+
+        print("\n" + "=" * 80)
+        print(f"WRITE PLAN: {self.table} (dry run - nothing was written)")
+        print("=" * 80)
+        print(f"Rows planned: {total}")
+        print(f"  Insert:  {counts['insert']:>8}   {requests['insert']:>5} requests  {sizes['insert'] / 1e3:>10.1f} KB")
+        print(f"  Update:  {counts['update']:>8}   {requests['update']:>5} requests  {sizes['update'] / 1e3:>10.1f} KB")
+        print(f"  No-op:   {counts['noop']:>8}")
+        print(f"  Reject:  {counts['reject']:>8}")
+        print(f"Prefetch requests used: {requests['prefetch']}")
+        print(f"Execute would send {requests['insert'] + requests['update']} requests, "
+              f"{(sizes['insert'] + sizes['update']) / 1e6:.2f} MB of payload")
+
+        if self.updates:
+            field_counts = {}
+            for entry in self.updates:
+                for field in entry["fields"]:
+                    field_counts[field] = field_counts.get(field, 0) + 1
+            print("\nFields updated most often:")
+            for field, n in sorted(field_counts.items(), key=lambda item: -item[1])[:10]:
+                print(f"  {field:<30} {n:>8}")
+
+        if self.inserts:
+            print("\nExample inserts:")
+            for record in self.inserts[:EXAMPLES]:
+                print(f"  + {record.get(self.key)}")
+        if self.updates:
+            print("\nExample updates:")
+            for entry in self.updates[:EXAMPLES]:
+                changes = ", ".join(f"{field}={value!r}" for field, value in list(entry["fields"].items())[:4])
+                print(f"  ~ {entry[self.key]}: {changes}")
+        if self.rejects:
+            print("\nRejected rows:")
+            for entry in self.rejects[:EXAMPLES * 2]:
+                print(f"  x {entry[self.key]}: {entry['reason']}")
+        print("=" * 80)
+
+    # Persistence -------------------------------------------------------------
+
+    def save(self, path, estimate=None):
+        """Write the plan atomically"""
+        path = Path(path)
+        data = {
+            "version": PLAN_VERSION,
+            "table": self.table,
+            "key": self.key,
+            "fingerprint": self.fingerprint,
+            "created_at": self.created_at,
+            "counts": self.counts(),
+            "estimate": estimate,
+            "inserts": self.inserts,
+            "updates": self.updates,
+            "noops": self.noops,
+            "rejects": self.rejects,
+        }
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=str)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, table, fingerprint):
+        """
+        Read a saved plan for `table`
+
+        Raises ValueError when the file is not a plan for this table or the
+        inputs changed since it was made (fingerprint mismatch).
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != PLAN_VERSION or data.get("table") != table:
+            raise ValueError(f"{Path(path).name} is not a {table} plan")
+        if data.get("fingerprint") != fingerprint:
+            raise ValueError(f"input changed since {Path(path).name} was made ({data.get('created_at')}) - plan again")
+
+        plan = cls(table, data["key"], fingerprint)
+        plan.created_at = data.get("created_at")
+        plan.inserts = data.get("inserts", [])
+        plan.updates = data.get("updates", [])
+        plan.noops = data.get("noops", [])
+        plan.rejects = data.get("rejects", [])
+        return plan